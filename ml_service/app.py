@@ -1,29 +1,271 @@
 """
 Flask API for Stock Price Prediction ML Service
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import contextvars
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from model_trainer import LSTMModelTrainer
-from data_preprocessor import StockDataPreprocessor
-from config import API_HOST, API_PORT, DEBUG
+from prediction_cache import PredictionCache
+from prediction_store import get_prediction_store
+from micro_batching import MicroBatcher
+from single_flight import SingleFlight
+from metrics import REGISTRY, stage, start_trace, end_trace
+from config import (
+    API_HOST, API_PORT, DEBUG, BATCH_PREDICT_WORKERS, MAX_DAYS_AHEAD, PREDICTION_CACHE_ENABLED,
+    MICRO_BATCH_ENABLED, SERVING_BACKEND, METRICS_ENABLED, DEBUG_TIMING_HEADER,
+    INDICATOR_SERIES_PERIOD, SERVING_THREADS_PER_WORKER, PREDICTION_STORE_ENABLED
+)
 import traceback
 
+if SERVING_BACKEND not in ('keras', 'tflite'):
+    raise ValueError(f"Unknown SERVING_BACKEND: {SERVING_BACKEND}")
+
 app = Flask(__name__)
 CORS(app)
 
-# Initialize trainer
-trainer = LSTMModelTrainer()
-preprocessor = StockDataPreprocessor()
+STARTED_AT = time.time()
+
+# pandas, scikit-learn and TensorFlow are imported when the first endpoint
+# that needs them runs, so /health answers as soon as the process is up
+prediction_cache = PredictionCache() if PREDICTION_CACHE_ENABLED else None
+
+# Written after the close by `python prediction_store.py`; read-only here
+prediction_store = get_prediction_store() if PREDICTION_STORE_ENABLED else None
+
+# Concurrent identical requests wait on one in-flight computation
+predict_flight = SingleFlight('predict')
+train_flight = SingleFlight('train')
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'ml_http_request_duration_seconds', 'HTTP request latency', ('endpoint', 'method')
+)
+REQUESTS = REGISTRY.counter(
+    'ml_http_requests_total', 'HTTP requests by status code', ('endpoint', 'method', 'status')
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    'ml_http_request_errors_total', 'HTTP requests answered with a 5xx status', ('endpoint',)
+)
+IN_FLIGHT = REGISTRY.gauge('ml_http_requests_in_flight', 'HTTP requests being processed')
+
+
+class _Pipeline:
+    """Prediction objects for the configured serving backend"""
+
+    def __init__(self, preprocessor):
+        from predictor import Predictor
+        from model_registry import ModelRegistry
+
+        self.preprocessor = preprocessor
+        self.predictor = Predictor(preprocessor)
+
+        if SERVING_BACKEND == 'tflite':
+            # Exported models through the TFLite interpreter; TensorFlow itself
+            # is not imported when the tflite_runtime package is installed
+            from lite_runtime import LiteInference, load_lite_model, resolve_lite_model_path
+            self.model_registry = ModelRegistry(resolver=resolve_lite_model_path, loader=load_lite_model)
+            self.fused_inference = LiteInference()
+            single_inference = self.fused_inference
+        else:
+            # TensorFlow loads with the first model, not here
+            from batch_inference import FusedInference
+            self.model_registry = ModelRegistry()
+            self.fused_inference = FusedInference()
+            # Per-model traced calls: fusing arbitrary model combinations from
+            # unrelated requests would keep retracing
+            single_inference = FusedInference(fuse_models=False)
+            # Evicted models must not stay alive in traced functions
+            self.model_registry.on_evict(self.fused_inference.forget)
+            self.model_registry.on_evict(single_inference.forget)
+
+        # Single predictions from concurrent requests share forward passes
+        self.micro_batcher = MicroBatcher(single_inference) if MICRO_BATCH_ENABLED else None
+
+
+_preprocessor = None
+_pipeline = None
+_init_lock = threading.Lock()
+
+
+def get_preprocessor():
+    """Return the shared data preprocessor (pandas only, no TensorFlow)"""
+    global _preprocessor
+    with _init_lock:
+        if _preprocessor is None:
+            from data_preprocessor import StockDataPreprocessor
+            _preprocessor = StockDataPreprocessor()
+        return _preprocessor
+
+
+def get_pipeline():
+    """Return the prediction pipeline, building it on first use"""
+    global _pipeline
+    preprocessor = get_preprocessor()
+    with _init_lock:
+        if _pipeline is None:
+            _pipeline = _Pipeline(preprocessor)
+        return _pipeline
+
+def preload_models(symbols=None):
+    """
+    Load model bundles before gunicorn forks its workers
+
+    Called from gunicorn.conf.py with SERVING_PRELOAD. Workers inherit the
+    loaded bundles (scalers, indicator state, interpreters over mmap'd
+    .tflite files) copy-on-write instead of each loading its own copy.
+    Only the tflite backend preloads models: TensorFlow's thread pools do
+    not survive a fork, so Keras workers still load theirs after forking.
+
+    Args:
+        symbols: Symbols to load (default: every trained model, up to the
+            registry's capacity)
+
+    Returns:
+        Number of bundles loaded
+    """
+    import gc
+
+    pipeline = get_pipeline()
+    loaded = 0
+    if SERVING_BACKEND == 'tflite':
+        from lite_runtime import LITE_MODEL_SUFFIX
+        from predictor import trained_symbols
+
+        registry = pipeline.model_registry
+        symbols = symbols if symbols is not None else trained_symbols((LITE_MODEL_SUFFIX,))
+        symbols = symbols[:registry.max_models]
+        loaded = len(symbols) - len(registry.preload(symbols))
+    elif symbols:
+        print("⚠️  SERVING_BACKEND=keras cannot share models across a fork; workers load their own")
+
+    # Objects created so far live for the whole process; keep the collector
+    # from touching (and so copying) their pages in every worker
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+def _elapsed_ms(start):
+    """Milliseconds since a perf_counter() start"""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _model_version(symbol):
+    """Resolved symbol and model file mtime; raises FileNotFoundError"""
+    resolved, path = get_pipeline().model_registry.resolve(symbol)
+    return resolved, os.path.getmtime(path)
+
+def _stored_prediction(resolved, model_mtime, symbol, days_ahead):
+    """Fresh precomputed response from the post-close batch, or None"""
+    if prediction_store is None:
+        return None
+    with stage('prediction_store'):
+        stored = prediction_store.get(resolved, days_ahead, model_mtime, get_preprocessor().last_bar_date(symbol))
+    if stored is None:
+        return None
+    result, age = stored
+    return {**result, 'cached': True, 'cache_age_seconds': round(age, 3), 'precomputed': True}
+
+def _cached_prediction(resolved, model_mtime, symbol, days_ahead):
+    """Cached response for a symbol whose latest bar is known, or None"""
+    if prediction_cache is None:
+        return None
+    last_bar_date = get_preprocessor().last_bar_date(symbol)
+    if last_bar_date is None:
+        return None
+    with stage('prediction_cache'):
+        cached = prediction_cache.get((resolved, model_mtime, last_bar_date, days_ahead))
+    if cached is None:
+        return None
+    result, age = cached
+    return {**result, 'cached': True, 'cache_age_seconds': round(age, 3), 'precomputed': False}
+
+def _cache_prediction(resolved, model_mtime, days_ahead, prediction):
+    """Store a fresh response and mark it uncached"""
+    if prediction_cache is not None:
+        key = (resolved, model_mtime, prediction['last_bar_date'], days_ahead)
+        prediction_cache.put(key, prediction)
+    return {**prediction, 'cached': False, 'cache_age_seconds': 0.0, 'precomputed': False}
+
+def _run_prediction(symbol, resolved, model_mtime, days_ahead):
+    """Full prediction pipeline for one symbol; the result is cached"""
+    pipeline = get_pipeline()
+    _, bundle = pipeline.model_registry.get(symbol)
+    batcher = pipeline.micro_batcher
+    infer = batcher.run if batcher else pipeline.fused_inference.run
+    prediction = pipeline.predictor.predict(symbol, days_ahead, bundle=bundle, infer=infer)
+    return _cache_prediction(resolved, model_mtime, days_ahead, prediction)
+
+def _run_training(symbol, period, retrain):
+    """Train with a dedicated trainer so concurrent requests share no state"""
+    # Training needs full TensorFlow; import it only when a job arrives
+    from model_trainer import LSTMModelTrainer
+    return LSTMModelTrainer().train(symbol, period, retrain)
+
+def _parse_days_ahead(data):
+    """Validate the requested forecast horizon"""
+    days_ahead = data.get('days_ahead', 1)
+    if isinstance(days_ahead, bool) or not isinstance(days_ahead, int) \
+            or not 1 <= days_ahead <= MAX_DAYS_AHEAD:
+        raise ValueError(f'days_ahead must be an integer between 1 and {MAX_DAYS_AHEAD}')
+    return days_ahead
+
+def _endpoint():
+    # The route pattern, not the path, keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.trace = None
+    if METRICS_ENABLED:
+        IN_FLIGHT.inc()
+        g.counted = True
+    if request.headers.get(DEBUG_TIMING_HEADER):
+        g.trace, g.trace_token = start_trace()
+
+@app.after_request
+def _finish_request(response):
+    if METRICS_ENABLED:
+        endpoint = _endpoint()
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+        if response.status_code >= 500:
+            REQUEST_ERRORS.inc(endpoint=endpoint)
+    
+    trace = g.get('trace')
+    if trace is not None:
+        # Stage breakdown requested with the debug header
+        response.headers['Server-Timing'] = trace.server_timing()
+        body = response.get_json(silent=True) if response.is_json else None
+        if isinstance(body, dict):
+            body['debug_timing'] = trace.breakdown()
+            response.set_data(app.json.dumps(body))
+    return response
+
+@app.teardown_request
+def _teardown_request(exc):
+    if g.pop('counted', False):
+        IN_FLIGHT.dec()
+    if g.get('trace') is not None:
+        end_trace(g.pop('trace_token'))
+        g.trace = None
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint; never loads the prediction pipeline"""
     return jsonify({
         'status': 'healthy',
         'service': 'ML Prediction Service',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'uptime_seconds': round(time.time() - STARTED_AT, 3),
+        'serving_backend': SERVING_BACKEND,
+        'pipeline_loaded': _pipeline is not None,
+        'tensorflow_loaded': 'tensorflow' in sys.modules,
+        # Set by gunicorn.conf.py or `python app.py`; None means library defaults
+        'thread_budget': int(os.environ['TF_NUM_INTRAOP_THREADS']) if os.environ.get('TF_NUM_INTRAOP_THREADS') else None
     })
 
 @app.route('/api/v1/predict', methods=['POST'])
@@ -46,19 +288,38 @@ def predict():
             }), 400
         
         symbol = data['symbol'].upper()
-        days_ahead = data.get('days_ahead', 1)
+        try:
+            days_ahead = _parse_days_ahead(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Check if model exists, if not return error
         try:
-            trainer.load_model(symbol)
+            resolved, model_mtime = _model_version(symbol)
         except FileNotFoundError:
             return jsonify({
                 'error': f'Model not found for {symbol}. Please train the model first.',
                 'symbol': symbol
             }), 404
         
-        # Make prediction
-        prediction = trainer.predict(symbol, days_ahead)
+        # Serve the post-close batch result, or a cached one, while the model
+        # and latest bar are unchanged
+        prediction = (
+            _stored_prediction(resolved, model_mtime, symbol, days_ahead)
+            or _cached_prediction(resolved, model_mtime, symbol, days_ahead)
+        )
+        if prediction is not None:
+            return jsonify({
+                'success': True,
+                'data': prediction
+            }), 200
+        
+        # Make prediction, joining an identical request already in flight
+        prediction, shared = predict_flight.do(
+            (resolved, model_mtime, days_ahead),
+            _run_prediction, symbol, resolved, model_mtime, days_ahead
+        )
+        prediction = {**prediction, 'coalesced': shared}
         
         return jsonify({
             'success': True,
@@ -95,8 +356,8 @@ def train():
         period = data.get('period', '2y')
         retrain = data.get('retrain', False)
         
-        # Train model
-        result = trainer.train(symbol, period, retrain)
+        # Train model; concurrent requests for the same job share one run
+        result, _ = train_flight.do((symbol, period, retrain), _run_training, symbol, period, retrain)
         
         return jsonify({
             'success': True,
@@ -124,6 +385,8 @@ def batch_predict():
         "days_ahead": 1
     }
     """
+    from forecasting import forecast_paths
+    
     try:
         data = request.get_json()
         
@@ -133,26 +396,116 @@ def batch_predict():
             }), 400
         
         symbols = [s.upper() for s in data['symbols']]
-        days_ahead = data.get('days_ahead', 1)
+        try:
+            days_ahead = _parse_days_ahead(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         results = []
         errors = []
+        timings = {}
+        request_start = time.perf_counter()
+        pipeline = get_pipeline()
+        predictor = pipeline.predictor
+        fused_inference = pipeline.fused_inference
+        
+        # Stage 0: serve symbols whose precomputed or cached result is still current
+        stage_start = time.perf_counter()
+        predictions = {}
+        versions = {}
+        store_hits = 0
+        for symbol in dict.fromkeys(symbols):
+            try:
+                versions[symbol] = _model_version(symbol)
+            except Exception as e:
+                errors.append({'symbol': symbol, 'error': str(e)})
+                continue
+            stored = _stored_prediction(*versions[symbol], symbol, days_ahead)
+            if stored is not None:
+                predictions[symbol] = stored
+                store_hits += 1
+                continue
+            cached = _cached_prediction(*versions[symbol], symbol, days_ahead)
+            if cached is not None:
+                predictions[symbol] = cached
+        timings['cache_lookup_ms'] = _elapsed_ms(stage_start)
+        timings['store_hits'] = store_hits
+        timings['cache_hits'] = len(predictions) - store_hits
         
-        for symbol in symbols:
+        # Stage 1: resolve model bundles from the in-process registry
+        stage_start = time.perf_counter()
+        bundles = {}
+        for symbol in versions:
+            if symbol in predictions:
+                continue
             try:
-                trainer.load_model(symbol)
-                prediction = trainer.predict(symbol, days_ahead)
-                results.append(prediction)
+                bundles[symbol] = pipeline.model_registry.get(symbol)[1]
             except Exception as e:
-                errors.append({
-                    'symbol': symbol,
-                    'error': str(e)
-                })
+                errors.append({'symbol': symbol, 'error': str(e)})
+        timings['load_models_ms'] = _elapsed_ms(stage_start)
+        
+        # Stage 2: fetch and preprocess all symbols concurrently
+        stage_start = time.perf_counter()
+        inputs = {}
+        if bundles:
+            workers = min(BATCH_PREDICT_WORKERS, len(bundles))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Each task runs in a copy of the request context so its
+                # stages land in this request's timing breakdown
+                futures = {
+                    pool.submit(
+                        contextvars.copy_context().run,
+                        predictor.prepare_inference, symbol, days_ahead, bundles[symbol]
+                    ): symbol
+                    for symbol in bundles
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        inputs[symbol] = future.result()
+                    except Exception as e:
+                        errors.append({'symbol': symbol, 'error': str(e)})
+        timings['fetch_preprocess_ms'] = _elapsed_ms(stage_start)
+        
+        # Stage 3: grouped inference with as few model calls as possible;
+        # every horizon step runs all symbols in one call
+        stage_start = time.perf_counter()
+        ready = [symbol for symbol in bundles if symbol in inputs]
+        with stage('forecast'):
+            paths, final_sequences, calls = forecast_paths(
+                [inputs[symbol] for symbol in ready],
+                [bundles[symbol].model for symbol in ready],
+                days_ahead,
+                infer=fused_inference.run
+            )
+        timings['inference_ms'] = _elapsed_ms(stage_start)
+        
+        # Stage 3b: Monte Carlo dropout samples for every symbol in one call
+        stage_start = time.perf_counter()
+        with stage('mc_dropout'):
+            samples, mc_calls = predictor.mc_dropout.run(
+                [(bundles[symbol].model, sequence) for symbol, sequence in zip(ready, final_sequences)],
+                infer=fused_inference.run
+            )
+        calls += mc_calls
+        timings['uncertainty_ms'] = _elapsed_ms(stage_start)
+        
+        # Stage 4: response assembly
+        stage_start = time.perf_counter()
+        for symbol, path, mc_samples in zip(ready, paths, samples):
+            prediction = predictor.finalize_prediction(inputs[symbol], path, mc_samples)
+            resolved, model_mtime = versions[symbol]
+            predictions[symbol] = _cache_prediction(resolved, model_mtime, days_ahead, prediction)
+        results = [predictions[symbol] for symbol in symbols if symbol in predictions]
+        timings['postprocess_ms'] = _elapsed_ms(stage_start)
+        timings['total_ms'] = _elapsed_ms(request_start)
+        timings['inference_calls'] = calls
         
         return jsonify({
             'success': True,
             'data': results,
-            'errors': errors if errors else None
+            'errors': errors if errors else None,
+            'timings': timings
         }), 200
         
     except Exception as e:
@@ -169,7 +522,8 @@ def get_technical_indicators():
     Request body:
     {
         "symbol": "RELIANCE",
-        "period": "3mo"
+        "period": "3mo",
+        "refresh": false
     }
     """
     try:
@@ -182,13 +536,13 @@ def get_technical_indicators():
         
         symbol = data['symbol'].upper()
         period = data.get('period', '3mo')
+        refresh = data.get('refresh', False)
         
-        # Fetch and calculate indicators
-        df = preprocessor.fetch_stock_data(symbol, period)
-        df = preprocessor.calculate_technical_indicators(df)
+        # Fetch bars and reuse the computed indicators while they are unchanged
+        series = _indicator_series(symbol, period, refresh)
         
         # Get latest values
-        latest = df.iloc[-1].to_dict()
+        latest = series.frame.iloc[-1].to_dict()
         
         return jsonify({
             'success': True,
@@ -220,7 +574,235 @@ def get_technical_indicators():
             'traceback': traceback.format_exc() if DEBUG else None
         }), 500
 
+def _indicator_series(symbol, period, refresh=False):
+    """Cached indicator frame for the symbol's current bars"""
+    from data_preprocessor import exchange_symbol
+    from indicator_series import get_indicator_series_cache
+    
+    preprocessor = get_preprocessor()
+    bars = preprocessor.fetch_stock_data(symbol, period, refresh=refresh)
+    return get_indicator_series_cache().get(
+        exchange_symbol(symbol), period, bars, preprocessor.calculate_technical_indicators
+    )
+
+def _parse_iso_date(name):
+    """Validated ISO date query parameter, or None when absent"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date (YYYY-MM-DD)')
+
+@app.route('/api/v1/technical-indicators/series', methods=['GET'])
+def get_indicator_series():
+    """
+    Full indicator time series for a symbol, one array per column
+    
+    Query parameters:
+        symbol: Stock symbol (required)
+        period: History the indicators are computed over (default 2y)
+        start, end: Inclusive ISO date range
+        since: Only rows after this ISO date (incremental chart updates)
+        columns: Comma-separated column subset (default: all)
+        format: json (default) or arrow; an Accept header of
+            application/vnd.apache.arrow.stream also selects Arrow
+    
+    Responses carry an ETag over the bars and the query, so an unchanged
+    reload is answered with 304 Not Modified.
+    """
+    from indicator_series import ARROW_MIMETYPE, SERIES_FORMATS, encode_arrow, encode_json, series_etag
+    
+    try:
+        symbol = request.args.get('symbol', '').strip().upper()
+        if not symbol:
+            return jsonify({'error': 'Missing required parameter: symbol'}), 400
+        
+        period = request.args.get('period', INDICATOR_SERIES_PERIOD)
+        columns = [col.strip() for col in request.args.get('columns', '').split(',') if col.strip()]
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'arrow' if request.accept_mimetypes.best == ARROW_MIMETYPE else 'json'
+        if fmt not in SERIES_FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(SERIES_FORMATS)}"}), 400
+        try:
+            start, end, since = _parse_iso_date('start'), _parse_iso_date('end'), _parse_iso_date('since')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        series = _indicator_series(symbol, period)
+        try:
+            dates, values = series.select(columns, start, end, since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag = series_etag(series, list(values), start, end, since, fmt)
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        
+        if fmt == 'arrow':
+            response = Response(encode_arrow(series, dates, values), mimetype=ARROW_MIMETYPE)
+        else:
+            response = jsonify({'success': True, 'data': encode_json(series, dates, values)})
+        response.set_etag(etag)
+        return response
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc() if DEBUG else None
+        }), 500
+
+@app.route('/api/v1/cache/stats', methods=['GET'])
+def cache_stats():
+    """OHLCV cache hit/miss and size statistics"""
+    cache = get_preprocessor().cache
+    series_cache = sys.modules.get('indicator_series')
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': cache is not None,
+            'stats': cache.stats() if cache is not None else None,
+            'indicator_series': series_cache.get_indicator_series_cache().stats() if series_cache else None
+        }
+    }), 200
+
+@app.route('/api/v1/predictions/cache/stats', methods=['GET'])
+def prediction_cache_stats():
+    """Prediction result cache hit/miss statistics"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': prediction_cache is not None,
+            'stats': prediction_cache.stats() if prediction_cache else None,
+            'store': prediction_store.stats() if prediction_store else None
+        }
+    }), 200
+
+@app.route('/api/v1/coalescing/stats', methods=['GET'])
+def coalescing_stats():
+    """Counts of requests that joined an in-flight identical computation"""
+    from data_preprocessor import fetch_flight
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'predict': predict_flight.stats(),
+            'train': train_flight.stats(),
+            'fetch': fetch_flight.stats()
+        }
+    }), 200
+
+@app.route('/api/v1/inference/stats', methods=['GET'])
+def inference_stats():
+    """Micro-batching queue statistics for single predictions"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'micro_batching': (
+                _pipeline.micro_batcher.stats()
+                if _pipeline is not None and _pipeline.micro_batcher else None
+            )
+        }
+    }), 200
+
+@app.route('/api/v1/models/stats', methods=['GET'])
+def model_stats():
+    """Loaded model registry statistics"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'serving_backend': SERVING_BACKEND,
+            **get_pipeline().model_registry.stats()
+        }
+    }), 200
+
+def _collect_component_metrics():
+    """Counters and gauges kept by the caches, registry and batcher"""
+    families = []
+    
+    def family(name, kind, documentation, samples):
+        families.append((name, kind, documentation, samples))
+    
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        family('ml_prediction_cache_requests_total', 'counter', 'Prediction cache lookups',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        family('ml_prediction_cache_entries', 'gauge', 'Cached prediction responses',
+               [({}, stats['entries'])])
+    
+    if prediction_store is not None:
+        stats = prediction_store.stats()
+        family('ml_prediction_store_requests_total', 'counter', 'Precomputed prediction lookups by outcome',
+               [({'result': result}, stats[key])
+                for result, key in (('hit', 'hits'), ('miss', 'misses'), ('stale', 'stale'))])
+        if stats['last_run'] is not None:
+            family('ml_prediction_store_last_run_age_seconds', 'gauge', 'Seconds since the last precompute run',
+                   [({}, stats['last_run']['age_seconds'])])
+    
+    # Only report components that already exist; a scrape never builds them
+    cache = _preprocessor.cache if _preprocessor is not None else None
+    if cache is not None:
+        stats = cache.stats()
+        family('ml_ohlcv_cache_requests_total', 'counter', 'OHLCV cache lookups by outcome', [
+            ({'result': result}, stats[key])
+            for result, key in (('hit', 'hits'), ('miss', 'misses'),
+                                ('incremental_update', 'incremental_updates'), ('refresh', 'refreshes'))
+        ])
+    
+    if 'indicator_series' in sys.modules:
+        stats = sys.modules['indicator_series'].get_indicator_series_cache().stats()
+        family('ml_indicator_series_cache_requests_total', 'counter', 'Indicator series cache lookups',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        family('ml_indicator_series_cache_entries', 'gauge', 'Computed indicator frames held in memory',
+               [({}, stats['entries'])])
+    
+    flights = [predict_flight, train_flight]
+    if 'data_preprocessor' in sys.modules:
+        flights.append(sys.modules['data_preprocessor'].fetch_flight)
+    if 'indicator_series' in sys.modules:
+        flights.append(sys.modules['indicator_series'].series_flight)
+    family('ml_coalesced_requests_total', 'counter', 'Calls that joined an identical in-flight call',
+           [({'operation': flight.name}, flight.stats()['coalesced']) for flight in flights])
+    
+    if _pipeline is not None:
+        stats = _pipeline.model_registry.stats()
+        family('ml_model_registry_requests_total', 'counter', 'Model registry lookups by outcome', [
+            ({'result': result}, stats[key])
+            for result, key in (('hit', 'hits'), ('miss', 'misses'), ('reload', 'reloads'))
+        ])
+        family('ml_model_registry_evictions_total', 'counter', 'Models evicted from memory',
+               [({}, stats['evictions'])])
+        family('ml_loaded_models', 'gauge', 'Model bundles held in memory',
+               [({'backend': SERVING_BACKEND}, stats['loaded_models'])])
+        family('ml_loaded_model_bytes', 'gauge', 'Memory used by loaded models',
+               [({'backend': SERVING_BACKEND}, stats['memory_bytes'])])
+        if _pipeline.micro_batcher is not None:
+            stats = _pipeline.micro_batcher.stats()
+            family('ml_micro_batches_total', 'counter', 'Micro-batches run', [({}, stats['batches'])])
+            family('ml_micro_batch_requests_total', 'counter', 'Requests served through micro-batches',
+                   [({}, stats['requests'])])
+            family('ml_micro_batch_queued', 'gauge', 'Requests waiting for a micro-batch',
+                   [({}, stats['queued'])])
+    
+    family('ml_process_uptime_seconds', 'gauge', 'Seconds since the API module was imported',
+           [({}, round(time.time() - STARTED_AT, 3))])
+    return families
+
+REGISTRY.add_collector(_collect_component_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for this process"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    print(f"Starting ML Service on {API_HOST}:{API_PORT}")
+    from cpu_topology import configure_threads, describe, partition
+    
+    # One process: the thread budget covers every core unless set explicitly
+    _, threads = partition(1, SERVING_THREADS_PER_WORKER)
+    configure_threads(threads)
+    print(f"Starting ML Service on {API_HOST}:{API_PORT} ({describe(1, threads)})")
     app.run(host=API_HOST, port=API_PORT, debug=DEBUG)
 
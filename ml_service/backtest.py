@@ -0,0 +1,266 @@
+"""
+Walk-forward backtests of saved models over long histories
+
+For each symbol the saved model bundle is scored on every day of the
+backtest period at once: indicators are computed over the whole history,
+scaled with the training scalers, every input window is a strided view
+(sequence_windows.SlidingWindowDataset) and predictions come from a few
+large batched calls. Errors are then summed over rolling windows with
+cumulative sums, so a 5-year backtest is one pass per symbol instead of one
+`predict` (and one download) per day. Symbols run in parallel. Usage:
+    python backtest.py                                 # check_progress.ALL_STOCKS, 5y
+    python backtest.py --symbols TCS.NS INFY.NS --period 10y --window 21 --step 5
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from config import (
+    SEQUENCE_LENGTH, PREDICTION_DAYS, INDICATOR_WARMUP_BARS, BATCH_PREDICT_WORKERS, BACKTEST_PERIOD,
+    BACKTEST_WINDOW_BARS, BACKTEST_STEP_BARS, BACKTEST_BATCH_SIZE, BACKTEST_DIR
+)
+from metrics import stage
+
+SUMMARY_COLUMNS = (
+    'symbol', 'samples', 'mae', 'rmse', 'mape', 'directional_accuracy',
+    'oos_samples', 'oos_mape', 'oos_directional_accuracy', 'worst_window_mape', 'seconds',
+)
+
+
+def _predict(model, X, batch_size):
+    """Scaled one-step predictions for (possibly strided) windows, in large batches"""
+    outputs = [
+        np.asarray(model.predict_on_batch(np.ascontiguousarray(X[i:i + batch_size])))
+        for i in range(0, len(X), batch_size)
+    ]
+    return np.concatenate(outputs).reshape(-1)
+
+
+def _window_starts(n, window, step):
+    """Window start offsets, aligned so the last window ends at the newest sample"""
+    if n <= window:
+        return np.array([0]), n
+    return np.arange(n - window, -1, -step)[::-1], window
+
+
+def _window_sums(values, starts, window):
+    sums = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    return sums[starts + window] - sums[starts]
+
+
+def _scores(actual, predicted, previous):
+    """MAE, RMSE, MAPE and directional accuracy over aligned arrays"""
+    if len(actual) == 0:
+        return {'mae': None, 'rmse': None, 'mape': None, 'directional_accuracy': None}
+    errors = predicted - actual
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(np.mean(np.abs(errors) / np.abs(actual)) * 100),
+        'directional_accuracy': float(np.mean(np.sign(predicted - previous) == np.sign(actual - previous)) * 100),
+    }
+
+
+def score_windows(dates, actual, predicted, previous, in_sample, window=BACKTEST_WINDOW_BARS,
+                  step=BACKTEST_STEP_BARS):
+    """
+    Metrics for every rolling window of aligned per-day arrays
+
+    Args:
+        dates: Target bar dates
+        actual: Realized closes
+        predicted: Predicted closes
+        previous: Close the prediction was made from (for direction)
+        in_sample: Whether each target bar was in the model's training data
+        window: Bars per window
+        step: Bars between window starts
+
+    Returns:
+        List of row dicts: start/end date, bars, in-sample share, MAE,
+        RMSE, MAPE and directional accuracy
+    """
+    starts, window = _window_starts(len(actual), window, step)
+    errors = np.abs(predicted - actual)
+    mae = _window_sums(errors, starts, window) / window
+    rmse = np.sqrt(_window_sums(errors ** 2, starts, window) / window)
+    mape = _window_sums(errors / np.abs(actual), starts, window) / window * 100
+    hits = (np.sign(predicted - previous) == np.sign(actual - previous)).astype(np.float64)
+    direction = _window_sums(hits, starts, window) / window * 100
+    in_sample_share = _window_sums(in_sample.astype(np.float64), starts, window) / window
+
+    return [
+        {
+            'start': str(dates[start]),
+            'end': str(dates[start + window - 1]),
+            'bars': int(window),
+            'in_sample': round(float(share), 3),
+            'mae': float(mae[i]),
+            'rmse': float(rmse[i]),
+            'mape': float(mape[i]),
+            'directional_accuracy': float(direction[i]),
+        }
+        for i, (start, share) in enumerate(zip(starts, in_sample_share))
+    ]
+
+
+def backtest_symbol(symbol, registry, preprocessor, period=BACKTEST_PERIOD, window=BACKTEST_WINDOW_BARS,
+                    step=BACKTEST_STEP_BARS, batch_size=BACKTEST_BATCH_SIZE):
+    """
+    Walk a saved model forward over a symbol's history
+
+    Every day whose input window starts after the indicator warm-up is
+    predicted from the bars up to the previous close, as it would have been
+    served that day. Days up to the model's last training bar are in-sample;
+    `oos_*` scores only the days after it.
+
+    Args:
+        symbol: Stock symbol
+        registry: model_registry.ModelRegistry loading Keras bundles
+        preprocessor: StockDataPreprocessor used to fetch bars
+
+    Returns:
+        Tuple of (summary dict, list of window rows)
+
+    Raises:
+        FileNotFoundError: If no trained model exists
+        ValueError: If the bundle has no saved scalers, or the history is
+            too short for one window
+    """
+    import pandas as pd
+    from sequence_windows import SlidingWindowDataset
+
+    start_time = time.perf_counter()
+    resolved, bundle = registry.get(symbol)
+    if not bundle.fitted:
+        raise ValueError(f"No saved scalers for {resolved}; retrain it before backtesting")
+
+    df = preprocessor.calculate_technical_indicators(preprocessor.fetch_stock_data(resolved, period))
+    with stage('scale'):
+        features = bundle.feature_scaler.transform(df[bundle.feature_columns].to_numpy(dtype=np.float32))
+    dataset = SlidingWindowDataset(features, SEQUENCE_LENGTH, PREDICTION_DAYS, target_column=3)
+    dataset = dataset.subset(min(INDICATOR_WARMUP_BARS, len(dataset)), len(dataset))
+    if len(dataset) == 0:
+        raise ValueError(f"Not enough history for {resolved} over {period}")
+
+    with stage('forecast'):
+        predicted = _predict(bundle.model, dataset.X, batch_size)
+    predicted = bundle.close_scaler.inverse_transform(predicted.reshape(-1, 1))[:, 0]
+
+    # Sample i predicts row start + i + SEQUENCE_LENGTH + PREDICTION_DAYS - 1
+    first = dataset.start + SEQUENCE_LENGTH + PREDICTION_DAYS - 1
+    target_rows = np.arange(first, first + len(dataset))
+    close = df['close'].to_numpy(dtype=np.float64)
+    actual = close[target_rows]
+    previous = close[target_rows - PREDICTION_DAYS]
+    dates = df['date'].dt.strftime('%Y-%m-%d').to_numpy()[target_rows]
+    last_trained = bundle.metadata.get('last_bar_date')
+    in_sample = (
+        (df['date'] <= pd.Timestamp(last_trained)).to_numpy()[target_rows]
+        if last_trained else np.zeros(len(target_rows), dtype=bool)
+    )
+
+    windows = score_windows(dates, actual, predicted, previous, in_sample, window, step)
+    oos = ~in_sample
+    overall = _scores(actual, predicted, previous)
+    out_of_sample = _scores(actual[oos], predicted[oos], previous[oos])
+    summary = {
+        'symbol': resolved,
+        'samples': int(len(actual)),
+        'first_date': str(dates[0]),
+        'last_date': str(dates[-1]),
+        **overall,
+        'oos_samples': int(oos.sum()),
+        'oos_mape': out_of_sample['mape'],
+        'oos_directional_accuracy': out_of_sample['directional_accuracy'],
+        'worst_window_mape': max(row['mape'] for row in windows),
+        'seconds': round(time.perf_counter() - start_time, 3),
+    }
+    return summary, [{'symbol': resolved, **row} for row in windows]
+
+
+def backtest_universe(symbols=None, period=BACKTEST_PERIOD, window=BACKTEST_WINDOW_BARS,
+                      step=BACKTEST_STEP_BARS, workers=BATCH_PREDICT_WORKERS, batch_size=BACKTEST_BATCH_SIZE):
+    """
+    Backtest several symbols in parallel
+
+    Symbols run on a thread pool: downloads wait on the network and the
+    batched forward passes release the GIL, so fetching one symbol overlaps
+    predicting another. Every model is loaded once into one registry.
+
+    Returns:
+        Tuple of (summary DataFrame, windows DataFrame, list of errors)
+    """
+    import pandas as pd
+    from check_progress import ALL_STOCKS
+    from data_preprocessor import StockDataPreprocessor
+    from model_registry import ModelRegistry
+
+    symbols = list(dict.fromkeys(symbols or ALL_STOCKS))
+    # Holds every model of the run; the memory budget still evicts if exceeded
+    registry = ModelRegistry(max_models=len(symbols))
+    preprocessor = StockDataPreprocessor()
+
+    summaries, windows, errors = [], [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as pool:
+        futures = {
+            pool.submit(backtest_symbol, symbol, registry, preprocessor, period, window, step, batch_size): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                summary, rows = future.result()
+            except Exception as e:
+                errors.append({'symbol': symbol, 'error': str(e)})
+                continue
+            summaries.append(summary)
+            windows.extend(rows)
+
+    order = {symbol: index for index, symbol in enumerate(symbols)}
+    summary_df = pd.DataFrame(summaries, columns=list(SUMMARY_COLUMNS) + ['first_date', 'last_date'])
+    summary_df = summary_df.sort_values('symbol', key=lambda s: s.map(lambda v: order.get(v, len(order))))
+    windows_df = pd.DataFrame(windows)
+    return summary_df.reset_index(drop=True), windows_df, errors
+
+
+def print_summary(summary):
+    fmt = lambda value, digits=2: f"{value:.{digits}f}" if value is not None and value == value else '-'
+    print(f"{'symbol':<16s} {'days':>5s} {'MAE':>9s} {'RMSE':>9s} {'MAPE %':>7s} {'dir %':>6s} "
+          f"{'OOS days':>8s} {'OOS MAPE':>9s} {'OOS dir':>8s} {'worst win':>10s} {'sec':>6s}")
+    for row in summary.to_dict('records'):
+        print(f"{row['symbol']:<16s} {row['samples']:>5d} {fmt(row['mae']):>9s} {fmt(row['rmse']):>9s} "
+              f"{fmt(row['mape']):>7s} {fmt(row['directional_accuracy'], 1):>6s} {row['oos_samples']:>8d} "
+              f"{fmt(row['oos_mape']):>9s} {fmt(row['oos_directional_accuracy'], 1):>8s} "
+              f"{fmt(row['worst_window_mape']):>10s} {fmt(row['seconds']):>6s}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbols', nargs='+', help="Symbols to backtest (default: check_progress.ALL_STOCKS)")
+    parser.add_argument('--period', default=BACKTEST_PERIOD, help="History to walk over")
+    parser.add_argument('--window', type=int, default=BACKTEST_WINDOW_BARS, help="Bars per scored window")
+    parser.add_argument('--step', type=int, default=BACKTEST_STEP_BARS, help="Bars between window starts")
+    parser.add_argument('--workers', type=int, default=BATCH_PREDICT_WORKERS, help="Symbols in parallel")
+    parser.add_argument('--output', help="Results prefix (default: data/backtests/walkforward_<time>)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary, windows, errors = backtest_universe(args.symbols, args.period, args.window, args.step, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print_summary(summary)
+    for error in errors:
+        print(f"   ❌ {error['symbol']}: {error['error']}")
+    print(f"\n{len(summary)} symbols, {int(summary['samples'].sum()) if len(summary) else 0} days "
+          f"and {len(windows)} windows in {elapsed:.1f}s")
+
+    if len(summary):
+        prefix = args.output or os.path.join(BACKTEST_DIR, f"walkforward_{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        summary.to_csv(f"{prefix}_summary.csv", index=False, float_format='%.4f')
+        windows.to_csv(f"{prefix}_windows.csv", index=False, float_format='%.4f')
+        print(f"Results written to {prefix}_summary.csv and {prefix}_windows.csv")
@@ -0,0 +1,114 @@
+"""
+Grouped inference: run many (model, input) pairs with as few calls as possible
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import BATCH_PREDICT_FUSE_MODELS, FUSED_INFERENCE_CACHE_SIZE
+
+
+class FusedInference:
+    """
+    Executes several models in a single traced graph call
+
+    Inputs for the same model are stacked along the batch axis so each model
+    runs once. Distinct models that take the same input shape are combined
+    into one `tf.function`, so a whole watchlist becomes one call instead of
+    one `predict` per symbol; a single model is traced the same way, which
+    avoids eager per-op overhead. Traced functions are cached by the set of model
+    objects involved, which stays stable while the registry keeps them loaded;
+    `forget` drops the ones holding a model the registry has evicted.
+    """
+
+    def __init__(self, fuse_models=BATCH_PREDICT_FUSE_MODELS,
+                 cache_size=FUSED_INFERENCE_CACHE_SIZE):
+        self.fuse_models = fuse_models
+        self.cache_size = cache_size
+        self._functions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, requests, training=False):
+        """
+        Run a list of (model, input) pairs
+
+        Args:
+            requests: List of (Keras model, array of shape (n, timesteps, features))
+            training: Run layers in training mode (keeps dropout active for
+                Monte Carlo sampling)
+
+        Returns:
+            Tuple of (list of output arrays aligned with requests,
+            number of graph/model calls made)
+        """
+        if not requests:
+            return [], 0
+
+        # Stack every input that goes to the same model
+        groups = OrderedDict()
+        for index, (model, x) in enumerate(requests):
+            entry = groups.setdefault(id(model), {'model': model, 'inputs': [], 'indices': []})
+            entry['inputs'].append(np.asarray(x, dtype=np.float32))
+            entry['indices'].append(index)
+
+        # Models sharing an input shape can run in one fused call
+        by_shape = OrderedDict()
+        for group in groups.values():
+            shape = tuple(group['model'].input_shape[1:])
+            by_shape.setdefault(shape, []).append(group)
+
+        outputs = [None] * len(requests)
+        calls = 0
+        for shape_groups in by_shape.values():
+            stacked = [np.concatenate(group['inputs']) for group in shape_groups]
+            models = [group['model'] for group in shape_groups]
+
+            if self.fuse_models:
+                results = self._fused(models)(stacked, training)
+                calls += 1
+            else:
+                # One traced call per model; keeps the set of traced graphs
+                # bounded by the number of models when groupings vary
+                results = [self._fused([model])([x], training)[0] for model, x in zip(models, stacked)]
+                calls += len(models)
+
+            for group, result in zip(shape_groups, results):
+                result = np.asarray(result)
+                offset = 0
+                for index, x in zip(group['indices'], group['inputs']):
+                    outputs[index] = result[offset:offset + len(x)]
+                    offset += len(x)
+
+        return outputs, calls
+
+    def forget(self, model):
+        """
+        Drop every cached function that calls `model`
+
+        Registered with ModelRegistry.on_evict: the traced functions keep
+        their models alive, and a later model could reuse the same id().
+        """
+        with self._lock:
+            for key in [key for key in self._functions if id(model) in key]:
+                del self._functions[key]
+
+    def _fused(self, models):
+        key = tuple(id(model) for model in models)
+        with self._lock:
+            function = self._functions.get(key)
+            if function is not None:
+                self._functions.move_to_end(key)
+                return function
+
+            import tensorflow as tf
+
+            # training is a Python bool, so each mode gets its own trace
+            @tf.function(reduce_retracing=True)
+            def function(inputs, training):
+                return [model(x, training=training) for model, x in zip(models, inputs)]
+
+            self._functions[key] = function
+            while len(self._functions) > self.cache_size:
+                self._functions.popitem(last=False)
+            return function
@@ -0,0 +1,112 @@
+"""
+Benchmark single-prediction inference under concurrent load: one call per
+request vs the cross-request micro-batching queue
+
+Concurrent clients each send (1, 60, 20) requests to one of a few models.
+Reports throughput and p50/p99 latency for every max-wait / max-batch
+setting. Usage:
+    python benchmark_micro_batching.py [--clients 32] [--requests 50] [--models 4]
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+import numpy as np
+
+from batch_inference import FusedInference
+from config import SEQUENCE_LENGTH
+from data_preprocessor import FEATURE_COLUMNS
+from micro_batching import MicroBatcher
+from model_trainer import LSTMModelTrainer
+
+# (max_wait_ms, max_batch) settings to compare against no batching
+DEFAULT_SETTINGS = [(1, 64), (2, 64), (2, 256), (5, 256), (10, 256)]
+
+
+def _load(infer, models, clients, requests_per_client, seed=0):
+    """Run the client threads; returns per-request latencies in ms and wall time"""
+    inputs = np.random.default_rng(seed).random(
+        (clients, 1, SEQUENCE_LENGTH, len(FEATURE_COLUMNS)), dtype=np.float32
+    )
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def client(index):
+        rng = random.Random(seed + index)
+        barrier.wait()
+        for _ in range(requests_per_client):
+            model = rng.choice(models)
+            start = time.perf_counter()
+            infer([(model, inputs[index])])
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return np.concatenate([np.array(values) for values in latencies]), wall
+
+
+def _summarize(name, latencies, wall, extra=None):
+    result = {
+        'mode': name,
+        'requests': int(len(latencies)),
+        'throughput_rps': round(len(latencies) / wall, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        **(extra or {}),
+    }
+    print(
+        f"{name:24s} throughput={result['throughput_rps']:8.1f} req/s "
+        f"p50={result['p50_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms"
+    )
+    return result
+
+
+def run(clients, requests_per_client, n_models, settings=DEFAULT_SETTINGS):
+    trainer = LSTMModelTrainer(verbose=0)
+    models = [trainer.build_model((SEQUENCE_LENGTH, len(FEATURE_COLUMNS))) for _ in range(n_models)]
+
+    # Trace every model and the batch shapes before measuring
+    direct = FusedInference(fuse_models=False)
+    warmup = np.zeros((1, SEQUENCE_LENGTH, len(FEATURE_COLUMNS)), dtype=np.float32)
+    for model in models:
+        for rows in (1, 2, 8):
+            direct.run([(model, np.repeat(warmup, rows, axis=0))])
+
+    results = []
+    latencies, wall = _load(direct.run, models, clients, requests_per_client)
+    results.append(_summarize('no batching', latencies, wall))
+
+    for max_wait_ms, max_batch in settings:
+        batcher = MicroBatcher(direct, max_wait_ms=max_wait_ms, max_batch=max_batch)
+        latencies, wall = _load(batcher.run, models, clients, requests_per_client)
+        stats = batcher.stats()
+        results.append(_summarize(
+            f"wait={max_wait_ms}ms batch={max_batch}", latencies, wall,
+            {
+                'max_wait_ms': max_wait_ms,
+                'max_batch': max_batch,
+                'avg_batch_requests': round(stats['avg_batch_requests'], 2),
+                'model_calls': stats['calls'],
+            }
+        ))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50, help="Requests per client")
+    parser.add_argument('--models', type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.clients, args.requests, args.models), indent=2))
@@ -0,0 +1,235 @@
+"""
+Benchmark per-worker memory with and without pre-fork model loading
+
+Each mode starts a fresh master process that forks WORKERS workers, the way
+gunicorn does. Every worker loads all benchmark models through the app's
+model registry, runs one forward pass per model and then reports its
+memory from /proc/self/smaps_rollup:
+    uss  pages only this worker maps (Private_Clean + Private_Dirty): what
+         one more worker costs
+    pss  its proportional share of every page, shared ones included
+    rss  every page it maps, shared ones counted in full
+Modes:
+    keras           workers import the app and load .h5 models themselves
+    tflite          the same with exported models, XNNPack repacking weights
+    tflite-shared   LITE_SHARED_WEIGHTS: weights read from the mmap'd files
+    tflite-prefork  the master imports the app and calls preload_models()
+                    before forking (gunicorn with SERVING_PRELOAD=true)
+The models are untrained copies of one export in a temporary models
+directory, so nothing touches the network or the real models. Linux only.
+Results are written to BENCHMARK_HISTORY_DIR/prefork_<time>.json. Usage:
+    python benchmark_prefork.py [--workers 4] [--models 20] [--units 256]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ('keras', 'tflite', 'tflite-shared', 'tflite-prefork')
+MEMORY_FIELDS = ('uss', 'pss', 'rss')
+
+
+def _python(code, env):
+    """Run code in a fresh interpreter; returns its last stdout line as JSON"""
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=HERE, env=env,
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _env(workdir, mode=None):
+    env = dict(
+        os.environ,
+        ML_MODELS_DIR=os.path.join(workdir, 'models'),
+        ML_DATA_DIR=os.path.join(workdir, 'data'),
+        TF_CPP_MIN_LOG_LEVEL='3',
+    )
+    if mode:
+        env['SERVING_BACKEND'] = 'keras' if mode == 'keras' else 'tflite'
+        env['LITE_SHARED_WEIGHTS'] = str(mode != 'tflite')
+    return env
+
+
+def seed(count, units):
+    """Export one model and copy it under `count` symbols (runs in a child)"""
+    from config import SEQUENCE_LENGTH, MODELS_DIR
+    from data_preprocessor import FEATURE_COLUMNS
+    from lite_runtime import LITE_MODEL_SUFFIX, LITE_MC_SUFFIX
+    from model_export import export_model
+    from model_trainer import LSTMModelTrainer
+
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    model = LSTMModelTrainer(verbose=0).build_model((SEQUENCE_LENGTH, len(FEATURE_COLUMNS)), units=units)
+    model.save(MODELS_DIR / 'SEED.NS_model.h5')
+    export_model('SEED.NS')
+
+    # Separate files, so each copy has its own page cache pages
+    symbols = [f"BENCH{index:02d}.NS" for index in range(count)]
+    for symbol in symbols:
+        for suffix in ('_model.h5', LITE_MODEL_SUFFIX, LITE_MC_SUFFIX):
+            shutil.copyfile(MODELS_DIR / f"SEED.NS{suffix}", MODELS_DIR / f"{symbol}{suffix}")
+    for suffix in ('_model.h5', LITE_MODEL_SUFFIX, LITE_MC_SUFFIX):
+        os.remove(MODELS_DIR / f"SEED.NS{suffix}")
+    return {'symbols': symbols, 'model_bytes': os.path.getsize(MODELS_DIR / f"{symbols[0]}{LITE_MODEL_SUFFIX}")}
+
+
+def memory():
+    """USS, PSS and RSS of this process in MiB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    uss = values['Private_Clean'] + values['Private_Dirty']
+    return {'uss': uss / 1024, 'pss': values['Pss'] / 1024, 'rss': values['Rss'] / 1024}
+
+
+def _serve(symbols):
+    """Worker body: load and run every model, then measure"""
+    import numpy as np
+    import app
+
+    registry = app.get_pipeline().model_registry
+    start = time.perf_counter()
+    for symbol in symbols:
+        _, bundle = registry.get(symbol)
+        shape = (1,) + tuple(int(d) for d in bundle.model.input_shape[1:])
+        np.asarray(bundle.model(np.zeros(shape, dtype=np.float32), training=False))
+    return {'load_seconds': time.perf_counter() - start, **memory()}
+
+
+def master(symbols, workers, preload):
+    """
+    Fork `workers` workers and collect their memory (runs in a child)
+
+    Workers stay alive until all of them have measured, so pages they
+    share are still shared when PSS is read.
+    """
+    import gc
+
+    start = time.perf_counter()
+    if preload:
+        import app
+        app.preload_models(symbols)
+    preload_seconds = time.perf_counter() - start
+    master_memory = memory()
+
+    release_read, release_write = os.pipe()
+    children = []
+    for _ in range(workers):
+        result_read, result_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(result_read)
+            os.close(release_write)
+            try:
+                report = _serve(symbols)
+            except Exception as e:
+                report = {'error': str(e)}
+            os.write(result_write, json.dumps(report).encode())
+            os.close(result_write)
+            os.read(release_read, 1)
+            os._exit(0)
+        os.close(result_write)
+        children.append((pid, result_read))
+
+    reports = []
+    for pid, result_read in children:
+        chunks = []
+        while True:
+            chunk = os.read(result_read, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        os.close(result_read)
+        reports.append(json.loads(b''.join(chunks)))
+    os.close(release_write)
+    for pid, _ in children:
+        os.waitpid(pid, 0)
+    gc.collect()
+
+    errors = [report['error'] for report in reports if 'error' in report]
+    if errors:
+        raise RuntimeError(errors[0])
+    return {'preload_seconds': preload_seconds, 'master': master_memory, 'workers': reports}
+
+
+def summarize(mode, result):
+    workers = result['workers']
+    entry = {'mode': mode, 'workers': len(workers), 'preload_seconds': round(result['preload_seconds'], 2)}
+    for field in MEMORY_FIELDS:
+        entry[f"worker_{field}_mib"] = round(statistics.mean(w[field] for w in workers), 1)
+    entry['worker_load_seconds'] = round(statistics.mean(w['load_seconds'] for w in workers), 2)
+    entry['master_pss_mib'] = round(result['master']['pss'], 1)
+    # Every page counted once: what the whole server costs
+    entry['total_pss_mib'] = round(result['master']['pss'] + sum(w['pss'] for w in workers), 1)
+    return entry
+
+
+def run(modes, workers, models, units):
+    with tempfile.TemporaryDirectory(prefix='ml_prefork_') as workdir:
+        seeded = _python(f"import benchmark_prefork as b, json; print(json.dumps(b.seed({models}, {units})))",
+                         _env(workdir))
+        print(f"{models} models of {seeded['model_bytes'] / 1024:.0f} KiB, {workers} workers\n")
+        _print_header()
+        results = []
+        for mode in modes:
+            code = (
+                "import benchmark_prefork as b, json; "
+                f"print(json.dumps(b.master({seeded['symbols']!r}, {workers}, {mode == 'tflite-prefork'})))"
+            )
+            entry = summarize(mode, _python(code, _env(workdir, mode)))
+            results.append(entry)
+            _print_row(entry)
+    return seeded, results
+
+
+def _print_header():
+    print(f"{'mode':<16s} {'worker USS':>11s} {'worker PSS':>11s} {'worker RSS':>11s} "
+          f"{'total PSS':>10s} {'load s':>7s}")
+
+
+def _print_row(entry):
+    print(f"{entry['mode']:<16s} {entry['worker_uss_mib']:>11.1f} {entry['worker_pss_mib']:>11.1f} "
+          f"{entry['worker_rss_mib']:>11.1f} {entry['total_pss_mib']:>10.1f} {entry['worker_load_seconds']:>7.2f}")
+
+
+if __name__ == '__main__':
+    from config import BENCHMARK_HISTORY_DIR, LSTM_UNITS
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--models', type=int, default=20, help="Models every worker loads")
+    parser.add_argument('--units', type=int, default=LSTM_UNITS, help="LSTM units of the benchmark model")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--output', help="Results file (default: data/benchmarks/prefork_<time>.json)")
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("benchmark_prefork.py needs /proc/self/smaps_rollup (Linux 4.14+)")
+
+    seeded, results = run(args.modes, args.workers, args.models, args.units)
+    print("\nUSS is memory one more worker adds; total PSS is the master plus every worker, shared pages once")
+
+    output = args.output or os.path.join(BENCHMARK_HISTORY_DIR, f"prefork_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'options': {'workers': args.workers, 'models': args.models, 'units': args.units,
+                        'model_bytes': seeded['model_bytes']},
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
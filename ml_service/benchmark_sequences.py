@@ -0,0 +1,94 @@
+"""
+Benchmark sequence building: legacy Python loop vs zero-copy window dataset
+
+Each measurement runs in a fresh process so peak RSS is not polluted by
+earlier runs. Usage: python benchmark_sequences.py [rows ...]
+"""
+import json
+import multiprocessing as mp
+import resource
+import sys
+import time
+
+import numpy as np
+
+from data_preprocessor import FEATURE_COLUMNS, StockDataPreprocessor
+from synthetic_data import generate_ohlcv
+
+DEFAULT_ROWS = [500, 2500, 10000, 50000]
+SEQUENCE_LENGTH = 60
+BATCH = 32
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _legacy_sequences(scaled_data, sequence_length, prediction_days=1):
+    X, y = [], []
+    for i in range(sequence_length, len(scaled_data) - prediction_days + 1):
+        X.append(scaled_data[i-sequence_length:i])
+        y.append(scaled_data[i+prediction_days-1, 3])
+    return np.array(X), np.array(y)
+
+
+def _measure(mode, rows, queue):
+    preprocessor = StockDataPreprocessor(use_cache=False)
+    df = preprocessor.calculate_technical_indicators(generate_ohlcv(rows))
+    baseline = _peak_rss_mb()
+
+    # Build only: scaling plus the sample arrays (legacy) or views (windows)
+    start = time.perf_counter()
+    if mode == 'legacy':
+        data = df[FEATURE_COLUMNS].values
+        X, _ = _legacy_sequences(
+            preprocessor.feature_scaler.fit_transform(data), SEQUENCE_LENGTH
+        )
+        batches = (X[i:i + BATCH] for i in range(0, len(X), BATCH))
+    else:
+        dataset = preprocessor.prepare_window_dataset(df, SEQUENCE_LENGTH)
+        X = dataset.X
+        batches = (X_batch for X_batch, _ in dataset.iter_batches(BATCH))
+    build_seconds = time.perf_counter() - start
+
+    # Touch every window the way a training epoch would
+    start = time.perf_counter()
+    largest_batch = max(X_batch.nbytes for X_batch in batches)
+    epoch_seconds = time.perf_counter() - start
+
+    queue.put({
+        'mode': mode,
+        'rows': rows,
+        'samples': int(len(X)),
+        'dtype': str(X.dtype),
+        'build_seconds': round(build_seconds, 4),
+        'epoch_seconds': round(epoch_seconds, 4),
+        'largest_array_mb': round((X.nbytes if mode == 'legacy' else largest_batch) / 1e6, 2),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+    })
+
+
+def run(rows_list):
+    results = []
+    ctx = mp.get_context('spawn')
+    for rows in rows_list:
+        for mode in ('legacy', 'windows'):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(mode, rows, queue))
+            proc.start()
+            result = queue.get()
+            proc.join()
+            results.append(result)
+            print(
+                f"{mode:8s} rows={rows:6d} samples={result['samples']:6d} "
+                f"build={result['build_seconds']:.3f}s epoch={result['epoch_seconds']:.3f}s "
+                f"largest_array={result['largest_array_mb']:.1f}MB "
+                f"peak_rss_delta={result['peak_rss_delta_mb']:.1f}MB"
+            )
+    return results
+
+
+if __name__ == '__main__':
+    rows_list = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+    print(json.dumps(run(rows_list), indent=2))
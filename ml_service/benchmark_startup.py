@@ -0,0 +1,216 @@
+"""
+Benchmark API cold start: import time, first /health, first prediction
+
+Every run starts a fresh interpreter against a temporary models/data
+directory holding an untrained model and synthetic cached bars, so nothing
+touches the network or the real models. Results are appended to
+BENCHMARK_HISTORY_DIR/startup_history.jsonl with the git commit, so cold
+start can be compared across changes. Exits non-zero when a median is over
+STARTUP_IMPORT_BUDGET_MS or STARTUP_FIRST_PREDICTION_BUDGET_MS. Usage:
+    python benchmark_startup.py [--backends keras tflite] [--runs 3] [--no-record]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SYMBOL = 'BENCH.NS'
+BACKENDS = ('keras', 'tflite')
+WARM_PREDICTIONS = 5
+METRICS = ('import_ms', 'first_health_ms', 'first_indicators_ms', 'first_prediction_ms', 'warm_prediction_ms')
+
+
+def _python(code, env):
+    """Run code in a fresh interpreter; returns its last stdout line as JSON"""
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=HERE, env=env,
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _env(workdir, backend=None):
+    env = dict(
+        os.environ,
+        ML_MODELS_DIR=os.path.join(workdir, 'models'),
+        ML_DATA_DIR=os.path.join(workdir, 'data'),
+        # The seeded bars must never be refreshed from Yahoo Finance
+        OHLCV_CACHE_MAX_AGE=str(10 ** 9),
+        # Every run should compute, not hit a persisted result
+        PREDICTION_CACHE_ENABLED='False',
+        TF_CPP_MIN_LOG_LEVEL='3',
+    )
+    if backend:
+        env['SERVING_BACKEND'] = backend
+    return env
+
+
+def seed(backends):
+    """Write the model, its TFLite export and cached bars (runs in a child)"""
+    import pandas as pd
+
+    from config import SEQUENCE_LENGTH, MODELS_DIR
+    from data_cache import get_ohlcv_cache
+    from data_preprocessor import FEATURE_COLUMNS
+    from model_trainer import LSTMModelTrainer
+    from synthetic_data import generate_ohlcv
+
+    bars = generate_ohlcv(750, seed=0, end_date=pd.Timestamp.now().normalize())
+    get_ohlcv_cache().get(SYMBOL, '2y', lambda symbol, period=None, start=None: bars)
+
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    model = LSTMModelTrainer(verbose=0).build_model((SEQUENCE_LENGTH, len(FEATURE_COLUMNS)))
+    model.save(MODELS_DIR / f"{SYMBOL}_model.h5")
+
+    if 'tflite' in backends:
+        from model_export import export_model
+        export_model(SYMBOL)
+    return {'seeded': True}
+
+
+def measure():
+    """Time a cold start of the API in this (fresh) process"""
+    start = time.perf_counter()
+    import app
+    timings = {'import_ms': (time.perf_counter() - start) * 1000}
+
+    client = app.app.test_client()
+    start = time.perf_counter()
+    health = client.get('/health').get_json()
+    timings['first_health_ms'] = (time.perf_counter() - start) * 1000
+    timings['tensorflow_loaded_at_health'] = health['tensorflow_loaded']
+
+    start = time.perf_counter()
+    response = client.post('/api/v1/technical-indicators', json={'symbol': SYMBOL})
+    timings['first_indicators_ms'] = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(response.get_json()['error'])
+    timings['tensorflow_loaded_at_indicators'] = 'tensorflow' in sys.modules
+
+    # The first few predictions also settle traces and the adaptive
+    # dropout sample count, so "warm" is the median of the later ones
+    latencies = []
+    for _ in range(1 + WARM_PREDICTIONS):
+        start = time.perf_counter()
+        response = client.post('/api/v1/predict', json={'symbol': SYMBOL})
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(response.get_json()['error'])
+    timings['first_prediction_ms'] = latencies[0]
+    timings['warm_prediction_ms'] = statistics.median(latencies[1:])
+    return timings
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous(history_path, backend):
+    """Most recent recorded result for a backend, or None"""
+    if not os.path.exists(history_path):
+        return None
+    previous = None
+    with open(history_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['backend'] == backend:
+                previous = entry
+    return previous
+
+
+def run(backends=BACKENDS, runs=3):
+    with tempfile.TemporaryDirectory() as workdir:
+        _python(f"import benchmark_startup; import json; "
+                f"print(json.dumps(benchmark_startup.seed({list(backends)!r})))", _env(workdir))
+
+        results = []
+        for backend in backends:
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                timings = _python(
+                    "import benchmark_startup; import json; print(json.dumps(benchmark_startup.measure()))",
+                    _env(workdir, backend)
+                )
+                timings['process_ms'] = (time.perf_counter() - start) * 1000
+                samples.append(timings)
+
+            result = {'backend': backend, 'runs': runs}
+            for metric in METRICS + ('process_ms',):
+                result[metric] = round(statistics.median(sample[metric] for sample in samples), 1)
+            for flag in ('tensorflow_loaded_at_health', 'tensorflow_loaded_at_indicators'):
+                result[flag] = any(sample[flag] for sample in samples)
+            results.append(result)
+    return results
+
+
+def _report(result, previous):
+    from config import STARTUP_IMPORT_BUDGET_MS, STARTUP_FIRST_PREDICTION_BUDGET_MS
+
+    print(f"\n{result['backend']} (median of {result['runs']} runs)")
+    for metric in METRICS + ('process_ms',):
+        line = f"  {metric:22s} {result[metric]:10.1f}"
+        if previous and metric in previous:
+            line += f"   (last {previous[metric]:.1f} @ {previous.get('git_commit') or '?'})"
+        print(line)
+    print(f"  TensorFlow loaded by /health: {result['tensorflow_loaded_at_health']}, "
+          f"by technical-indicators: {result['tensorflow_loaded_at_indicators']}")
+
+    over = []
+    if result['import_ms'] > STARTUP_IMPORT_BUDGET_MS:
+        over.append(f"import {result['import_ms']:.0f}ms > {STARTUP_IMPORT_BUDGET_MS}ms")
+    if result['first_prediction_ms'] > STARTUP_FIRST_PREDICTION_BUDGET_MS:
+        over.append(f"first prediction {result['first_prediction_ms']:.0f}ms > {STARTUP_FIRST_PREDICTION_BUDGET_MS}ms")
+    if result['tensorflow_loaded_at_health'] or result['tensorflow_loaded_at_indicators']:
+        over.append("TensorFlow imported before the first prediction")
+    for message in over:
+        print(f"  ❌ over budget: {message}")
+    return not over
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts per backend (median is reported)")
+    parser.add_argument('--no-record', action='store_true', help="Do not append to the history file")
+    args = parser.parse_args()
+
+    from config import BENCHMARK_HISTORY_DIR
+    history_path = os.path.join(BENCHMARK_HISTORY_DIR, 'startup_history.jsonl')
+
+    context = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+    within_budget = True
+    entries = []
+    for result in run(args.backends, args.runs):
+        entry = {**context, **result}
+        within_budget &= _report(entry, _previous(history_path, result['backend']))
+        entries.append(entry)
+
+    if not args.no_record:
+        os.makedirs(BENCHMARK_HISTORY_DIR, exist_ok=True)
+        with open(history_path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        print(f"\nAppended to {history_path}")
+
+    if not within_budget:
+        raise SystemExit(1)
@@ -0,0 +1,432 @@
+"""
+Offline benchmark suite for the preprocessing, training and serving hot paths
+
+Stages run on SyntheticDownloader bars (no network, Yahoo Finance or
+MongoDB) against temporary models/data directories:
+
+    fetch        fetch_stock_data for a universe of symbols, cold (download
+                 into the OHLCV cache) and warm (cache hits)
+    indicators   calculate_technical_indicators
+    sequences    prepare_sequences, touching every training batch
+    train        LSTMModelTrainer.train with --epochs epochs
+    predict      Predictor.predict with a registry bundle, no HTTP
+    endpoints    /health, technical-indicators, predict (computed and
+                 cached) and batch-predict through the Flask test client
+
+Every measurement runs in a fresh process, so peak RSS is per stage. The
+results are written as JSON with the git commit; --compare reports stages
+that got slower than a previous results file. Usage:
+    python benchmark_suite.py [--rows 500 2000 5000] [--universe 1 10 25]
+                              [--stages fetch train ...] [--compare old.json]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAGES = ('fetch', 'indicators', 'sequences', 'train', 'predict', 'endpoints')
+DEFAULT_ROWS = [500, 2000, 5000]
+DEFAULT_UNIVERSE = [1, 10, 25]
+# Bars behind served symbols: enough for the 3mo prediction window
+SERVING_ROWS = 750
+# Untimed requests before each latency measurement (traces, adaptive
+# dropout sample count)
+WARMUP_REQUESTS = 3
+# A stage is reported as a regression when it is this much slower
+REGRESSION_THRESHOLD = 1.2
+
+
+def _symbols(count):
+    return [f"SYN{i:03d}.NS" for i in range(count)]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(latencies_ms):
+    latencies = np.asarray(latencies_ms)
+    return {
+        'requests': int(len(latencies)),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def _preprocessor(rows):
+    from data_preprocessor import StockDataPreprocessor
+    from synthetic_data import SyntheticDownloader
+
+    preprocessor = StockDataPreprocessor()
+    preprocessor._download = SyntheticDownloader(rows)
+    return preprocessor
+
+
+def _stage_fetch(rows, universe, options):
+    from data_cache import OHLCVCache
+
+    preprocessor = _preprocessor(rows)
+    # A private cache directory per measurement, so "cold" really is cold
+    preprocessor.cache = OHLCVCache(cache_dir=Path(tempfile.mkdtemp(dir=os.environ['ML_DATA_DIR'])))
+    symbols = _symbols(universe)
+
+    results = []
+    for phase in ('cold', 'warm'):
+        baseline = _peak_rss_mb()
+        start = time.perf_counter()
+        for symbol in symbols:
+            preprocessor.fetch_stock_data(symbol, period='max')
+        seconds = time.perf_counter() - start
+        results.append({
+            'phase': phase,
+            'seconds': round(seconds, 4),
+            'per_symbol_ms': round(seconds / universe * 1000, 3),
+            'downloads': preprocessor._download.calls,
+            'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+        })
+    return results
+
+
+def _stage_indicators(rows, universe, options):
+    from synthetic_data import generate_ohlcv
+
+    preprocessor = _preprocessor(rows)
+    df = generate_ohlcv(rows)
+    # First call pays one-off pandas setup
+    preprocessor.calculate_technical_indicators(generate_ohlcv(100))
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    preprocessor.calculate_technical_indicators(df)
+    return [{
+        'seconds': round(time.perf_counter() - start, 4),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+    }]
+
+
+def _stage_sequences(rows, universe, options):
+    from config import SEQUENCE_LENGTH, BATCH_SIZE
+    from synthetic_data import generate_ohlcv
+
+    preprocessor = _preprocessor(rows)
+    df = preprocessor.calculate_technical_indicators(generate_ohlcv(rows))
+    # Scalers (and scikit-learn) are created lazily; keep that out of the timing
+    preprocessor.scaler, preprocessor.feature_scaler
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    dataset = preprocessor.prepare_window_dataset(df, SEQUENCE_LENGTH)
+    # Touch every window the way a training epoch would
+    for _ in dataset.iter_batches(BATCH_SIZE):
+        pass
+    return [{
+        'samples': len(dataset),
+        'seconds': round(time.perf_counter() - start, 4),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+    }]
+
+
+def _stage_train(rows, universe, options):
+    import model_trainer
+
+    model_trainer.EPOCHS = options['epochs']
+    trainer = model_trainer.LSTMModelTrainer(verbose=0)
+    trainer.preprocessor = _preprocessor(rows)
+    symbol = f"TRAIN{rows}.NS"
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    result = trainer.train(symbol, period='max')
+    return [{
+        'epochs': len(result['history']['loss']),
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+    }]
+
+
+def _stage_predict(rows, universe, options):
+    from batch_inference import FusedInference
+    from model_registry import ModelRegistry
+    from predictor import Predictor
+
+    predictor = Predictor(_preprocessor(SERVING_ROWS))
+    registry = ModelRegistry()
+    infer = FusedInference(fuse_models=False).run
+    symbol = _symbols(1)[0]
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    _, bundle = registry.get(symbol)
+    predictor.predict(symbol, bundle=bundle, infer=infer)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    results = [{
+        'phase': 'first',
+        'seconds': round(first_ms / 1000, 4),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+    }]
+    for days_ahead in (1, 5):
+        # Let traces and the adaptive dropout sample count settle
+        for _ in range(WARMUP_REQUESTS):
+            predictor.predict(symbol, days_ahead, bundle=bundle, infer=infer)
+        latencies = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            predictor.predict(symbol, days_ahead, bundle=bundle, infer=infer)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append({
+            'phase': 'warm',
+            'days_ahead': days_ahead,
+            **_percentiles(latencies),
+            'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1),
+        })
+    return results
+
+
+def _stage_endpoints(rows, universe, options):
+    import app
+    from prediction_cache import PredictionCache
+    from synthetic_data import SyntheticDownloader
+
+    client = app.app.test_client()
+    app.get_preprocessor()._download = SyntheticDownloader(SERVING_ROWS)
+    symbols = [symbol[:-len('.NS')] for symbol in _symbols(universe)]
+
+    def measure(name, method, url, payload=None, warmup=WARMUP_REQUESTS):
+        for _ in range(warmup):
+            response = getattr(client, method)(url, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: {response.get_json()}")
+        latencies = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            getattr(client, method)(url, json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+        # Peak memory of the process so far, relative to the stage start
+        return {'endpoint': name, **_percentiles(latencies),
+                'peak_rss_delta_mb': round(_peak_rss_mb() - baseline, 1)}
+
+    baseline = _peak_rss_mb()
+    results = [measure('health', 'get', '/health', warmup=0)]
+    results.append(measure('technical-indicators', 'post', '/api/v1/technical-indicators',
+                           {'symbol': symbols[0]}))
+
+    # Computed results first, then the same requests served from the cache
+    app.prediction_cache = None
+    results.append(measure('predict', 'post', '/api/v1/predict', {'symbol': symbols[0]}))
+    results.append(measure('batch-predict', 'post', '/api/v1/batch-predict', {'symbols': symbols}))
+    app.prediction_cache = PredictionCache(path=None)
+    results.append(measure('predict (cached)', 'post', '/api/v1/predict', {'symbol': symbols[0]}))
+    results.append(measure('batch-predict (cached)', 'post', '/api/v1/batch-predict', {'symbols': symbols}))
+    return results
+
+
+def _seed_models(universe):
+    """Train one small model and share its bundle across the served universe"""
+    import model_trainer
+    from config import MODELS_DIR
+    from model_bundle import BUNDLE_SUFFIXES
+
+    model_trainer.EPOCHS = 1
+    trainer = model_trainer.LSTMModelTrainer(verbose=0)
+    trainer.preprocessor = _preprocessor(SERVING_ROWS)
+    source, *others = _symbols(universe)
+    trainer.train(source, period='max')
+
+    # Indicator state belongs to the source series, so it is not copied
+    suffixes = ['_model.h5', BUNDLE_SUFFIXES['scaler'], BUNDLE_SUFFIXES['feature_scaler'],
+                BUNDLE_SUFFIXES['metadata']]
+    for symbol in others:
+        for suffix in suffixes:
+            shutil.copy(MODELS_DIR / f"{source}{suffix}", MODELS_DIR / f"{symbol}{suffix}")
+    return []
+
+
+_STAGE_FUNCTIONS = {
+    'fetch': _stage_fetch,
+    'indicators': _stage_indicators,
+    'sequences': _stage_sequences,
+    'train': _stage_train,
+    'predict': _stage_predict,
+    'endpoints': _stage_endpoints,
+}
+
+
+def _child(target, args, queue):
+    try:
+        queue.put(('ok', target(*args)))
+    except Exception as e:
+        queue.put(('error', f"{type(e).__name__}: {e}"))
+
+
+def _isolated(target, *args):
+    """Run target(*args) in a fresh process; returns its result"""
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(target, args, queue))
+    proc.start()
+    status, result = queue.get()
+    proc.join()
+    if status != 'ok':
+        raise RuntimeError(result)
+    return result
+
+
+def _cases(stages, rows_list, universe_list):
+    """(stage, rows, universe) combinations in run order"""
+    for stage in stages:
+        if stage == 'fetch':
+            for rows in rows_list:
+                for universe in universe_list:
+                    yield stage, rows, universe
+        elif stage in ('indicators', 'sequences', 'train'):
+            for rows in rows_list:
+                yield stage, rows, 1
+        elif stage == 'predict':
+            yield stage, SERVING_ROWS, 1
+        else:
+            for universe in universe_list:
+                yield stage, SERVING_ROWS, universe
+
+
+def run(stages=STAGES, rows_list=DEFAULT_ROWS, universe_list=DEFAULT_UNIVERSE, epochs=2, requests=30):
+    """
+    Run the selected stages
+
+    Returns:
+        List of result dicts, one per measurement
+    """
+    options = {'epochs': epochs, 'requests': requests}
+    workdir = tempfile.mkdtemp(prefix='ml_benchmark_')
+    # Child processes read these when they import config
+    os.environ.update({
+        'ML_MODELS_DIR': os.path.join(workdir, 'models'),
+        'ML_DATA_DIR': os.path.join(workdir, 'data'),
+        'TF_CPP_MIN_LOG_LEVEL': '3',
+    })
+    os.makedirs(os.environ['ML_DATA_DIR'])
+
+    results = []
+    try:
+        if 'predict' in stages or 'endpoints' in stages:
+            _isolated(_seed_models, max(universe_list))
+
+        for stage, rows, universe in _cases(stages, rows_list, universe_list):
+            for measurement in _isolated(_STAGE_FUNCTIONS[stage], rows, universe, options):
+                result = {'stage': stage, 'rows': rows, 'universe': universe, **measurement}
+                results.append(result)
+                print(_format(result))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _key(result):
+    """Identity of a measurement across runs"""
+    return (result['stage'], result['rows'], result['universe'], result.get('phase'),
+            result.get('endpoint'), result.get('days_ahead'))
+
+
+def _metric(result):
+    """The number compared between runs: median latency or stage time"""
+    if 'p50_ms' in result:
+        return 'p50_ms', result['p50_ms']
+    return 'seconds', result['seconds']
+
+
+def _format(result):
+    label = ' '.join(
+        str(part) for part in (result.get('phase'), result.get('endpoint'),
+                               f"days={result['days_ahead']}" if 'days_ahead' in result else None)
+        if part
+    )
+    name, value = _metric(result)
+    text = f"{result['stage']:10s} rows={result['rows']:6d} universe={result['universe']:3d} {label:28s} {name}={value}"
+    if 'p99_ms' in result:
+        text += f" p99_ms={result['p99_ms']}"
+    if 'peak_rss_delta_mb' in result:
+        text += f" peak_rss_delta={result['peak_rss_delta_mb']}MB"
+    return text
+
+
+def compare(results, previous_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Print measurements that are slower than in a previous results file
+
+    Returns:
+        Number of regressions
+    """
+    with open(previous_path) as f:
+        previous = json.load(f)
+    before = {_key(result): result for result in previous['results']}
+
+    regressions = 0
+    print(f"\nCompared with {previous_path} ({previous['meta'].get('git_commit')}):")
+    for result in results:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        name, value = _metric(result)
+        old_value = _metric(old)[1]
+        if old_value and value / old_value > threshold:
+            regressions += 1
+            print(f"  ❌ {_format(result)} (was {old_value}, {value / old_value:.2f}x)")
+    if not regressions:
+        print(f"  ✅ no stage more than {threshold:.1f}x slower")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--rows', nargs='+', type=int, default=DEFAULT_ROWS, help="History lengths in bars")
+    parser.add_argument('--universe', nargs='+', type=int, default=DEFAULT_UNIVERSE, help="Symbols per run")
+    parser.add_argument('--epochs', type=int, default=2, help="Epochs for the train stage")
+    parser.add_argument('--requests', type=int, default=30, help="Requests per latency measurement")
+    parser.add_argument('--output', help="Results file (default: data/benchmarks/suite_<commit>_<time>.json)")
+    parser.add_argument('--compare', help="Previous results file to check for regressions")
+    args = parser.parse_args()
+
+    from config import BENCHMARK_HISTORY_DIR
+
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+    }
+    results = run(args.stages, args.rows, args.universe, args.epochs, args.requests)
+
+    output = args.output or os.path.join(
+        BENCHMARK_HISTORY_DIR, f"suite_{meta['git_commit'] or 'unknown'}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(results, args.compare):
+        raise SystemExit(1)
@@ -0,0 +1,169 @@
+"""
+Benchmark worker/thread splits: training samples/sec and inference QPS
+
+For each split (workers x threads per worker) the benchmark starts that many
+fresh worker processes, limits their thread pools with
+cpu_topology.configure_threads and runs them concurrently:
+    train  every worker fits the production LSTM on synthetic windows;
+           reported as total samples/sec across workers
+    infer  every worker runs traced single-window forward passes in a loop;
+           reported as total QPS and per-call p50/p99 latency
+Splits written as `4x0` leave thread pools at library defaults (every
+worker sees every core), which shows what oversubscription costs. No
+network or saved models are needed. Results are written to
+BENCHMARK_HISTORY_DIR/topology_<time>.json. Usage:
+    python benchmark_topology.py                         # splits derived from the available cores
+    python benchmark_topology.py --splits 1x8 2x4 8x1 8x0 --duration 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import SEQUENCE_LENGTH, BATCH_SIZE, BENCHMARK_HISTORY_DIR
+from cpu_topology import available_cores, configure_threads
+
+ROLES = ('train', 'infer')
+FEATURES = 20
+TRAIN_SAMPLES = 2048
+
+
+def default_splits(cores):
+    """Every power-of-two worker count, cores split evenly, plus one oversubscribed run"""
+    splits = []
+    workers = 1
+    while workers <= cores:
+        splits.append((workers, cores // workers))
+        workers *= 2
+    if splits[-1][0] != cores:
+        splits.append((cores, 1))
+    splits.append((max(2, cores), 0))
+    return splits
+
+
+def _parse_split(text):
+    workers, threads = text.lower().split('x')
+    return int(workers), int(threads)
+
+
+def _worker(role, threads, barrier, options):
+    """Run one role in a fresh process once every worker is ready"""
+    configure_threads(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    import tensorflow as tf
+    from model_trainer import LSTMModelTrainer, WindowBatchSequence
+    from sequence_windows import SlidingWindowDataset
+
+    rng = np.random.default_rng(os.getpid())
+    features = rng.random((TRAIN_SAMPLES + SEQUENCE_LENGTH, FEATURES), dtype=np.float32)
+    dataset = SlidingWindowDataset(features, SEQUENCE_LENGTH, 1, target_column=3)
+    model = LSTMModelTrainer(verbose=0).build_model((SEQUENCE_LENGTH, FEATURES))
+
+    if role == 'train':
+        batches = WindowBatchSequence(dataset, BATCH_SIZE, shuffle=True)
+        # The first epoch traces the training step
+        model.fit(batches, epochs=1, verbose=0)
+        barrier.wait()
+        start = time.perf_counter()
+        model.fit(batches, epochs=options['epochs'], verbose=0)
+        seconds = time.perf_counter() - start
+        return {'samples_per_second': len(dataset) * options['epochs'] / seconds}
+
+    infer = tf.function(lambda x: model(x, training=False))
+    window = tf.constant(np.ascontiguousarray(dataset.X[-1:]))
+    for _ in range(5):
+        infer(window).numpy()
+    barrier.wait()
+    latencies = []
+    deadline = time.perf_counter() + options['duration']
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        infer(window).numpy()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'calls': len(latencies), 'latencies': latencies}
+
+
+def measure(role, workers, threads, options):
+    """Run `workers` concurrent processes of one role"""
+    ctx = mp.get_context('spawn')
+    with ctx.Manager() as manager:
+        barrier = manager.Barrier(workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = [pool.submit(_worker, role, threads, barrier, options) for _ in range(workers)]
+            results = [future.result() for future in futures]
+
+    if role == 'train':
+        return {'samples_per_second': round(sum(r['samples_per_second'] for r in results), 1)}
+    latencies = np.concatenate([r['latencies'] for r in results])
+    return {
+        'qps': round(sum(r['calls'] for r in results) / options['duration'], 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def run(splits, roles=ROLES, epochs=2, duration=3.0):
+    options = {'epochs': epochs, 'duration': duration}
+    results = []
+    for workers, threads in splits:
+        entry = {'workers': workers, 'threads_per_worker': threads or None}
+        for role in roles:
+            entry[role] = measure(role, workers, threads, options)
+        results.append(entry)
+        _print_row(entry)
+    return results
+
+
+def _print_header():
+    print(f"{'split':>8s} {'train samples/s':>16s} {'infer QPS':>10s} {'p50 ms':>8s} {'p99 ms':>8s}")
+
+
+def _print_row(entry):
+    threads = entry['threads_per_worker'] or 'all'
+    train = entry.get('train', {}).get('samples_per_second')
+    infer = entry.get('infer', {})
+    cell = lambda value, width, digits: f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+    print(f"{str(entry['workers']) + 'x' + str(threads):>8s} {cell(train, 16, 0)} "
+          f"{cell(infer.get('qps'), 10, 0)} {cell(infer.get('p50_ms'), 8, 2)} {cell(infer.get('p99_ms'), 8, 2)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--splits', nargs='+', type=_parse_split,
+                        help="WORKERSxTHREADS pairs; 0 threads = library defaults")
+    parser.add_argument('--roles', nargs='+', choices=ROLES, default=list(ROLES))
+    parser.add_argument('--epochs', type=int, default=2, help="Timed training epochs per worker")
+    parser.add_argument('--duration', type=float, default=3.0, help="Seconds of inference per split")
+    parser.add_argument('--output', help="Results file (default: data/benchmarks/topology_<time>.json)")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    splits = args.splits or default_splits(cores)
+    print(f"{cores} available cores, {len(splits)} splits, roles: {', '.join(args.roles)}\n")
+    _print_header()
+    results = run(splits, args.roles, args.epochs, args.duration)
+
+    best = {}
+    if 'train' in args.roles:
+        best['train'] = max(results, key=lambda r: r['train']['samples_per_second'])
+    if 'infer' in args.roles:
+        best['infer'] = max(results, key=lambda r: r['infer']['qps'])
+    for role, entry in best.items():
+        print(f"\nBest {role}: {entry['workers']} workers × {entry['threads_per_worker'] or 'all'} threads")
+
+    output = args.output or os.path.join(BENCHMARK_HISTORY_DIR, f"topology_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cores': cores,
+            'platform': platform.platform(),
+            'options': {'epochs': args.epochs, 'duration': args.duration, 'samples': TRAIN_SAMPLES},
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
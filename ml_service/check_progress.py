@@ -1,8 +1,7 @@
 """
 Check which stocks have completed training
 """
-import os
-from pathlib import Path
+from training_manifest import TrainingManifest
 
 # All stocks to train
 ALL_STOCKS = [
@@ -29,26 +28,11 @@ ALL_STOCKS = [
 ]
 
 def check_training_progress():
-    """Check which models are completed"""
-    models_dir = Path(__file__).parent / "models"
-    models_dir.mkdir(exist_ok=True)
-    
-    completed = []
-    remaining = []
-    
-    for stock in ALL_STOCKS:
-        # Check for final model or best checkpoint model
-        model_file = models_dir / f"{stock}_model.h5"
-        best_model_file = models_dir / f"{stock}_best.h5"
-        scaler_file = models_dir / f"{stock}_scaler.pkl"
-        feature_scaler_file = models_dir / f"{stock}_feature_scaler.pkl"
-        
-        # Check if model exists (either final or best checkpoint)
-        # Scalers are optional for checking (they're created during training)
-        if (model_file.exists() or best_model_file.exists()):
-            completed.append(stock)
-        else:
-            remaining.append(stock)
+    """Check which models are completed, using the training manifest"""
+    manifest = TrainingManifest()
+    status = manifest.status(ALL_STOCKS)
+    completed = status['done']
+    remaining = status['queued'] + status['running'] + status['failed']
     
     print("=" * 60)
     print("TRAINING PROGRESS REPORT")
@@ -65,7 +49,11 @@ def check_training_progress():
     if remaining:
         print(f"\n⏳ Remaining Stocks ({len(remaining)}):")
         for i, stock in enumerate(remaining, 1):
-            print(f"   {i:2d}. {stock}")
+            job = manifest.jobs.get(stock)
+            detail = f" [{job['status']}, {job['attempts']} attempts]" if job else ""
+            print(f"   {i:2d}. {stock}{detail}")
+            if job and job.get('error'):
+                print(f"       ❗ {job['error']}")
     
     print("\n" + "=" * 60)
     
@@ -76,7 +64,7 @@ if __name__ == '__main__':
     
     if remaining:
         print("\n💡 To continue training remaining stocks tomorrow:")
-        print("   python train_remaining.py")
+        print("   python train_universe.py")
         print("\n   Or train individually:")
         for stock in remaining[:5]:  # Show first 5
             print(f"   python train_single.py {stock}")
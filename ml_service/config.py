@@ -7,16 +7,21 @@ from pathlib import Path
 # Base directory
 BASE_DIR = Path(__file__).parent
 
-# Model paths
-MODELS_DIR = BASE_DIR / "models"
-MODELS_DIR.mkdir(exist_ok=True)
+# Model paths (created by whatever writes to them first, not at import)
+MODELS_DIR = Path(os.getenv("ML_MODELS_DIR", BASE_DIR / "models"))
 
-DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR = Path(os.getenv("ML_DATA_DIR", BASE_DIR / "data"))
+
+# Local OHLCV cache (per-symbol Parquet files under DATA_DIR)
+OHLCV_CACHE_DIR = DATA_DIR / "ohlcv"
+OHLCV_CACHE_ENABLED = os.getenv("OHLCV_CACHE_ENABLED", "True").lower() == "true"
+OHLCV_CACHE_MAX_AGE = int(os.getenv("OHLCV_CACHE_MAX_AGE", "900"))  # Seconds before asking Yahoo for new bars
+OHLCV_CACHE_OVERLAP_DAYS = 5  # Re-download a few cached days to detect split/dividend re-adjustments
 
 # Model parameters
 SEQUENCE_LENGTH = 60  # Number of days to look back
 PREDICTION_DAYS = 1  # Predict next day
+MAX_DAYS_AHEAD = 30  # Longest multi-step forecast served by the API
 TRAIN_TEST_SPLIT = 0.8
 
 # Technical indicator parameters
@@ -27,6 +32,8 @@ MACD_SIGNAL = 9
 SMA_SHORT = 20
 SMA_LONG = 50
 EMA_PERIOD = 12
+INDICATOR_HISTORY_SIZE = 128  # Indicator rows kept per symbol by the incremental engine
+INDICATOR_WARMUP_BARS = 50  # Leading bars whose indicators are back-filled (longest window: sma_50)
 
 # LSTM model parameters
 LSTM_UNITS = 50
@@ -35,11 +42,135 @@ EPOCHS = 50
 BATCH_SIZE = 32
 LEARNING_RATE = 0.001
 
+# Warm-start retraining (fine-tune the saved model on bars added since the last run)
+WARM_START_EPOCHS = 5
+WARM_START_LEARNING_RATE = 0.0001
+WARM_START_TOLERANCE = 1.0  # Fine-tuned validation loss may be at most this multiple of the previous one
+
+# CPU topology: per-process TensorFlow/BLAS thread budgets (see cpu_topology.py)
+CPU_CORES = int(os.getenv("CPU_CORES", "0"))  # Cores to split across workers; 0 = affinity mask / cgroup quota
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "1"))
+CPU_PIN_WORKERS = os.getenv("CPU_PIN_WORKERS", "False").lower() == "true"  # Give each worker its own cores
+
+# Universe training orchestrator (0 = derive from the other setting and the available cores)
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "0"))
+TRAINING_THREADS_PER_WORKER = int(os.getenv("TRAINING_THREADS_PER_WORKER", "0"))  # 0 with 0 workers = 1 thread each
+TRAINING_MAX_ATTEMPTS = 3  # Failed symbols are retried on resume until this many attempts
+TRAINING_MANIFEST_PATH = MODELS_DIR / "training_manifest.json"
+
+# Training run telemetry (per-epoch timing, throughput and memory; see training_telemetry.py)
+TRAINING_TELEMETRY_ENABLED = os.getenv("TRAINING_TELEMETRY_ENABLED", "True").lower() == "true"
+TRAINING_TELEMETRY_PATH = MODELS_DIR / "training_telemetry.jsonl"
+
+# Drift-triggered retraining (drift_monitor.py, retrain_scheduler.py)
+DRIFT_ERROR_RATIO = float(os.getenv("DRIFT_ERROR_RATIO", "1.5"))  # Live MAPE over the training MAPE that triggers a retrain
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.25"))  # Minimum population stability index of one feature
+DRIFT_FEATURES = tuple(os.getenv(
+    "DRIFT_FEATURES", "rsi,price_change,high_low_ratio,close_sma20_ratio,volume_ratio"
+).split(","))  # Scale-free indicator columns; price-level columns drift with every trend
+DRIFT_WINDOW_BARS = 60  # Recent bars compared with the training bars
+DRIFT_MIN_BARS = 5  # Realized bars since training needed before live error counts
+DRIFT_PSI_BINS = 10
+DRIFT_PSI_PERCENTILE = 95  # Percentile of training-window PSI scores taken as a feature's threshold
+DRIFT_PSI_MAX_THRESHOLD = float(os.getenv("DRIFT_PSI_MAX_THRESHOLD", "2.0"))  # Cap on a feature's threshold
+DRIFT_REPORT_PATH = MODELS_DIR / "drift_reports.jsonl"
+RETRAIN_WINDOW_START = os.getenv("RETRAIN_WINDOW_START", "01:00")  # Daily compute window for retraining
+RETRAIN_WINDOW_HOURS = float(os.getenv("RETRAIN_WINDOW_HOURS", "5"))  # No new job starts after the window closes
+RETRAIN_MAX_CONCURRENT = int(os.getenv("RETRAIN_MAX_CONCURRENT", "2"))  # Training processes at once
+RETRAIN_MAX_SYMBOLS = int(os.getenv("RETRAIN_MAX_SYMBOLS", "0"))  # Per window, most degraded first; 0 = no cap
+
+# Walk-forward backtests of saved models (backtest.py)
+BACKTEST_PERIOD = os.getenv("BACKTEST_PERIOD", "5y")
+BACKTEST_WINDOW_BARS = 63  # Bars per scored window (about a quarter)
+BACKTEST_STEP_BARS = 63  # Bars between window starts; less than the window for overlapping windows
+BACKTEST_BATCH_SIZE = 4096  # Windows per predict call
+BACKTEST_DIR = DATA_DIR / "backtests"
+
+# Hyperparameter search (hyperparameter_search.py); the config.py values above are always trial 0
+HPO_DIR = MODELS_DIR / "hpo"  # Shared per-symbol datasets and study results
+HPO_SEARCH_SPACE = {
+    'units': [16, 32, 50, 64],
+    'layers': [1, 2, 3],
+    'dropout_rate': [0.1, 0.2, 0.3],
+    'batch_size': [32, 64, 128],
+    'learning_rate': [0.0005, 0.001, 0.003],
+    'sequence_length': [30, 60, 90],
+}
+HPO_TRIALS = 24
+HPO_MAX_EPOCHS = 30
+HPO_EARLY_STOPPING_PATIENCE = 5
+HPO_PRUNE_WARMUP_EPOCHS = 3  # Epochs a trial always runs before it can be pruned
+HPO_PRUNE_MIN_PEERS = 3  # Trials that must have reached an epoch before it is compared
+HPO_PRUNE_PERCENTILE = 50  # Prune when the best validation loss so far is worse than this percentile of peers
+
 # API Configuration
 API_HOST = os.getenv("ML_API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("ML_API_PORT", "5000"))
+SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", "0"))  # gunicorn workers (gunicorn.conf.py); 0 = derive
+SERVING_THREADS_PER_WORKER = int(os.getenv("SERVING_THREADS_PER_WORKER", "0"))  # 0 = split cores across workers
+SERVING_PRELOAD = os.getenv("SERVING_PRELOAD", "False").lower() == "true"  # Load models in the gunicorn master before forking
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+# In-process model registry (LRU of loaded Keras models)
+MODEL_REGISTRY_MAX_MODELS = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", "20"))
+MODEL_REGISTRY_MEMORY_MB = float(os.getenv("MODEL_REGISTRY_MEMORY_MB", "512"))
+
+# Serving backend: "keras" loads .h5 models with TensorFlow, "tflite" serves
+# artifacts written by model_export.py through the TFLite interpreter only
+SERVING_BACKEND = os.getenv("SERVING_BACKEND", "keras").lower()
+LITE_NUM_THREADS = int(os.getenv("LITE_NUM_THREADS", "1"))  # Interpreter threads per model
+LITE_SHARED_WEIGHTS = os.getenv("LITE_SHARED_WEIGHTS", "True").lower() == "true"  # Read weights from the mmap'd file
+EXPORT_PARITY_TOLERANCE = 1e-5  # Max abs difference from Keras on scaled (0-1) outputs (measured ~1e-7)
+EXPORT_PARITY_SAMPLES = 64  # Random inputs checked per export
+
+# Batch prediction
+BATCH_PREDICT_WORKERS = int(os.getenv("BATCH_PREDICT_WORKERS", "8"))  # Concurrent fetch/preprocess threads
+BATCH_PREDICT_FUSE_MODELS = os.getenv("BATCH_PREDICT_FUSE_MODELS", "True").lower() == "true"
+FUSED_INFERENCE_CACHE_SIZE = 32  # Traced graphs kept for repeated symbols and watchlists
+
+# Cross-request micro-batching for /predict (one forward pass per model per batch)
+MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "True").lower() == "true"
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))  # Wait after the oldest request
+MICRO_BATCH_MAX_BATCH = int(os.getenv("MICRO_BATCH_MAX_BATCH", "256"))  # Input rows; a dropout request counts K rows
+
+# Prediction result cache (keyed by symbol, model mtime, last bar date and horizon)
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "True").lower() == "true"
+PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", "900"))  # Seconds; bounds staleness of a live session bar
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "1024"))
+PREDICTION_CACHE_PERSIST = os.getenv("PREDICTION_CACHE_PERSIST", "False").lower() == "true"
+PREDICTION_CACHE_PATH = DATA_DIR / "prediction_cache.json"
+PREDICTION_CACHE_SAVE_INTERVAL = 30  # Minimum seconds between writes when persisting
+
+# Post-close precomputed predictions (prediction_store.py), served before the cache
+PREDICTION_STORE_ENABLED = os.getenv("PREDICTION_STORE_ENABLED", "True").lower() == "true"
+PREDICTION_STORE_PATH = DATA_DIR / "predictions.sqlite3"
+PREDICTION_STORE_MAX_AGE = int(os.getenv("PREDICTION_STORE_MAX_AGE", "61200"))  # Seconds; a post-close run expires before the next open
+PRECOMPUTE_DAYS_AHEAD = tuple(int(d) for d in os.getenv("PRECOMPUTE_DAYS_AHEAD", "1").split(","))  # Horizons stored per symbol
+PRECOMPUTE_TIME = os.getenv("PRECOMPUTE_TIME", "16:15")  # Weekday run time in retrain_scheduler.py (after NSE close)
+
+# Indicator time series endpoint (computed frames kept per symbol and period)
+INDICATOR_SERIES_PERIOD = "2y"  # Default history the series is computed over
+INDICATOR_SERIES_CACHE_ENTRIES = int(os.getenv("INDICATOR_SERIES_CACHE_ENTRIES", "256"))
+
+# Monte Carlo dropout uncertainty (one tiled training=True forward pass)
+MC_DROPOUT_SAMPLES = int(os.getenv("MC_DROPOUT_SAMPLES", "32"))  # Samples per prediction (0 disables)
+MC_DROPOUT_MIN_SAMPLES = 8  # Floor when the latency budget forces fewer samples
+MC_DROPOUT_BUDGET_MS = float(os.getenv("MC_DROPOUT_BUDGET_MS", "50"))  # Per request, 0 for no limit
+MC_DROPOUT_INTERVAL = 0.9  # Central prediction interval level
+MC_CALIBRATION_WINDOWS = 256  # Most recent held-out windows used to calibrate the interval at training time
+
+# Metrics (Prometheus text format at /metrics, per process)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0
+)  # Seconds; the long buckets cover training runs
+DEBUG_TIMING_HEADER = "X-Debug-Timing"  # Request header that adds a stage breakdown to JSON responses
+
+# Cold-start budgets checked by benchmark_startup.py
+STARTUP_IMPORT_BUDGET_MS = 1000  # `import app`, before any request
+STARTUP_FIRST_PREDICTION_BUDGET_MS = 15000  # First /predict, including model load
+BENCHMARK_HISTORY_DIR = DATA_DIR / "benchmarks"
+
 # Model versioning
 MODEL_VERSION = "1.0.0"
 
@@ -0,0 +1,126 @@
+"""
+CPU thread budgets for training and serving processes
+
+TensorFlow, OpenMP and the BLAS libraries each default to one thread per
+core. Several training workers or gunicorn workers on one machine then run
+N x cores threads on cores cores and throughput collapses. Every process
+here gets an explicit budget instead: the available cores are split across
+the worker processes (`partition`), and each process limits its thread pools
+before TensorFlow starts (`configure_threads`).
+"""
+import os
+import sys
+
+from config import CPU_CORES, CPU_PIN_WORKERS, TF_INTER_OP_THREADS
+
+# Read by the OpenMP / BLAS runtimes when they initialize
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS',
+)
+
+
+def available_cores():
+    """
+    Cores this process may use: CPU_CORES if set, otherwise the affinity
+    mask, capped by a cgroup v2 CPU quota (containers)
+    """
+    if CPU_CORES > 0:
+        return CPU_CORES
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def partition(workers=0, threads=0, cores=None):
+    """
+    Split cores between worker processes
+
+    Args:
+        workers: Worker processes (0: as many as the thread budget allows)
+        threads: Threads per worker (0: cores divided by workers, or 1 when
+            workers is 0 too)
+        cores: Cores to split (default: available_cores())
+
+    Returns:
+        Tuple of (workers, threads_per_worker)
+    """
+    cores = cores or available_cores()
+    if workers and not threads:
+        threads = max(1, cores // workers)
+    threads = threads or 1
+    workers = workers or max(1, cores // threads)
+    return workers, threads
+
+
+def configure_threads(threads, inter_op=TF_INTER_OP_THREADS):
+    """
+    Limit this process's TensorFlow and BLAS thread pools
+
+    Call before TensorFlow is imported: it sizes its pools from
+    TF_NUM_INTRAOP_THREADS / TF_NUM_INTEROP_THREADS when it starts, and
+    later changes raise. BLAS libraries that are already loaded are limited
+    through threadpoolctl when it is installed.
+
+    Args:
+        threads: Intra-op / BLAS threads (0 or None leaves library defaults)
+        inter_op: TensorFlow inter-op threads
+    """
+    if not threads:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op)
+
+    if 'numpy' in sys.modules:
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(threads)
+        except ImportError:
+            pass
+
+    if 'tensorflow' in sys.modules:
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+        except RuntimeError:
+            print(f"⚠️  TensorFlow is already initialized; thread budget {threads} not applied to it")
+
+
+def pin_to_cores(index, threads, cores=None):
+    """
+    Restrict worker `index` to its own slice of `threads` cores
+
+    Only when CPU_PIN_WORKERS is on and the platform supports affinity;
+    workers beyond the available cores wrap around.
+
+    Returns:
+        The cores pinned to, or None
+    """
+    if not CPU_PIN_WORKERS or not hasattr(os, 'sched_setaffinity'):
+        return None
+    allowed = sorted(os.sched_getaffinity(0))
+    cores = cores or len(allowed)
+    start = (index * threads) % cores
+    pinned = {allowed[(start + offset) % len(allowed)] for offset in range(threads)}
+    os.sched_setaffinity(0, pinned)
+    return sorted(pinned)
+
+
+def describe(workers, threads):
+    """One-line summary for logs"""
+    cores = available_cores()
+    used = workers * threads
+    note = f", oversubscribed {used / cores:.1f}x" if used > cores else ''
+    return f"{workers} workers × {threads} threads on {cores} cores{note}"
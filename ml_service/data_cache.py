@@ -0,0 +1,275 @@
+"""
+Local columnar OHLCV cache backed by per-symbol Parquet files
+"""
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+from config import (
+    OHLCV_CACHE_DIR, OHLCV_CACHE_ENABLED, OHLCV_CACHE_MAX_AGE,
+    OHLCV_CACHE_OVERLAP_DAYS
+)
+
+OHLCV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+_PERIOD_PATTERN = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def period_start(period, now):
+    """
+    Translate a Yahoo Finance period string into the earliest date it covers
+
+    Args:
+        period: Period string ('5d', '3mo', '2y', 'ytd', 'max', ...)
+        now: Reference timestamp (timezone of the cached data)
+
+    Returns:
+        Timestamp of the first day in the period, or None for 'max'
+    """
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        'd': pd.DateOffset(days=amount),
+        'wk': pd.DateOffset(weeks=amount),
+        'mo': pd.DateOffset(months=amount),
+        'y': pd.DateOffset(years=amount),
+    }
+    return now.normalize() - offsets[unit]
+
+
+class OHLCVCache:
+    """
+    On-disk per-symbol OHLCV store with incremental append
+
+    Each symbol is kept as `{symbol}.parquet` next to a small
+    `{symbol}.json` sidecar recording when Yahoo was last asked and how far
+    back the stored history reaches. Any period that falls inside the stored
+    history is served locally; only bars after the last cached date are
+    downloaded once the sidecar is older than `max_age` seconds.
+    """
+
+    def __init__(self, cache_dir=OHLCV_CACHE_DIR, max_age=OHLCV_CACHE_MAX_AGE,
+                 overlap_days=OHLCV_CACHE_OVERLAP_DAYS):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.overlap_days = overlap_days
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'incremental_updates': 0,
+            'refreshes': 0,
+            'bytes_read': 0,
+            'bytes_written': 0,
+        }
+
+    def _lock_for(self, symbol):
+        with self._locks_guard:
+            if symbol not in self._locks:
+                self._locks[symbol] = threading.Lock()
+            return self._locks[symbol]
+
+    def _paths(self, symbol):
+        return (
+            self.cache_dir / f"{symbol}.parquet",
+            self.cache_dir / f"{symbol}.json",
+        )
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _read(self, symbol):
+        data_path, meta_path = self._paths(symbol)
+        if not data_path.exists() or not meta_path.exists():
+            return None, None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        df = pd.read_parquet(data_path)
+        self._count('bytes_read', data_path.stat().st_size)
+        return df, meta
+
+    def _write(self, symbol, df, meta):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self._paths(symbol)
+
+        # Write to temporary files first so readers never see a half-written cache
+        meta['last_date'] = df['date'].iloc[-1].date().isoformat() if not df.empty else None
+        tmp_data = data_path.with_suffix('.parquet.tmp')
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        df.to_parquet(tmp_data, index=False)
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+
+        self._count('bytes_written', data_path.stat().st_size)
+
+    @staticmethod
+    def _merge(cached, fresh):
+        merged = pd.concat([cached, fresh], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='last')
+        return merged.sort_values('date').reset_index(drop=True)
+
+    @staticmethod
+    def _history_changed(cached, fresh):
+        """Detect re-adjusted history (splits/dividends) on overlapping closed bars"""
+        overlap = cached.merge(fresh, on='date', suffixes=('_cached', '_fresh'))
+        # The most recent cached bar may have been captured mid-session
+        overlap = overlap.iloc[:-1]
+        if overlap.empty:
+            return False
+        diff = (overlap['close_cached'] - overlap['close_fresh']).abs()
+        return bool((diff > overlap['close_fresh'].abs() * 1e-6).any())
+
+    @staticmethod
+    def _slice(df, period):
+        if df.empty:
+            return df
+        now = pd.Timestamp.now(tz=df['date'].dt.tz)
+        start = period_start(period, now)
+        if start is not None:
+            df = df[df['date'] >= start]
+        return df.reset_index(drop=True)
+
+    def _covers(self, meta, period, tz):
+        if meta.get('period_start') is None:
+            return True
+        requested = period_start(period, pd.Timestamp.now(tz=tz))
+        if requested is None:
+            return False
+        return requested >= pd.Timestamp(meta['period_start'])
+
+    def get(self, symbol, period, downloader, refresh=False):
+        """
+        Return OHLCV bars for a period, downloading only what is missing
+
+        Args:
+            symbol: Resolved stock symbol (e.g., 'RELIANCE.NS')
+            period: Data period ('3mo', '2y', 'max', ...)
+            downloader: Callable `downloader(symbol, period=None, start=None)`
+                returning a DataFrame with OHLCV_COLUMNS
+            refresh: Ignore cached bars and re-download the whole period
+
+        Returns:
+            DataFrame with OHLCV data for the requested period
+        """
+        with self._lock_for(symbol):
+            cached, meta = self._read(symbol)
+            covered = (
+                cached is not None and not cached.empty
+                and self._covers(meta, period, cached['date'].dt.tz)
+            )
+
+            if refresh:
+                # Keep the longest history already stored when forcing a refresh
+                self._count('refreshes')
+                full_period = meta['period'] if covered else period
+                return self._slice(self._full_download(symbol, full_period, downloader), period)
+
+            if not covered:
+                self._count('misses')
+                return self._slice(self._full_download(symbol, period, downloader), period)
+
+            if time.time() - meta['fetched_at'] < self.max_age:
+                self._count('hits')
+                return self._slice(cached, period)
+
+            # Ask only for bars after the last cached date (plus a small overlap)
+            start = cached['date'].iloc[-1] - pd.Timedelta(days=self.overlap_days)
+            fresh = downloader(symbol, start=start.date())
+            self._count('incremental_updates')
+
+            if not fresh.empty and self._history_changed(cached, fresh):
+                return self._slice(self._full_download(symbol, meta['period'], downloader), period)
+
+            merged = self._merge(cached, fresh) if not fresh.empty else cached
+            meta['fetched_at'] = time.time()
+            self._write(symbol, merged, meta)
+            return self._slice(merged, period)
+
+    def last_bar_date(self, symbol):
+        """
+        Date of the newest cached bar, read from the sidecar only
+
+        Returns:
+            ISO date string, or None when nothing is cached or the cache is
+            older than max_age (newer bars may exist)
+        """
+        _, meta_path = self._paths(symbol)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - meta['fetched_at'] >= self.max_age:
+            return None
+        return meta.get('last_date')
+
+    def _full_download(self, symbol, period, downloader):
+        df = downloader(symbol, period=period)
+        if df.empty:
+            return df
+
+        df = df[OHLCV_COLUMNS].sort_values('date').reset_index(drop=True)
+        start = period_start(period, pd.Timestamp.now(tz=df['date'].dt.tz))
+        meta = {
+            'symbol': symbol,
+            'period': period,
+            'period_start': start.isoformat() if start is not None else None,
+            'fetched_at': time.time(),
+        }
+        self._write(symbol, df, meta)
+        return df
+
+    def invalidate(self, symbol=None):
+        """Drop cached bars for one symbol, or for every symbol when None"""
+        if not self.cache_dir.exists():
+            return
+        pattern = f"{symbol}.*" if symbol else "*"
+        for path in self.cache_dir.glob(pattern):
+            if path.suffix in ('.parquet', '.json'):
+                path.unlink()
+
+    def stats(self):
+        """Return cache hit/miss counters and on-disk size"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        lookups = stats['hits'] + stats['misses'] + stats['incremental_updates']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        files = list(self.cache_dir.glob('*.parquet')) if self.cache_dir.exists() else []
+        stats['symbols'] = len(files)
+        stats['bytes_on_disk'] = sum(p.stat().st_size for p in files)
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ohlcv_cache():
+    """Return the process-wide OHLCV cache, or None when caching is disabled"""
+    global _default_cache
+    if not OHLCV_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = OHLCVCache()
+        return _default_cache
+
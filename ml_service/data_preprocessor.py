@@ -3,54 +3,159 @@ Data preprocessing and feature engineering for stock price prediction
 """
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-import yfinance as yf
 from datetime import datetime, timedelta
+from data_cache import OHLCV_COLUMNS, get_ohlcv_cache
+from sequence_windows import SlidingWindowDataset
+from single_flight import SingleFlight
+from metrics import stage
 import warnings
 warnings.filterwarnings('ignore')
 
+# Model input features, in the column order the LSTM was trained on
+FEATURE_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume',
+    'rsi', 'macd', 'macd_signal', 'macd_hist',
+    'sma_20', 'sma_50', 'ema_12',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
+    'price_change', 'high_low_ratio', 'close_sma20_ratio',
+    'volume_ratio'
+]
+
+# Concurrent fetches of the same symbol/period share one download or cache read
+fetch_flight = SingleFlight('fetch_stock_data')
+
+
+def exchange_symbol(symbol):
+    """Add the NSE suffix to symbols without an exchange suffix"""
+    if not symbol.endswith('.NS') and not symbol.endswith('.BO'):
+        return f"{symbol}.NS"
+    return symbol
+
+
 class StockDataPreprocessor:
     """Handles data fetching, preprocessing, and feature engineering"""
     
-    def __init__(self):
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
-        self.feature_scaler = MinMaxScaler(feature_range=(0, 1))
+    def __init__(self, cache=None, use_cache=True):
+        # Scalers are only needed for training; scikit-learn is imported on
+        # first use so indicator-only callers start quickly
+        self._scaler = None
+        self._feature_scaler = None
+        # use_cache=False always downloads, e.g. for synthetic benchmark bars
+        if not use_cache:
+            self.cache = None
+        else:
+            self.cache = cache if cache is not None else get_ohlcv_cache()
+    
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import MinMaxScaler
+            self._scaler = MinMaxScaler(feature_range=(0, 1))
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
+    
+    @property
+    def feature_scaler(self):
+        if self._feature_scaler is None:
+            from sklearn.preprocessing import MinMaxScaler
+            self._feature_scaler = MinMaxScaler(feature_range=(0, 1))
+        return self._feature_scaler
+    
+    @feature_scaler.setter
+    def feature_scaler(self, value):
+        self._feature_scaler = value
         
-    def fetch_stock_data(self, symbol, period="2y"):
+    def fetch_stock_data(self, symbol, period="2y", refresh=False):
         """
-        Fetch stock data from Yahoo Finance
+        Fetch stock data, served from the local OHLCV cache when possible
+        
+        Concurrent calls for the same symbol and period are coalesced into
+        one fetch; each caller still gets its own DataFrame.
         
         Args:
             symbol: Stock symbol (e.g., 'RELIANCE.NS' for NSE)
             period: Data period ('1y', '2y', '5y', etc.)
+            refresh: Bypass cached bars and re-download the whole period
         
         Returns:
             DataFrame with OHLCV data
         """
         try:
             # For Indian stocks, add .NS suffix if not present
-            if not symbol.endswith('.NS') and not symbol.endswith('.BO'):
-                symbol = f"{symbol}.NS"
-            
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period)
-            
-            if df.empty:
-                raise ValueError(f"No data found for symbol: {symbol}")
+            symbol = exchange_symbol(symbol)
             
-            # Reset index to make Date a column
-            df.reset_index(inplace=True)
-            df.columns = [col.lower() if isinstance(col, str) else col for col in df.columns]
-            
-            # Ensure we have required columns
-            required_cols = ['open', 'high', 'low', 'close', 'volume']
-            if not all(col in df.columns for col in required_cols):
-                raise ValueError(f"Missing required columns. Available: {df.columns.tolist()}")
-            
-            return df[['date', 'open', 'high', 'low', 'close', 'volume']]
+            key = (symbol, period, refresh, id(self.cache))
+            with stage('fetch'):
+                df, shared = fetch_flight.do(key, self._fetch, symbol, period, refresh)
+            return df.copy() if shared else df
         except Exception as e:
             raise Exception(f"Error fetching data for {symbol}: {str(e)}")
     
+    def _fetch(self, symbol, period, refresh):
+        if self.cache is not None:
+            df = self.cache.get(symbol, period, self._download, refresh=refresh)
+        else:
+            df = self._download(symbol, period=period)
+        
+        if df.empty:
+            raise ValueError(f"No data found for symbol: {symbol}")
+        
+        return df
+    
+    def last_bar_date(self, symbol):
+        """
+        Date of the newest bar known to be current, without fetching
+        
+        Args:
+            symbol: Stock symbol
+        
+        Returns:
+            ISO date string, or None when the OHLCV cache is disabled, empty
+            or due for an update
+        """
+        if self.cache is None:
+            return None
+        return self.cache.last_bar_date(exchange_symbol(symbol))
+    
+    def _download(self, symbol, period=None, start=None):
+        """
+        Download OHLCV bars from Yahoo Finance
+        
+        Args:
+            symbol: Resolved stock symbol
+            period: Data period, used when start is not given
+            start: First date to download (incremental updates)
+        
+        Returns:
+            DataFrame with OHLCV data (may be empty)
+        """
+        import yfinance as yf
+        
+        ticker = yf.Ticker(symbol)
+        with stage('download'):
+            if start is not None:
+                df = ticker.history(start=start)
+            else:
+                df = ticker.history(period=period)
+        
+        if df.empty:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        
+        # Reset index to make Date a column
+        df.reset_index(inplace=True)
+        df.columns = [col.lower() if isinstance(col, str) else col for col in df.columns]
+        
+        # Ensure we have required columns
+        required_cols = ['open', 'high', 'low', 'close', 'volume']
+        if not all(col in df.columns for col in required_cols):
+            raise ValueError(f"Missing required columns. Available: {df.columns.tolist()}")
+        
+        return df[OHLCV_COLUMNS]
+    
+    @stage('indicators')
     def calculate_technical_indicators(self, df):
         """
         Calculate technical indicators
@@ -143,31 +248,36 @@ class StockDataPreprocessor:
             prediction_days: Number of days to predict ahead
         
         Returns:
-            X, y: Features and targets
+            X, y: Read-only float32 views of features and targets
+        """
+        dataset = self.prepare_window_dataset(df, sequence_length, prediction_days)
+        return dataset.X, dataset.y
+    
+    def prepare_window_dataset(self, df, sequence_length=60, prediction_days=1):
         """
-        # Select feature columns
-        feature_columns = [
-            'open', 'high', 'low', 'close', 'volume',
-            'rsi', 'macd', 'macd_signal', 'macd_hist',
-            'sma_20', 'sma_50', 'ema_12',
-            'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
-            'price_change', 'high_low_ratio', 'close_sma20_ratio',
-            'volume_ratio'
-        ]
+        Scale features and wrap them in a zero-copy sliding-window dataset
         
+        Args:
+            df: DataFrame with features
+            sequence_length: Number of time steps to look back
+            prediction_days: Number of days to predict ahead
+        
+        Returns:
+            SlidingWindowDataset over the float32 scaled feature matrix
+        """
         # Filter available columns
-        available_features = [col for col in feature_columns if col in df.columns]
-        data = df[available_features].values
+        available_features = [col for col in FEATURE_COLUMNS if col in df.columns]
+        data = df[available_features].to_numpy(dtype=np.float32)
         
-        # Scale features
+        # Scale features (float32 input keeps the scaler output float32)
         scaled_data = self.feature_scaler.fit_transform(data)
         
-        X, y = [], []
-        for i in range(sequence_length, len(scaled_data) - prediction_days + 1):
-            X.append(scaled_data[i-sequence_length:i])
-            y.append(scaled_data[i+prediction_days-1, 3])  # Close price is at index 3
+        # Close price scaler, used to inverse transform predictions
+        self.scaler.fit(data[:, 3:4])  # Close price is at index 3
         
-        return np.array(X), np.array(y)
+        return SlidingWindowDataset(
+            scaled_data, sequence_length, prediction_days, target_column=3
+        )
     
     def scale_data(self, data, fit=False):
         """Scale data using MinMaxScaler"""
@@ -0,0 +1,295 @@
+"""
+Per-symbol model degradation: realized error since training and indicator drift
+
+A saved model is replayed over the bars that closed after its last training
+bar (one batched forward pass with the training scalers), and its error on
+them is compared with the validation error recorded at training time. The
+recent distribution of the scale-free indicator columns is compared with
+the training bars through the population stability index (PSI), against a
+threshold raised to a high percentile of the scores of same-length windows
+inside the training period (capped). Symbols past either threshold are
+queued for retraining, most degraded first.
+Every check is appended to DRIFT_REPORT_PATH. Usage:
+    python drift_monitor.py                     # check_progress.ALL_STOCKS
+    python drift_monitor.py --symbols TCS.NS --json
+    python drift_monitor.py --history TCS.NS    # earlier checks for one symbol
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import (
+    SEQUENCE_LENGTH, PREDICTION_DAYS, BATCH_PREDICT_WORKERS, DRIFT_ERROR_RATIO, DRIFT_PSI_THRESHOLD,
+    DRIFT_FEATURES, DRIFT_WINDOW_BARS, DRIFT_MIN_BARS, DRIFT_PSI_BINS, DRIFT_PSI_PERCENTILE,
+    DRIFT_PSI_MAX_THRESHOLD, DRIFT_REPORT_PATH, INDICATOR_WARMUP_BARS
+)
+
+# Reasons that queue a symbol regardless of its scores, ahead of scored ones
+FORCED_REASONS = ('no_model', 'unfitted')
+
+
+def psi(reference, current, bins=DRIFT_PSI_BINS):
+    """
+    Population stability index of `current` against `reference`
+
+    Bins are reference quantiles, so each holds about the same share of the
+    reference; empty bins are floored to avoid infinite terms. Below 0.1 is
+    usually read as stable and above 0.25 as a significant shift.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    edges = np.unique(np.quantile(reference, np.linspace(0, 1, bins + 1)[1:-1]))
+    expected = np.bincount(np.searchsorted(edges, reference, side='right'), minlength=len(edges) + 1)
+    actual = np.bincount(np.searchsorted(edges, current, side='right'), minlength=len(edges) + 1)
+    expected = np.maximum(expected / len(reference), 1e-4)
+    actual = np.maximum(actual / len(current), 1e-4)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def psi_baseline(reference, window, bins=DRIFT_PSI_BINS, percentile=DRIFT_PSI_PERCENTILE, end=None):
+    """
+    PSI of `window`-bar slices of the reference against the rest of the
+    reference, at `percentile` across slices
+
+    Indicators are autocorrelated, so even a window from the training period
+    rarely scores near 0. Each slice is left out of the bars it is compared
+    with, as the current window is, and only the first `end` bars are
+    sliced, so callers can keep the window being tested out of its own
+    baseline. Slices start every quarter window.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    end = len(reference) if end is None else end
+    step = max(1, window // 4)
+    scores = [psi(np.concatenate([reference[:start], reference[start + window:]]),
+                  reference[start:start + window], bins)
+              for start in range(end - window, -1, -step)]
+    return float(np.percentile(scores, percentile)) if scores else 0.0
+
+
+def _realized_error(bundle, df, after):
+    """One-step predictions for every bar closed after `after`; returns (mape, mae, bars)"""
+    from sequence_windows import SlidingWindowDataset
+
+    scaled = bundle.feature_scaler.transform(df[bundle.feature_columns].to_numpy(dtype=np.float32))
+    dataset = SlidingWindowDataset(scaled, SEQUENCE_LENGTH, PREDICTION_DAYS, target_column=3)
+    # Sample i predicts row i + SEQUENCE_LENGTH + PREDICTION_DAYS - 1
+    target_rows = np.arange(len(dataset)) + SEQUENCE_LENGTH + PREDICTION_DAYS - 1
+    samples = np.flatnonzero((df['date'] > after).to_numpy()[target_rows])
+    if len(samples) == 0:
+        return None, None, 0
+
+    predicted = np.asarray(bundle.model(np.ascontiguousarray(dataset.X[samples]), training=False)).reshape(-1, 1)
+    predicted = bundle.close_scaler.inverse_transform(predicted)[:, 0]
+    actual = df['close'].to_numpy(dtype=np.float64)[target_rows[samples]]
+    errors = np.abs(predicted - actual)
+    return float(np.mean(errors / np.abs(actual)) * 100), float(np.mean(errors)), len(samples)
+
+
+def check_symbol(symbol, pipeline):
+    """
+    Score one symbol's saved model against the bars since it was trained
+
+    Args:
+        symbol: Stock symbol
+        pipeline: Serving pipeline (app.get_pipeline()) whose registry
+            loads the model bundle
+
+    Returns:
+        Report dict; `retrain` says whether the symbol crossed a threshold
+        and `priority` how far (1.0 = exactly at a threshold)
+    """
+    import pandas as pd
+
+    report = {'symbol': symbol, 'retrain': False, 'priority': None, 'reasons': []}
+    try:
+        resolved, _ = pipeline.model_registry.resolve(symbol)
+    except FileNotFoundError:
+        return {**report, 'retrain': True, 'reasons': ['no_model']}
+    _, bundle = pipeline.model_registry.get(resolved)
+    metadata = bundle.metadata
+    report.update({'symbol': resolved, 'trained_at': metadata.get('trained_at'),
+                   'last_bar_date': metadata.get('last_bar_date')})
+    if not bundle.fitted or 'last_bar_date' not in metadata:
+        # Retraining is also what gives the model saved scalers
+        return {**report, 'retrain': True, 'reasons': ['unfitted']}
+
+    preprocessor = pipeline.preprocessor
+    df = preprocessor.calculate_technical_indicators(
+        preprocessor.fetch_stock_data(resolved, metadata.get('period', '2y'))
+    )
+    last_trained = pd.Timestamp(metadata['last_bar_date'])
+
+    mape, mae, bars = _realized_error(bundle, df, last_trained)
+    train_mape = metadata.get('metrics', {}).get('mape')
+    error_ratio = mape / train_mape if mape is not None and train_mape and bars >= DRIFT_MIN_BARS else None
+    report.update({
+        'bars_since_training': bars,
+        'live_mape': mape,
+        'live_mae': mae,
+        'train_mape': train_mape,
+        'error_ratio': error_ratio,
+    })
+
+    trained_rows = int((df['date'] <= last_trained).sum())
+    reference = df.iloc[INDICATOR_WARMUP_BARS:trained_rows]
+    current = df.tail(DRIFT_WINDOW_BARS)
+    # Baseline windows end before the current window starts; like live error,
+    # drift is only scored once DRIFT_MIN_BARS bars unseen in training have closed
+    baseline_end = min(trained_rows, len(df) - DRIFT_WINDOW_BARS) - INDICATOR_WARMUP_BARS
+    feature_psi, thresholds = {}, {}
+    if bars >= DRIFT_MIN_BARS and baseline_end >= 2 * DRIFT_WINDOW_BARS:
+        for col in DRIFT_FEATURES:
+            if col in df.columns:
+                feature_psi[col] = psi(reference[col], current[col])
+                baseline = psi_baseline(reference[col], DRIFT_WINDOW_BARS, end=baseline_end)
+                thresholds[col] = min(DRIFT_PSI_MAX_THRESHOLD, max(DRIFT_PSI_THRESHOLD, baseline))
+    # Worst feature relative to its own threshold
+    worst = max(feature_psi, key=lambda col: feature_psi[col] / thresholds[col]) if feature_psi else None
+    report.update({
+        'psi': feature_psi,
+        'psi_thresholds': thresholds,
+        'max_psi': feature_psi[worst] if worst else None,
+        'max_psi_feature': worst,
+    })
+
+    scores = []
+    if error_ratio is not None:
+        scores.append(error_ratio / DRIFT_ERROR_RATIO)
+        if error_ratio >= DRIFT_ERROR_RATIO:
+            report['reasons'].append('error')
+    if worst is not None:
+        scores.append(feature_psi[worst] / thresholds[worst])
+        if feature_psi[worst] > thresholds[worst]:
+            report['reasons'].append('drift')
+    report['priority'] = max(scores) if scores else None
+    report['retrain'] = bool(report['reasons'])
+    return report
+
+
+def check_universe(symbols=None, pipeline=None, workers=BATCH_PREDICT_WORKERS):
+    """
+    Check every symbol concurrently
+
+    Returns:
+        List of reports aligned with symbols; a symbol whose check raised
+        gets `error` set and is not queued
+    """
+    from check_progress import ALL_STOCKS
+
+    if pipeline is None:
+        from app import get_pipeline
+        pipeline = get_pipeline()
+    symbols = list(dict.fromkeys(symbols or ALL_STOCKS))
+
+    def check(symbol):
+        try:
+            return check_symbol(symbol, pipeline)
+        except Exception as e:
+            return {'symbol': symbol, 'retrain': False, 'priority': None, 'reasons': [], 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as pool:
+        return list(pool.map(check, symbols))
+
+
+def retrain_queue(reports, limit=0):
+    """
+    Symbols to retrain, most degraded first
+
+    Missing and unfitted models come first, then the rest by priority.
+
+    Args:
+        reports: Output of check_universe
+        limit: Keep at most this many (0 = all)
+    """
+    queued = [report for report in reports if report['retrain']]
+    queued.sort(key=lambda r: (
+        not any(reason in FORCED_REASONS for reason in r['reasons']),
+        -(r['priority'] or 0)
+    ))
+    symbols = [report['symbol'] for report in queued]
+    return symbols[:limit] if limit else symbols
+
+
+class DriftLog:
+    """Append-only JSONL history of drift checks, one line per symbol per check"""
+
+    def __init__(self, path=DRIFT_REPORT_PATH):
+        self.path = str(path)
+        self._lock = threading.Lock()
+
+    def append(self, reports, checked_at=None):
+        checked_at = checked_at or time.strftime('%Y-%m-%dT%H:%M:%S')
+        lines = ''.join(json.dumps({'checked_at': checked_at, **report}) + '\n' for report in reports)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            # One write on an O_APPEND descriptor keeps concurrent checks from interleaving
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, lines.encode())
+            finally:
+                os.close(fd)
+
+    def history(self, symbol=None):
+        """Earlier reports, oldest first, optionally for one resolved symbol"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if symbol is None or record['symbol'] == symbol:
+                    records.append(record)
+        return records
+
+
+def _fmt(value, digits=2):
+    return f"{value:.{digits}f}" if value is not None else '-'
+
+
+def print_reports(reports):
+    print(f"{'symbol':<16s} {'bars':>5s} {'live MAPE':>10s} {'train MAPE':>11s} {'ratio':>6s} "
+          f"{'max PSI':>8s} {'feature':<18s} {'priority':>8s}  action")
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['symbol']:<16s} error: {report['error']}")
+            continue
+        action = f"retrain ({', '.join(report['reasons'])})" if report['retrain'] else 'keep'
+        print(f"{report['symbol']:<16s} {report.get('bars_since_training', 0):>5d} "
+              f"{_fmt(report.get('live_mape')):>10s} {_fmt(report.get('train_mape')):>11s} "
+              f"{_fmt(report.get('error_ratio')):>6s} {_fmt(report.get('max_psi'), 3):>8s} "
+              f"{report.get('max_psi_feature') or '-':<18s} {_fmt(report['priority']):>8s}  {action}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbols', nargs='+', help="Symbols to check (default: check_progress.ALL_STOCKS)")
+    parser.add_argument('--history', metavar='SYMBOL', help="Show earlier checks for one symbol")
+    parser.add_argument('--json', action='store_true', help="Print reports as JSON")
+    parser.add_argument('--no-record', action='store_true', help="Do not append to the drift history")
+    args = parser.parse_args()
+
+    log = DriftLog()
+    if args.history:
+        for record in log.history(args.history):
+            print(f"{record['checked_at']}  ratio {_fmt(record.get('error_ratio'))}  "
+                  f"max PSI {_fmt(record.get('max_psi'), 3)}  "
+                  f"{'retrain (' + ', '.join(record['reasons']) + ')' if record['retrain'] else 'keep'}")
+    else:
+        reports = check_universe(args.symbols)
+        if not args.no_record:
+            log.append(reports)
+        if args.json:
+            print(json.dumps(reports, indent=2))
+        else:
+            print_reports(reports)
+            queue = retrain_queue(reports)
+            print(f"\nRetrain queue ({len(queue)}): {', '.join(queue) if queue else 'empty'}")
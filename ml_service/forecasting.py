@@ -0,0 +1,88 @@
+"""
+Multi-step autoregressive forecasting with batched model calls
+"""
+import numpy as np
+import pandas as pd
+
+
+def direct_inference(requests, training=False):
+    """Run (model, input) pairs one model call each; returns (outputs, calls)"""
+    outputs = [np.asarray(model(x, training=training)) for model, x in requests]
+    return outputs, len(outputs)
+
+
+class _Rollout:
+    """Rolling model input for one symbol, advanced one predicted bar at a time"""
+
+    def __init__(self, inputs):
+        self.sequence = np.asarray(inputs['sequence'], dtype=np.float32)
+        self.close_scaler = inputs['close_scaler']
+        self.feature_scaler = inputs['feature_scaler']
+        self.feature_columns = inputs['feature_columns']
+        self.indicators = inputs.get('indicators')
+        self.date = pd.Timestamp(inputs['last_date'])
+        self.close = float(inputs['close'][-1])
+        self.volume = float(inputs['volume'][-1])
+        self.path = []
+
+    def advance(self, prediction_scaled, extend=True):
+        """
+        Record one predicted day and, if more steps follow, feed it back
+
+        The predicted close becomes a synthetic bar (open at the previous
+        close, flat volume) that updates the indicator engine, so the next
+        input window carries consistent RSI/MACD/band features.
+        """
+        predicted = float(self.close_scaler.inverse_transform([[prediction_scaled]])[0, 0])
+        self.date = self.date + pd.offsets.BDay(1)
+        self.path.append({
+            'day': len(self.path) + 1,
+            'date': self.date.date().isoformat(),
+            'predicted_price': predicted
+        })
+
+        if extend:
+            self.indicators.update({
+                'date': self.date,
+                'open': self.close,
+                'high': max(self.close, predicted),
+                'low': min(self.close, predicted),
+                'close': predicted,
+                'volume': self.volume
+            })
+            row = self.indicators.last_row()
+            features = np.array([[row[col] for col in self.feature_columns]])
+            scaled = self.feature_scaler.transform(features).astype(np.float32)
+            self.sequence = np.concatenate([self.sequence[:, 1:], scaled[np.newaxis]], axis=1)
+
+        self.close = predicted
+
+
+def forecast_paths(inputs_list, models, days_ahead, infer=direct_inference):
+    """
+    Roll several symbols forward together, one batched call per horizon step
+
+    Args:
+        inputs_list: Outputs of Predictor.prepare_inference
+        models: Keras models aligned with inputs_list
+        days_ahead: Number of business days to forecast
+        infer: Callable taking [(model, input)] and returning (outputs, calls),
+            e.g. FusedInference.run
+
+    Returns:
+        Tuple of (list of per-day paths aligned with inputs_list,
+        list of the input sequences used for the final day,
+        total number of model calls)
+    """
+    rollouts = [_Rollout(inputs) for inputs in inputs_list]
+    calls = 0
+    for step in range(days_ahead):
+        outputs, step_calls = infer([
+            (model, rollout.sequence) for model, rollout in zip(models, rollouts)
+        ])
+        calls += step_calls
+        extend = step < days_ahead - 1
+        for rollout, output in zip(rollouts, outputs):
+            rollout.advance(float(np.asarray(output).reshape(-1)[0]), extend=extend)
+    paths = [rollout.path for rollout in rollouts]
+    return paths, [rollout.sequence for rollout in rollouts], calls
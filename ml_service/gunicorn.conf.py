@@ -0,0 +1,38 @@
+"""
+gunicorn settings: worker count and per-worker thread budget from config.py
+
+    gunicorn app:app                 # SERVING_WORKERS / SERVING_THREADS_PER_WORKER
+    gunicorn -w 4 app:app            # 4 workers, cores split between them
+
+Each worker limits its TensorFlow/BLAS threads after the fork, before the
+first prediction imports TensorFlow, so workers never oversubscribe cores.
+
+With SERVING_PRELOAD the app is imported and the trained models are loaded
+once in the master; workers forked from it share those pages copy-on-write
+(see app.preload_models).
+"""
+from config import API_HOST, API_PORT, SERVING_WORKERS, SERVING_THREADS_PER_WORKER, SERVING_PRELOAD
+from cpu_topology import configure_threads, describe, partition, pin_to_cores
+
+bind = f"{API_HOST}:{API_PORT}"
+workers, _ = partition(SERVING_WORKERS, SERVING_THREADS_PER_WORKER)
+timeout = 120
+preload_app = SERVING_PRELOAD
+
+
+def _threads(server):
+    # -w on the command line overrides `workers`, so split for the real count
+    return partition(server.cfg.workers, SERVING_THREADS_PER_WORKER)[1]
+
+
+def when_ready(server):
+    server.log.info(f"Serving with {describe(server.cfg.workers, _threads(server))}")
+    if server.cfg.preload_app:
+        from app import preload_models
+        server.log.info(f"Preloaded {preload_models()} models before forking workers")
+
+
+def post_fork(server, worker):
+    threads = _threads(server)
+    pin_to_cores(worker.age % server.cfg.workers, threads)
+    configure_threads(threads)
@@ -0,0 +1,418 @@
+"""
+Parallel hyperparameter search over the LSTM settings in config.py
+
+Trials build models with LSTMModelTrainer.build_model and fit them in
+worker processes set up like train_universe's (spawned, thread-limited).
+The symbol is fetched, given indicators and scaled once; every trial
+memory-maps that one feature matrix and slices its own windows from it.
+Trials report validation loss after each epoch, and a trial whose best loss
+so far is worse than the median of the trials that reached the same epoch is
+pruned. Completed trials are scored on validation MAE, single-window
+inference latency and training time, and the Pareto front of the three is
+reported. Usage:
+    python hyperparameter_search.py --symbol TCS.NS
+    python hyperparameter_search.py --symbol TCS.NS --trials 40 --workers 4
+    python hyperparameter_search.py --symbol BENCH.NS --synthetic 1500 --trials 8 --max-epochs 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from config import (
+    SEQUENCE_LENGTH, PREDICTION_DAYS, TRAIN_TEST_SPLIT,
+    LSTM_UNITS, DROPOUT_RATE, BATCH_SIZE, LEARNING_RATE,
+    HPO_DIR, HPO_SEARCH_SPACE, HPO_TRIALS, HPO_MAX_EPOCHS, HPO_EARLY_STOPPING_PATIENCE,
+    HPO_PRUNE_WARMUP_EPOCHS, HPO_PRUNE_MIN_PEERS, HPO_PRUNE_PERCENTILE
+)
+from sequence_windows import SlidingWindowDataset
+from train_universe import _init_worker, resolve_workers
+
+# Lower is better for every objective
+OBJECTIVES = ('mae', 'latency_ms', 'train_seconds')
+LATENCY_CALLS = 50
+
+
+def baseline_params():
+    """The settings config.py trains every symbol with (3 stacked LSTM layers)"""
+    return {
+        'units': LSTM_UNITS,
+        'layers': 3,
+        'dropout_rate': DROPOUT_RATE,
+        'batch_size': BATCH_SIZE,
+        'learning_rate': LEARNING_RATE,
+        'sequence_length': SEQUENCE_LENGTH,
+    }
+
+
+def sample_trials(count, space=HPO_SEARCH_SPACE, seed=0):
+    """
+    Baseline first, then distinct random points of the search space
+
+    Returns:
+        List of parameter dicts (fewer than `count` if the space is smaller)
+    """
+    rng = random.Random(seed)
+    trials = [baseline_params()]
+    seen = {tuple(sorted(trials[0].items()))}
+    size = int(np.prod([len(values) for values in space.values()]))
+    attempts = 0
+    while len(trials) < count and attempts < size * 10:
+        attempts += 1
+        params = {name: rng.choice(values) for name, values in space.items()}
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+    return trials
+
+
+def prepare_dataset(symbol, period='2y', preprocessor=None):
+    """
+    Fetch, compute indicators and scale a symbol's features once for all trials
+
+    The scaled float32 matrix is saved as
+    HPO_DIR/datasets/{symbol}_{period}_{bars version}.npy with a JSON
+    descriptor (close scaler, row count, last bar date), so later studies
+    on unchanged bars skip the work entirely.
+
+    Returns:
+        Dataset descriptor dict
+    """
+    from data_preprocessor import StockDataPreprocessor, exchange_symbol
+    from indicator_series import bars_version
+
+    preprocessor = preprocessor or StockDataPreprocessor()
+    symbol = exchange_symbol(symbol)
+    bars = preprocessor.fetch_stock_data(symbol, period)
+
+    base = HPO_DIR / 'datasets' / f"{symbol}_{period}_{bars_version(bars)}"
+    descriptor_path = base.with_suffix('.json')
+    if descriptor_path.exists():
+        with open(descriptor_path) as f:
+            return json.load(f)
+
+    df = preprocessor.calculate_technical_indicators(bars)
+    dataset = preprocessor.prepare_window_dataset(df, SEQUENCE_LENGTH, PREDICTION_DAYS)
+
+    base.parent.mkdir(parents=True, exist_ok=True)
+    np.save(base.with_suffix('.npy'), dataset.features)
+    descriptor = {
+        'symbol': symbol,
+        'period': period,
+        'rows': int(dataset.features.shape[0]),
+        'features': int(dataset.n_features),
+        'last_bar_date': df['date'].iloc[-1].isoformat(),
+        'features_path': str(base.with_suffix('.npy')),
+        # MinMaxScaler: scaled = close * scale + min
+        'close_min': float(preprocessor.scaler.min_[0]),
+        'close_scale': float(preprocessor.scaler.scale_[0]),
+    }
+    with open(descriptor_path, 'w') as f:
+        json.dump(descriptor, f, indent=2)
+    return descriptor
+
+
+def split_windows(dataset, rows):
+    """
+    Chronological train/validation split on target rows, not sample counts
+
+    Every trial validates on targets in the last (1 - TRAIN_TEST_SPLIT) of
+    the rows whatever its sequence length, so validation losses of
+    different trials are comparable.
+    """
+    first_target = int(rows * TRAIN_TEST_SPLIT)
+    first_validation = max(0, first_target - dataset.sequence_length - dataset.prediction_days + 1)
+    return dataset.subset(0, first_validation), dataset.subset(first_validation, len(dataset))
+
+
+def should_prune(trial_id, history, reports, warmup=HPO_PRUNE_WARMUP_EPOCHS,
+                 min_peers=HPO_PRUNE_MIN_PEERS, percentile=HPO_PRUNE_PERCENTILE):
+    """
+    Median-style pruning on the best validation loss so far
+
+    Args:
+        trial_id: This trial
+        history: This trial's validation losses, one per finished epoch
+        reports: Mapping of trial id to validation loss history for every
+            trial (running, finished or pruned)
+
+    Returns:
+        True if the trial should stop
+    """
+    epoch = len(history)
+    if epoch < warmup:
+        return False
+    peers = [
+        min(losses[:epoch]) for other, losses in reports.items()
+        if other != trial_id and len(losses) >= epoch
+    ]
+    if len(peers) < min_peers:
+        return False
+    return min(history) > np.percentile(peers, percentile)
+
+
+_features = {}
+
+
+def _load_features(path):
+    # Read-only memory map: trials in every worker share the page cache
+    if path not in _features:
+        _features[path] = np.load(path, mmap_mode='r')
+    return _features[path]
+
+
+def _measure_latency(model, window):
+    """Median milliseconds of one traced single-window forward pass"""
+    import tensorflow as tf
+
+    infer = tf.function(lambda x: model(x, training=False))
+    x = tf.constant(window)
+    for _ in range(3):
+        infer(x)
+    timings = []
+    for _ in range(LATENCY_CALLS):
+        start = time.perf_counter()
+        infer(x).numpy()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def _run_trial(trial_id, params, descriptor, max_epochs, reports, prune):
+    """Fit one configuration inside a worker process"""
+    from tensorflow.keras.callbacks import Callback, EarlyStopping
+    from model_trainer import LSTMModelTrainer, WindowBatchSequence
+
+    features = _load_features(descriptor['features_path'])
+    dataset = SlidingWindowDataset(features, params['sequence_length'], PREDICTION_DAYS, target_column=3)
+    train_data, validation_data = split_windows(dataset, descriptor['rows'])
+    if len(train_data) < params['batch_size'] or len(validation_data) == 0:
+        raise ValueError(f"Not enough samples for sequence_length={params['sequence_length']}")
+
+    model = LSTMModelTrainer(verbose=0).build_model(
+        (params['sequence_length'], dataset.n_features), units=params['units'], layers=params['layers'],
+        dropout_rate=params['dropout_rate'], learning_rate=params['learning_rate']
+    )
+
+    history = []
+    state = {'pruned_at': None}
+
+    class Pruning(Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            history.append(float(logs['val_loss']))
+            reports[trial_id] = list(history)
+            if prune and should_prune(trial_id, history, dict(reports)):
+                state['pruned_at'] = epoch + 1
+                self.model.stop_training = True
+
+    start = time.perf_counter()
+    model.fit(
+        WindowBatchSequence(train_data, params['batch_size'], shuffle=True),
+        epochs=max_epochs,
+        validation_data=WindowBatchSequence(validation_data, params['batch_size']),
+        callbacks=[
+            EarlyStopping(monitor='val_loss', patience=HPO_EARLY_STOPPING_PATIENCE, restore_best_weights=True),
+            Pruning(),
+        ],
+        verbose=0
+    )
+    train_seconds = time.perf_counter() - start
+
+    result = {
+        'trial': trial_id,
+        'params': params,
+        'status': 'pruned' if state['pruned_at'] else 'complete',
+        'epochs': len(history),
+        'best_val_loss': min(history),
+        'train_seconds': round(train_seconds, 2),
+        'parameters': int(model.count_params()),
+    }
+    if state['pruned_at']:
+        return result
+
+    # Validation error in price units, with the close scaler saved with the dataset
+    X = validation_data.X
+    predictions = np.concatenate([
+        np.asarray(model.predict_on_batch(np.ascontiguousarray(X[i:i + 1024]))).ravel()
+        for i in range(0, len(X), 1024)
+    ])
+    to_price = lambda scaled: (np.asarray(scaled, dtype=np.float64) - descriptor['close_min']) / descriptor['close_scale']
+    errors = to_price(predictions) - to_price(validation_data.y)
+    actual = to_price(validation_data.y)
+    result.update({
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(np.mean(np.abs(errors / actual)) * 100),
+        'latency_ms': round(_measure_latency(model, np.ascontiguousarray(X[-1:])), 3),
+    })
+    return result
+
+
+def pareto_front(results, objectives=OBJECTIVES):
+    """Trial ids of completed trials no other trial beats on every objective"""
+    complete = [r for r in results if r['status'] == 'complete']
+    front = []
+    for r in complete:
+        dominated = any(
+            all(o[k] <= r[k] for k in objectives) and any(o[k] < r[k] for k in objectives)
+            for o in complete if o is not r
+        )
+        if not dominated:
+            front.append(r['trial'])
+    return sorted(front)
+
+
+def run_search(symbol, period='2y', trials=HPO_TRIALS, workers=None, threads_per_worker=None,
+               max_epochs=HPO_MAX_EPOCHS, seed=0, prune=True, preprocessor=None):
+    """
+    Run a study and write it to HPO_DIR/study_{symbol}_{time}.json
+
+    Args:
+        symbol: Stock symbol
+        period: Data period to fetch
+        trials: Number of configurations, the config.py baseline included
+        workers: Worker processes (defaults to every core)
+        threads_per_worker: TensorFlow/BLAS threads per worker
+        max_epochs: Epoch cap per trial (EarlyStopping may stop sooner)
+        seed: Seed for sampling the search space
+        prune: Stop trials whose validation loss lags the median
+        preprocessor: StockDataPreprocessor to fetch with
+
+    Returns:
+        Study dict with every trial result and the Pareto front
+
+    Raises:
+        ValueError: If max_epochs is below 1
+    """
+    if max_epochs < 1:
+        # Every trial would fail on an empty loss history
+        raise ValueError(f"max_epochs must be at least 1, got {max_epochs}")
+    descriptor = prepare_dataset(symbol, period, preprocessor)
+    candidates = sample_trials(trials, seed=seed)
+    workers, threads = resolve_workers(workers, threads_per_worker)
+
+    print(f"\n🔎 {len(candidates)} trials for {descriptor['symbol']} on {descriptor['rows']} rows "
+          f"({workers} workers × {threads} threads, up to {max_epochs} epochs)")
+
+    started = time.time()
+    results = []
+    ctx = mp.get_context('spawn')
+    with ctx.Manager() as manager:
+        reports = manager.dict()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = {
+                pool.submit(_run_trial, trial_id, params, descriptor, max_epochs, reports, prune): trial_id
+                for trial_id, params in enumerate(candidates)
+            }
+            for future in as_completed(futures):
+                trial_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'trial': trial_id, 'params': candidates[trial_id], 'status': 'failed', 'error': str(e)}
+                    print(f"❌ Trial {trial_id} failed: {e}")
+                else:
+                    summary = (f"MAE {result['mae']:.2f}, {result['latency_ms']:.2f}ms"
+                               if result['status'] == 'complete' else f"pruned at epoch {result['epochs']}")
+                    print(f"  trial {trial_id:3d} {result['status']:8s} {summary}, "
+                          f"{result['epochs']} epochs in {result['train_seconds']:.0f}s")
+                results.append(result)
+
+    results.sort(key=lambda r: r['trial'])
+    study = {
+        'symbol': descriptor['symbol'],
+        'started_at': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+        'wall_seconds': round(time.time() - started, 1),
+        'workers': workers,
+        'threads_per_worker': threads,
+        'max_epochs': max_epochs,
+        'pruning': prune,
+        'dataset': descriptor,
+        'search_space': HPO_SEARCH_SPACE,
+        'trials': results,
+        'pareto_front': pareto_front(results),
+    }
+
+    HPO_DIR.mkdir(parents=True, exist_ok=True)
+    path = HPO_DIR / f"study_{descriptor['symbol']}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w') as f:
+        json.dump(study, f, indent=2)
+    study['path'] = str(path)
+    return study
+
+
+def print_report(study, tolerance=0.05):
+    """Completed trials by MAE, Pareto members starred, and the cheapest near-best config"""
+    trials = study['trials']
+    complete = sorted((r for r in trials if r['status'] == 'complete'), key=lambda r: r['mae'])
+    front = set(study['pareto_front'])
+
+    print(f"\n{'='*96}")
+    print(f"Study {study['symbol']}: {len(complete)} complete, "
+          f"{sum(r['status'] == 'pruned' for r in trials)} pruned, "
+          f"{sum(r['status'] == 'failed' for r in trials)} failed in {study['wall_seconds']:.0f}s")
+    print(f"{'='*96}")
+    print(f"  {'trial':>5s} {'units':>5s} {'layers':>6s} {'drop':>5s} {'batch':>5s} {'lr':>7s} {'seq':>4s} "
+          f"{'MAE':>9s} {'ms':>7s} {'train s':>8s} {'epochs':>6s} {'params':>8s}")
+    for r in complete:
+        p = r['params']
+        mark = '★' if r['trial'] in front else ' '
+        print(f"{mark} {r['trial']:5d} {p['units']:5d} {p['layers']:6d} {p['dropout_rate']:5.2f} "
+              f"{p['batch_size']:5d} {p['learning_rate']:7.4f} {p['sequence_length']:4d} "
+              f"{r['mae']:9.3f} {r['latency_ms']:7.2f} {r['train_seconds']:8.1f} {r['epochs']:6d} "
+              f"{r['parameters']:8d}")
+    print("★ Pareto front (MAE, latency, training time); trial 0 is the config.py baseline")
+
+    if not complete:
+        return
+    best = complete[0]['mae']
+    near_best = [r for r in complete if r['mae'] <= best * (1 + tolerance)]
+    cheapest = min(near_best, key=lambda r: (r['latency_ms'], r['train_seconds']))
+    print(f"\nCheapest within {tolerance:.0%} of the best MAE: trial {cheapest['trial']} {cheapest['params']}")
+    baseline = next((r for r in complete if r['trial'] == 0), None)
+    if baseline is not None and cheapest is not baseline:
+        print(f"  vs baseline: MAE {cheapest['mae']:.3f} / {baseline['mae']:.3f}, "
+              f"latency {cheapest['latency_ms']:.2f} / {baseline['latency_ms']:.2f}ms, "
+              f"training {cheapest['train_seconds']:.0f} / {baseline['train_seconds']:.0f}s")
+    print(f"\nStudy written to {study['path']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbol', required=True)
+    parser.add_argument('--period', default='2y', help="Data period to fetch")
+    parser.add_argument('--trials', type=int, default=HPO_TRIALS, help="Configurations to try, baseline included")
+    parser.add_argument('--max-epochs', type=int, default=HPO_MAX_EPOCHS)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="TensorFlow/BLAS threads per worker")
+    parser.add_argument('--seed', type=int, default=0, help="Search space sampling seed")
+    parser.add_argument('--no-prune', action='store_true', help="Run every trial to completion")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="MAE slack when picking the cheapest near-best config")
+    parser.add_argument('--synthetic', type=int, metavar='ROWS',
+                        help="Use generated bars instead of Yahoo Finance (offline runs)")
+    args = parser.parse_args()
+    if args.max_epochs < 1:
+        parser.error("--max-epochs must be at least 1")
+
+    preprocessor = None
+    if args.synthetic:
+        from data_preprocessor import StockDataPreprocessor
+        from synthetic_data import SyntheticDownloader
+        # No OHLCV cache, so generated bars never land next to real ones
+        preprocessor = StockDataPreprocessor(use_cache=False)
+        preprocessor._download = SyntheticDownloader(args.synthetic)
+
+    study = run_search(
+        args.symbol, period=args.period, trials=args.trials, workers=args.workers,
+        threads_per_worker=args.threads_per_worker, max_epochs=args.max_epochs,
+        seed=args.seed, prune=not args.no_prune, preprocessor=preprocessor
+    )
+    print_report(study, args.tolerance)
@@ -0,0 +1,445 @@
+"""
+Incremental, constant-time-per-bar technical indicator engine
+"""
+import json
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DATA_DIR, RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+    SMA_SHORT, SMA_LONG, EMA_PERIOD, INDICATOR_HISTORY_SIZE
+)
+
+INDICATOR_STATE_DIR = DATA_DIR / "indicators"
+
+BB_PERIOD = 20
+BB_STD_DEV = 2
+VOLUME_SMA_PERIOD = 20
+
+# Same columns, in the same order, as StockDataPreprocessor.calculate_technical_indicators
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+INDICATOR_COLUMNS = [
+    'rsi', 'macd', 'macd_signal', 'macd_hist',
+    'sma_20', 'sma_50', 'ema_12',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
+    'price_change', 'high_low_ratio', 'close_sma20_ratio',
+    'volume_sma', 'volume_ratio'
+]
+
+
+def _div(numerator, denominator):
+    """Float division with pandas semantics (x/0 -> +-inf, 0/0 -> nan)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+def _mean(window, size):
+    if len(window) < size:
+        return math.nan
+    return math.fsum(window) / size
+
+
+def _std(window, size):
+    # Sample standard deviation (ddof=1), matching pandas rolling().std()
+    if len(window) < size:
+        return math.nan
+    mean = math.fsum(window) / size
+    return math.sqrt(math.fsum((x - mean) ** 2 for x in window) / (size - 1))
+
+
+class _EWM:
+    """Exponential moving average with pandas `ewm(span, adjust=False)` semantics"""
+
+    def __init__(self, span, value=None):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            old_weight = 1.0 - self.alpha
+            self.value = (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha)
+        return self.value
+
+
+class IncrementalIndicators:
+    """
+    Stateful per-symbol technical indicators updated one bar at a time
+
+    Produces the same columns as `calculate_technical_indicators`. Each
+    `update` costs constant time (bounded by the longest indicator window)
+    regardless of how much history has been seen. The last `history_size`
+    output rows are kept so a model input window can be read with `frame()`;
+    NaN warm-up values in that buffer are back/forward filled exactly the way
+    the pandas implementation fills a frame ending at the latest bar.
+    """
+
+    def __init__(self, history_size=INDICATOR_HISTORY_SIZE):
+        self.history_size = history_size
+        self._reset_state()
+        self.dates = deque(maxlen=history_size)
+        self.rows = deque(maxlen=history_size)
+        # Rows per column whose raw value was NaN and still await a back fill
+        self.pending = {col: 0 for col in INDICATOR_COLUMNS}
+        self.last_valid = {col: None for col in INDICATOR_COLUMNS}
+        self._snapshot = None
+
+    def _reset_state(self):
+        self.bars_seen = 0
+        self.last_close = None
+        self.closes = deque(maxlen=max(SMA_LONG, SMA_SHORT, BB_PERIOD))
+        self.volumes = deque(maxlen=VOLUME_SMA_PERIOD)
+        self.gains = deque(maxlen=RSI_PERIOD)
+        self.losses = deque(maxlen=RSI_PERIOD)
+        self.ema_fast = _EWM(MACD_FAST)
+        self.ema_slow = _EWM(MACD_SLOW)
+        self.ema_signal = _EWM(MACD_SIGNAL)
+        self.ema_short = _EWM(EMA_PERIOD)
+
+    @classmethod
+    def from_history(cls, df, history_size=INDICATOR_HISTORY_SIZE):
+        """
+        Initialize from an OHLCV history
+
+        Args:
+            df: DataFrame with date, open, high, low, close, volume columns
+            history_size: Number of output rows to keep
+
+        Returns:
+            IncrementalIndicators positioned after the last bar of df
+        """
+        engine = cls(history_size)
+        for bar in df[['date'] + PRICE_COLUMNS].itertuples(index=False):
+            engine.update(bar._asdict())
+        return engine
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    def last_row(self):
+        """Filled values of the most recent bar"""
+        return dict(self.rows[-1])
+
+    def copy(self):
+        """Independent copy, e.g. for simulating future bars"""
+        return IncrementalIndicators.from_dict(self.to_dict())
+
+    def update(self, bar):
+        """
+        Apply one bar and return its indicator row
+
+        A bar with the same date as the latest one replaces it, so a live
+        feed can push the in-progress bar repeatedly.
+
+        Args:
+            bar: Mapping with date, open, high, low, close, volume
+
+        Returns:
+            Dict with date, OHLCV and indicator values for the bar
+        """
+        date = pd.Timestamp(bar['date'])
+        if self.dates and date == self.dates[-1]:
+            self._undo()
+        elif self.dates and date < self.dates[-1]:
+            raise ValueError(f"Bar {date} is older than the last bar {self.dates[-1]}")
+
+        # Enough to undo this bar if the same date arrives again
+        self._snapshot = {
+            'core': self._core_state(),
+            'evicted': (
+                [self.dates[0].isoformat(), dict(self.rows[0])]
+                if len(self.rows) == self.history_size else None
+            ),
+            'backfilled': [],
+        }
+
+        prices = [float(bar[col]) for col in PRICE_COLUMNS]
+        open_, high, low, close, volume = prices
+        raw = self._step(high, low, close, volume)
+
+        row = dict(zip(PRICE_COLUMNS, prices))
+        self.dates.append(date)
+        self.rows.append(row)
+        self._fill(raw)
+        self.bars_seen += 1
+        return {'date': date, **row}
+
+    def _undo(self):
+        """Revert the latest bar using the snapshot taken before it was applied"""
+        snapshot = self._snapshot
+        self.dates.pop()
+        self.rows.pop()
+        for offset, col, value in snapshot['backfilled']:
+            # Offsets were recorded while the reverted bar was still the newest row
+            self.rows[-(offset - 1)][col] = value
+        if snapshot['evicted'] is not None:
+            date, row = snapshot['evicted']
+            self.dates.appendleft(pd.Timestamp(date))
+            self.rows.appendleft(dict(row))
+        self._restore_core(snapshot['core'])
+
+    def _step(self, high, low, close, volume):
+        if self.last_close is None:
+            # First diff is NaN, which where(delta > 0, 0) turns into 0
+            gain = loss = 0.0
+            price_change = math.nan
+        else:
+            delta = close - self.last_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            price_change = _div(close, self.last_close) - 1.0
+        self.last_close = close
+
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.gains.append(gain)
+        self.losses.append(loss)
+
+        avg_gain = _mean(self.gains, RSI_PERIOD)
+        avg_loss = _mean(self.losses, RSI_PERIOD)
+        rs = _div(avg_gain, avg_loss)
+        rsi = 100 - _div(100, 1 + rs)
+
+        macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        macd_signal = self.ema_signal.update(macd)
+
+        closes = list(self.closes)
+        sma_20 = _mean(closes[-SMA_SHORT:], SMA_SHORT)
+        sma_50 = _mean(closes[-SMA_LONG:], SMA_LONG)
+        ema_12 = self.ema_short.update(close)
+
+        bb_middle = _mean(closes[-BB_PERIOD:], BB_PERIOD)
+        bb_std = _std(closes[-BB_PERIOD:], BB_PERIOD)
+        bb_upper = bb_middle + (bb_std * BB_STD_DEV)
+        bb_lower = bb_middle - (bb_std * BB_STD_DEV)
+
+        volume_sma = _mean(self.volumes, VOLUME_SMA_PERIOD)
+
+        return {
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd - macd_signal,
+            'sma_20': sma_20,
+            'sma_50': sma_50,
+            'ema_12': ema_12,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'bb_width': bb_upper - bb_lower,
+            'price_change': price_change,
+            'high_low_ratio': _div(high, low),
+            'close_sma20_ratio': _div(close, sma_20),
+            'volume_sma': volume_sma,
+            'volume_ratio': _div(volume, volume_sma),
+        }
+
+    def _fill(self, raw):
+        """Apply bfill -> ffill -> fillna(0) to the buffered rows"""
+        newest = self.rows[-1]
+        for col, value in raw.items():
+            if math.isnan(value):
+                # Forward fill from the last valid value, or 0 if there is none
+                newest[col] = self.last_valid[col] if self.last_valid[col] is not None else 0.0
+                self.pending[col] = min(self.pending[col] + 1, len(self.rows))
+                continue
+
+            # Back fill the run of NaN rows that precedes this value
+            for offset in range(2, self.pending[col] + 2):
+                if offset > len(self.rows):
+                    break
+                self._snapshot['backfilled'].append((offset, col, self.rows[-offset][col]))
+                self.rows[-offset][col] = value
+            self.pending[col] = 0
+            self.last_valid[col] = value
+            newest[col] = value
+
+    def frame(self, rows=None):
+        """
+        Buffered rows as a DataFrame shaped like calculate_technical_indicators
+
+        Args:
+            rows: Return only the most recent `rows` bars
+
+        Returns:
+            DataFrame with date, OHLCV and indicator columns
+        """
+        df = pd.DataFrame(list(self.rows), columns=PRICE_COLUMNS + INDICATOR_COLUMNS)
+        df.insert(0, 'date', list(self.dates))
+        if rows is not None:
+            df = df.tail(rows).reset_index(drop=True)
+        return df
+
+    def _core_state(self):
+        """Indicator windows and EMA values (bounded by the longest window)"""
+        return {
+            'bars_seen': self.bars_seen,
+            'last_close': self.last_close,
+            'closes': list(self.closes),
+            'volumes': list(self.volumes),
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'ema': [
+                self.ema_fast.value, self.ema_slow.value,
+                self.ema_signal.value, self.ema_short.value
+            ],
+            'pending': dict(self.pending),
+            'last_valid': dict(self.last_valid),
+        }
+
+    def _restore_core(self, state):
+        self._reset_state()
+        self.bars_seen = state['bars_seen']
+        self.last_close = state['last_close']
+        self.closes.extend(state['closes'])
+        self.volumes.extend(state['volumes'])
+        self.gains.extend(state['gains'])
+        self.losses.extend(state['losses'])
+        (self.ema_fast.value, self.ema_slow.value,
+         self.ema_signal.value, self.ema_short.value) = state['ema']
+        self.pending = dict(state['pending'])
+        self.last_valid = dict(state['last_valid'])
+
+    def to_dict(self):
+        """Serializable state (JSON compatible)"""
+        return {
+            'history_size': self.history_size,
+            'core': self._core_state(),
+            'dates': [d.isoformat() for d in self.dates],
+            'rows': [dict(row) for row in self.rows],
+            'snapshot': self._snapshot,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an engine from `to_dict` output"""
+        engine = cls(data['history_size'])
+        engine._restore_core(data['core'])
+        engine.dates.extend(pd.Timestamp(d) for d in data['dates'])
+        engine.rows.extend(dict(row) for row in data['rows'])
+        engine._snapshot = data['snapshot']
+        return engine
+
+    def save(self, path):
+        """Persist state atomically to a JSON file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class IndicatorStore:
+    """
+    Per-symbol IncrementalIndicators kept in memory and persisted to disk
+
+    `features(symbol, df)` brings a symbol's engine up to date with an OHLCV
+    frame, applying only the bars it has not seen, and returns indicator rows
+    aligned with that frame.
+    """
+
+    def __init__(self, state_dir=INDICATOR_STATE_DIR, history_size=INDICATOR_HISTORY_SIZE):
+        self.state_dir = state_dir
+        self.history_size = history_size
+        self._engines = {}
+        self._lock = threading.Lock()
+        self._symbol_locks = {}
+
+    def _lock_for(self, symbol):
+        # Serializes updates to one symbol's engine across request threads
+        with self._lock:
+            if symbol not in self._symbol_locks:
+                self._symbol_locks[symbol] = threading.Lock()
+            return self._symbol_locks[symbol]
+
+    def _path(self, symbol):
+        return self.state_dir / f"{symbol}.json"
+
+    def get(self, symbol):
+        """Return the engine for a symbol from memory or disk, or None"""
+        with self._lock:
+            engine = self._engines.get(symbol)
+            if engine is None and self._path(symbol).exists():
+                engine = IncrementalIndicators.load(self._path(symbol))
+                self._engines[symbol] = engine
+            return engine
+
+    def fork(self, symbol):
+        """Independent copy of a symbol's engine, or None"""
+        with self._lock_for(symbol):
+            engine = self.get(symbol)
+            return engine.copy() if engine is not None else None
+
+    def features(self, symbol, df, seed=None):
+        """
+        Indicator frame for the bars in df, updated incrementally
+
+        Args:
+            symbol: Resolved stock symbol
+            df: OHLCV DataFrame sorted by date
+            seed: Engine saved with the model at the end of training; used
+                instead of the stored state when it is newer, so indicators
+                continue from the full training history rather than being
+                warmed up on df alone
+
+        Returns:
+            DataFrame like calculate_technical_indicators(df) for the
+            most recent min(len(df), history_size) bars
+        """
+        with self._lock_for(symbol):
+            engine = self.get(symbol)
+            seeded = seed is not None and seed.last_date is not None and (
+                engine is None or engine.last_date is None or engine.last_date < seed.last_date
+            )
+            if seeded:
+                engine = seed.copy()
+            last_date = engine.last_date if engine is not None else None
+
+            if last_date is None or last_date < df['date'].iloc[0] or last_date > df['date'].iloc[-1]:
+                # No usable overlap with the stored state: rebuild from this history
+                engine = IncrementalIndicators.from_history(df, self.history_size)
+                changed = True
+            else:
+                new_bars = df[df['date'] >= last_date]
+                updated = len(new_bars) > 1 or self._bar_changed(engine, new_bars.iloc[0])
+                if updated:
+                    for bar in new_bars[['date'] + PRICE_COLUMNS].itertuples(index=False):
+                        engine.update(bar._asdict())
+                changed = seeded or updated
+
+            if changed:
+                with self._lock:
+                    self._engines[symbol] = engine
+                    self.state_dir.mkdir(parents=True, exist_ok=True)
+                    engine.save(self._path(symbol))
+
+            return engine.frame(rows=min(len(df), self.history_size))
+
+    @staticmethod
+    def _bar_changed(engine, bar):
+        latest = engine.rows[-1]
+        return any(float(bar[col]) != latest[col] for col in PRICE_COLUMNS)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_indicator_store():
+    """Return the process-wide indicator store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = IndicatorStore()
+        return _default_store
@@ -0,0 +1,219 @@
+"""
+Full technical indicator time series per symbol, computed once per change in
+the underlying bars and served as column-oriented JSON or Arrow IPC
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import INDICATOR_SERIES_CACHE_ENTRIES
+from metrics import stage
+from single_flight import SingleFlight
+
+SERIES_FORMATS = ('json', 'arrow')
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Concurrent chart loads for the same bars compute the frame once
+series_flight = SingleFlight('indicator_series')
+
+
+def bars_version(df):
+    """
+    Short fingerprint of a bar frame
+
+    Changes when a bar is added, the history is re-downloaded with a
+    different start, or the live session bar moves.
+    """
+    if df.empty:
+        return 'empty'
+    first, last = df.iloc[0], df.iloc[-1]
+    key = (
+        f"{len(df)}|{first['date']}|{first['close']!r}|{last['date']}|"
+        f"{last['open']!r}|{last['high']!r}|{last['low']!r}|{last['close']!r}|{last['volume']!r}"
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def series_etag(series, columns, start, end, since, fmt):
+    """ETag for one query over a series; stable across processes"""
+    query = f"{series.symbol}|{series.period}|{','.join(columns)}|{start}|{end}|{since}|{fmt}"
+    return f"{series.version}-{hashlib.sha1(query.encode()).hexdigest()[:12]}"
+
+
+class IndicatorSeries:
+    """Computed indicator frame for one symbol and period"""
+
+    def __init__(self, symbol, period, frame, version):
+        self.symbol = symbol
+        self.period = period
+        self.frame = frame
+        self.version = version
+        # Exchange-local ISO dates; sorted, so ranges are binary searches
+        self.dates = frame['date'].dt.strftime('%Y-%m-%d').to_numpy(dtype='U10')
+        self.columns = [col for col in frame.columns if col != 'date']
+
+    def __len__(self):
+        return len(self.frame)
+
+    def select(self, columns=None, start=None, end=None, since=None):
+        """
+        Slice rows by date and pick columns
+
+        Args:
+            columns: Column names (default: every column)
+            start: First ISO date to include
+            end: Last ISO date to include
+            since: Only dates strictly after this ISO date (incremental fetch)
+
+        Returns:
+            Tuple of (dates array, dict of column name to numpy array)
+        """
+        columns = columns or self.columns
+        unknown = [col for col in columns if col not in self.frame.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(self.columns)}")
+
+        lo, hi = 0, len(self.dates)
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(self.dates, start, side='left')))
+        if since is not None:
+            lo = max(lo, int(np.searchsorted(self.dates, since, side='right')))
+        if end is not None:
+            hi = int(np.searchsorted(self.dates, end, side='right'))
+        hi = max(lo, hi)
+
+        return self.dates[lo:hi], {col: self.frame[col].to_numpy()[lo:hi] for col in columns}
+
+
+class IndicatorSeriesCache:
+    """
+    Computed indicator frames keyed by (symbol, period), LRU-evicted
+
+    Callers fetch bars as usual (through the OHLCV cache) and hand them in;
+    indicators are only recomputed when the bars' fingerprint differs from
+    the cached frame's, so repeated chart loads cost a cache read and an
+    encode.
+    """
+
+    def __init__(self, max_entries=INDICATOR_SERIES_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+    def get(self, symbol, period, bars, compute):
+        """
+        Indicator series for bars, computing them on a miss
+
+        Args:
+            symbol: Resolved stock symbol
+            period: Period the bars were fetched for
+            bars: OHLCV DataFrame
+            compute: Callable adding indicator columns to a bar frame, e.g.
+                StockDataPreprocessor.calculate_technical_indicators
+
+        Returns:
+            IndicatorSeries
+        """
+        key = (symbol, period)
+        version = bars_version(bars)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+            self._stats['misses'] += 1
+
+        series, _ = series_flight.do(
+            (symbol, period, version),
+            lambda: IndicatorSeries(symbol, period, compute(bars), version)
+        )
+
+        with self._lock:
+            self._entries[key] = series
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return series
+
+    def invalidate(self, symbol=None):
+        """Drop frames for one resolved symbol, or every frame when None"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == symbol]:
+                    del self._entries[key]
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached frames"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'rows': sum(len(series) for series in self._entries.values()),
+                'max_entries': self.max_entries,
+            }
+
+
+def _json_values(values):
+    # Ratios can be infinite on zero lows/volumes; JSON has no Infinity
+    if values.dtype.kind == 'f' and not np.isfinite(values).all():
+        return [float(v) if np.isfinite(v) else None for v in values]
+    return values.tolist()
+
+
+@stage('series_encode')
+def encode_json(series, dates, values):
+    """Column-oriented JSON body: one array per column, dates once"""
+    return {
+        'symbol': series.symbol,
+        'period': series.period,
+        'version': series.version,
+        'rows': len(dates),
+        'first_date': str(dates[0]) if len(dates) else None,
+        'last_date': str(dates[-1]) if len(dates) else None,
+        'columns': list(values),
+        'dates': dates.tolist(),
+        'values': {col: _json_values(column) for col, column in values.items()},
+    }
+
+
+@stage('series_encode')
+def encode_arrow(series, dates, values):
+    """Arrow IPC stream: a `date` (date32) column plus the selected columns"""
+    import pyarrow as pa
+
+    arrays = [pa.array(dates.astype('datetime64[D]'), type=pa.date32())]
+    arrays += [pa.array(column) for column in values.values()]
+    schema = pa.schema(
+        [pa.field('date', pa.date32())] + [pa.field(col, arr.type) for col, arr in zip(values, arrays[1:])],
+        metadata={'symbol': series.symbol, 'period': series.period, 'version': series.version},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_indicator_series_cache():
+    """Return the process-wide indicator series cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IndicatorSeriesCache()
+        return _default_cache
@@ -0,0 +1,146 @@
+"""
+TFLite serving runtime for models exported by model_export.py
+
+Uses the standalone `tflite_runtime` package when installed, so serving
+processes never import TensorFlow; falls back to the interpreter bundled
+with full TensorFlow otherwise.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import LITE_NUM_THREADS, LITE_SHARED_WEIGHTS
+from predictor import resolve_model_path
+
+# Exported artifacts: point predictions, and the dropout-active variant used
+# for Monte Carlo sampling
+LITE_MODEL_SUFFIX = '_model.tflite'
+LITE_MC_SUFFIX = '_mc.tflite'
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite.python.interpreter import Interpreter
+    return Interpreter
+
+
+def _interpreter_options():
+    if not LITE_SHARED_WEIGHTS:
+        return {}
+    try:
+        from tflite_runtime.interpreter import OpResolverType
+    except ImportError:
+        from tensorflow.lite.python.interpreter import OpResolverType
+    # The default XNNPack delegate repacks every weight tensor into private
+    # memory; the builtin kernels read them in place from the memory-mapped
+    # model file, which forked workers share through the page cache
+    return {'experimental_op_resolver_type': OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES}
+
+
+class _Runner:
+    """One interpreter with a fixed (1, timesteps, features) input"""
+
+    def __init__(self, path, num_threads):
+        self.interpreter = _interpreter_class()(
+            model_path=str(path), num_threads=num_threads, **_interpreter_options()
+        )
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        # Interpreters are not thread-safe
+        self.lock = threading.Lock()
+
+    def __call__(self, x):
+        # The fused LSTM kernel has a static batch size, so rows run one at a time
+        outputs = []
+        with self.lock:
+            for row in x:
+                # The converted LSTM keeps its hidden and cell state in variable
+                # tensors that persist across invokes; each row starts from zero
+                self.interpreter.reset_all_variables()
+                self.interpreter.set_tensor(self.input['index'], row[np.newaxis])
+                self.interpreter.invoke()
+                outputs.append(self.interpreter.get_tensor(self.output['index'])[0])
+        return np.stack(outputs)
+
+
+class LiteModel:
+    """
+    Callable stand-in for a Keras model backed by TFLite interpreters
+
+    `model(x, training=False)` runs the point model; `training=True` runs
+    the dropout-active export, so Monte Carlo sampling works unchanged.
+    Exports whose dropout variant failed its parity check have none;
+    `has_dropout` is then False and callers skip sampling.
+    """
+
+    def __init__(self, path, mc_path=None, num_threads=LITE_NUM_THREADS):
+        self.path = path
+        self.mc_path = mc_path
+        self._point = _Runner(path, num_threads)
+        self._mc = _Runner(mc_path, num_threads) if mc_path else None
+        self.has_dropout = self._mc is not None
+        self.input_shape = (None,) + tuple(int(d) for d in self._point.input['shape'][1:])
+        self.nbytes = os.path.getsize(path) + (os.path.getsize(mc_path) if mc_path else 0)
+
+    def __call__(self, x, training=False):
+        x = np.asarray(x, dtype=np.float32)
+        if training:
+            if self._mc is None:
+                raise ValueError(f"No dropout export next to {self.path}; re-run model_export.py")
+            return self._mc(x)
+        return self._point(x)
+
+
+def resolve_lite_model_path(symbol):
+    """Find the exported .tflite model for a symbol; raises FileNotFoundError"""
+    return resolve_model_path(symbol, suffixes=(LITE_MODEL_SUFFIX,))
+
+
+def load_lite_model(path):
+    """
+    Load an exported model and its dropout variant, if present
+
+    Returns:
+        Tuple of (LiteModel, artifact bytes)
+    """
+    mc_path = str(path)[:-len(LITE_MODEL_SUFFIX)] + LITE_MC_SUFFIX
+    model = LiteModel(path, mc_path if os.path.exists(mc_path) else None)
+    return model, model.nbytes
+
+
+class LiteInference:
+    """
+    Grouped inference over LiteModels, with the same interface as
+    FusedInference.run
+
+    Inputs for the same model are stacked and run in one interpreter pass.
+    """
+
+    def run(self, requests, training=False):
+        """
+        Run a list of (model, input) pairs
+
+        Returns:
+            Tuple of (list of output arrays aligned with requests, number of
+            model calls made)
+        """
+        groups = OrderedDict()
+        for index, (model, x) in enumerate(requests):
+            entry = groups.setdefault(id(model), {'model': model, 'inputs': [], 'indices': []})
+            entry['inputs'].append(np.asarray(x, dtype=np.float32))
+            entry['indices'].append(index)
+
+        outputs = [None] * len(requests)
+        for group in groups.values():
+            result = group['model'](np.concatenate(group['inputs']), training=training)
+            offset = 0
+            for index, x in zip(group['indices'], group['inputs']):
+                outputs[index] = result[offset:offset + len(x)]
+                offset += len(x)
+
+        return outputs, len(groups)
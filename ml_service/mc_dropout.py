@@ -0,0 +1,194 @@
+"""
+Monte Carlo dropout uncertainty from a single tiled forward pass
+"""
+import threading
+import time
+
+import numpy as np
+
+from config import (
+    MC_DROPOUT_SAMPLES, MC_DROPOUT_MIN_SAMPLES, MC_DROPOUT_BUDGET_MS, MC_DROPOUT_INTERVAL,
+    MC_CALIBRATION_WINDOWS
+)
+from forecasting import direct_inference
+
+
+class MCDropout:
+    """
+    Draws K dropout samples per prediction in one batched call
+
+    Each input sequence is repeated K times along the batch axis and the
+    model runs once with `training=True`, so dropout masks differ per row and
+    the spread of the K outputs approximates the predictive distribution.
+    The measured cost per sampled row is tracked; when K rows for every
+    request in a call would exceed the latency budget, K is reduced (never
+    below MC_DROPOUT_MIN_SAMPLES). Per-row cost includes the fixed call
+    overhead, so the estimate errs on the side of fewer samples.
+    """
+
+    def __init__(self, samples=MC_DROPOUT_SAMPLES, min_samples=MC_DROPOUT_MIN_SAMPLES,
+                 budget_ms=MC_DROPOUT_BUDGET_MS, interval=MC_DROPOUT_INTERVAL):
+        self.samples = samples
+        self.min_samples = min(min_samples, samples)
+        self.budget_ms = budget_ms
+        self.interval = interval
+        self._row_ms = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.samples > 0
+
+    def sample_count(self, n_requests=1):
+        """Samples per request that fit in the latency budget"""
+        with self._lock:
+            row_ms = self._row_ms
+        if not self.budget_ms or row_ms is None:
+            return self.samples
+        affordable = int(self.budget_ms / (row_ms * max(1, n_requests)))
+        # Step in multiples of the floor so traced graphs see few batch shapes
+        if self.min_samples:
+            affordable -= affordable % self.min_samples
+        return max(self.min_samples, min(self.samples, affordable))
+
+    def run(self, requests, infer=direct_inference):
+        """
+        Sample every (model, sequence) pair in one tiled call per model
+
+        Args:
+            requests: List of (Keras model, array of shape (1, timesteps, features))
+            infer: Callable taking ([(model, input)], training=True) and
+                returning (outputs, calls), e.g. FusedInference.run
+
+        Returns:
+            Tuple of (list of scaled sample arrays of shape (K,) aligned
+            with requests, None for models without dropout, number of model
+            calls)
+        """
+        # TFLite exports without a dropout variant (LiteModel.has_dropout)
+        # get no samples, so their confidence falls back to volatility
+        sampled = [index for index, (model, _) in enumerate(requests) if getattr(model, 'has_dropout', True)]
+        if not self.enabled or not sampled:
+            return [None] * len(requests), 0
+
+        samples = self.sample_count(len(sampled))
+        tiled = [(requests[index][0], np.repeat(requests[index][1], samples, axis=0)) for index in sampled]
+
+        start = time.perf_counter()
+        outputs, calls = infer(tiled, training=True)
+        row_ms = (time.perf_counter() - start) * 1000 / (samples * len(sampled))
+
+        with self._lock:
+            # Adopt faster measurements immediately; smooth and cap slower
+            # ones so a call that paid for graph tracing does not starve K
+            if self._row_ms is None or row_ms < self._row_ms:
+                self._row_ms = row_ms
+            else:
+                self._row_ms = 0.8 * self._row_ms + 0.2 * min(row_ms, 2 * self._row_ms)
+
+        results = [None] * len(requests)
+        for index, output in zip(sampled, outputs):
+            results[index] = np.asarray(output).reshape(-1)
+        return results, calls
+
+    def summarize(self, samples_scaled, close_scaler, current_price, predicted_price=None,
+                  calibration=None):
+        """
+        Prediction interval and confidence from scaled dropout samples
+
+        With a calibration fitted at training time (`fit_calibration`, saved
+        as `mc_calibration` in the model metadata) the interval is the point
+        prediction plus or minus the sample half-width times its
+        `interval_scale`, which covered the actual price in `interval` of
+        the held-out windows. Without one it is the raw sample quantiles.
+        Confidence is 100 minus the interval half-width as a percentage of
+        the current price, so an interval of +/-1% of the price scores 99.
+
+        Returns:
+            Dict with 'confidence', 'prediction_interval' and 'uncertainty'
+        """
+        prices = close_scaler.inverse_transform(samples_scaled.reshape(-1, 1)).reshape(-1)
+        lower, upper = _interval(prices, self.interval)
+        calibrated = (
+            calibration is not None and predicted_price is not None
+            and calibration.get('interval') == self.interval
+        )
+        if calibrated:
+            half_width = (upper - lower) / 2 * calibration['interval_scale']
+            lower, upper = predicted_price - half_width, predicted_price + half_width
+        half_width_pct = (upper - lower) / 2 / current_price * 100
+
+        return {
+            'confidence': float(max(0, min(100, 100 - half_width_pct))),
+            'prediction_interval': {
+                'level': self.interval,
+                'lower': float(lower),
+                'upper': float(upper),
+                'calibrated': calibrated
+            },
+            'uncertainty': {
+                'method': 'mc_dropout',
+                'samples': int(len(prices)),
+                'mean': float(prices.mean()),
+                'std': float(prices.std(ddof=1)) if len(prices) > 1 else 0.0,
+                'interval_scale': float(calibration['interval_scale']) if calibrated else None
+            }
+        }
+
+
+def _interval(values, level, axis=None):
+    tail = (1 - level) / 2
+    return np.quantile(values, [tail, 1 - tail], axis=axis)
+
+
+def fit_calibration(model, X, y, predictions, interval=MC_DROPOUT_INTERVAL, samples=MC_DROPOUT_SAMPLES,
+                    max_windows=MC_CALIBRATION_WINDOWS, chunk_rows=8192):
+    """
+    Fit the width of the dropout interval to held-out windows
+
+    Each of the most recent `max_windows` windows is sampled `samples`
+    times with dropout active (tiled, `chunk_rows` rows per call). The
+    scale is the `interval` quantile of |actual - point prediction| over
+    the raw sample half-width, so point +/- scale x half-width contains the
+    actual target in `interval` of the windows. Targets and predictions are
+    in scaled close units; the scalers are linear, so the scale carries
+    over to prices. `holdout_coverage` is the coverage on the newer half of
+    the windows of a scale fitted on the older half.
+
+    Args:
+        model: Keras model
+        X: Held-out input windows (e.g. SlidingWindowDataset.X)
+        y: Scaled targets aligned with X
+        predictions: Scaled point predictions (training=False) aligned with X
+
+    Returns:
+        Dict saved as `mc_calibration` in the model metadata, or None when
+        sampling is disabled or there are too few windows
+    """
+    windows = min(len(X), max_windows)
+    if samples < 2 or windows < 20:
+        return None
+    X = np.ascontiguousarray(X[-windows:], dtype=np.float32)
+    y = np.asarray(y, dtype=np.float64)[-windows:].reshape(-1)
+    predictions = np.asarray(predictions, dtype=np.float64)[-windows:].reshape(-1)
+
+    tiled = np.repeat(X, samples, axis=0)
+    outputs = np.concatenate([
+        np.asarray(model(tiled[start:start + chunk_rows], training=True)).reshape(-1)
+        for start in range(0, len(tiled), chunk_rows)
+    ]).reshape(windows, samples)
+
+    lower, upper = _interval(outputs, interval, axis=1)
+    half_width = np.maximum((upper - lower) / 2, 1e-12)
+    needed = np.abs(y - predictions) / half_width
+    # Out-of-sample check: a scale fitted on the older half, scored on the newer half
+    half = windows // 2
+    check_scale = np.quantile(needed[:half], interval)
+    return {
+        'interval': interval,
+        'interval_scale': float(np.quantile(needed, interval)),
+        'raw_coverage': float(np.mean(needed <= 1)),
+        'holdout_coverage': float(np.mean(needed[half:] <= check_scale)),
+        'windows': int(windows),
+        'samples': int(samples),
+    }
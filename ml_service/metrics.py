@@ -0,0 +1,275 @@
+"""
+Process-local metrics with Prometheus text exposition, and per-request
+stage timing
+
+Hot paths wrap their work in `stage('name')`, which feeds the
+`ml_stage_duration_seconds` histogram and, when the current request asked
+for it, the request's timing breakdown. Counters and gauges that other
+components already keep (cache and registry statistics) are read at scrape
+time through collectors instead of being counted twice.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: str(item[0]))
+            lines.extend(self._samples(key, value) for key, value in items)
+        return '\n'.join(line for line in lines if line)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, key, value):
+        return f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self, key, value):
+        return f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def _samples(self, key, entry):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, entry['counts']):
+            cumulative += count
+            labels = _format_labels(key + (('le', _format_value(float(bound))),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(key)} {entry['sum']}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {entry['count']}")
+        return '\n'.join(lines)
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """
+        Register a callable returning (name, kind, documentation,
+        [(labels dict, value), ...]) tuples, evaluated on every scrape
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        blocks = [metric.render() for metric in metrics]
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                blocks.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                lines.extend(
+                    f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}"
+                    for labels, value in samples
+                )
+                blocks.append('\n'.join(lines))
+        return '\n'.join(blocks) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'ml_stage_duration_seconds', 'Time spent in each pipeline stage', ('stage',)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    'ml_stage_errors_total', 'Pipeline stages that raised an exception', ('stage',)
+)
+
+# Stage timings of the current request, when it asked for a breakdown
+_current_trace = contextvars.ContextVar('ml_request_trace', default=None)
+
+
+class RequestTrace:
+    """
+    Ordered (stage, milliseconds) records for one request
+
+    A trace started inside another one also forwards its records to the
+    outer trace, so both see every stage.
+    """
+
+    def __init__(self, parent=None):
+        self.start = time.perf_counter()
+        self.stages = []
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.stages.append((name, seconds))
+        if self.parent is not None:
+            self.parent.record(name, seconds)
+
+    def breakdown(self):
+        """Per-stage list in completion order, plus the request total"""
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            'stages': [{'stage': name, 'ms': round(seconds * 1000, 3)} for name, seconds in stages],
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 3),
+        }
+
+    def server_timing(self):
+        """Server-Timing header value, stages in completion order"""
+        with self._lock:
+            stages = list(self.stages)
+        return ', '.join(
+            f"{name.replace('.', '_')};dur={seconds * 1000:.2f}" for name, seconds in stages
+        )
+
+
+def start_trace(nested=False):
+    """
+    Begin collecting stage timings for the current request
+
+    With `nested`, an already active trace keeps receiving the stages too.
+    """
+    trace = RequestTrace(_current_trace.get() if nested else None)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block (or, as a decorator, a function) as pipeline stage `name`
+
+    Exceptions are counted in ml_stage_errors_total and re-raised.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(name, seconds)
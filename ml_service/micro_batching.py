@@ -0,0 +1,149 @@
+"""
+Cross-request micro-batching: pending inference requests from concurrent
+callers are merged into one grouped call
+"""
+import threading
+import time
+from collections import deque
+
+from config import MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_BATCH
+
+
+class _Pending:
+    def __init__(self, requests, training):
+        self.requests = requests
+        self.training = training
+        self.rows = sum(len(x) for _, x in requests)
+        self.done = threading.Event()
+        self.outputs = None
+        self.calls = 0
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collects (model, input) requests across threads and runs them together
+
+    A single scheduler thread takes the oldest pending request, then keeps
+    collecting requests in the same mode (inference or dropout sampling)
+    until `max_wait_ms` has passed since that request arrived or `max_batch`
+    rows are queued. The batch goes through `inference.run`, which stacks
+    inputs per model and fuses models that share an input shape, and each
+    caller receives its own slice of the outputs.
+
+    `run` has the same signature as FusedInference.run, so it can be passed
+    wherever an `infer` callable is accepted.
+    """
+
+    def __init__(self, inference, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+                 max_batch=MICRO_BATCH_MAX_BATCH):
+        self.inference = inference
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'rows': 0,
+            'calls': 0,
+            'max_batch_requests': 0,
+            'errors': 0,
+        }
+
+    def run(self, requests, training=False):
+        """
+        Queue requests and wait for the batch that includes them
+
+        Returns:
+            Tuple of (list of output arrays aligned with requests, number of
+            model calls made by the batch these requests joined)
+        """
+        if not requests:
+            return [], 0
+
+        pending = _Pending(requests, training)
+        with self._cond:
+            self._ensure_started()
+            self._queue.append((time.perf_counter(), pending))
+            self._cond.notify()
+
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.outputs, pending.calls
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+            self._thread.start()
+
+    def _collect(self):
+        """Block until a batch is ready; returns (training, [pending])"""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            arrived, first = self._queue.popleft()
+            batch = [first]
+            rows = first.rows
+            deadline = arrived + self.max_wait
+
+            while rows < self.max_batch:
+                # Take queued requests in the same mode that still fit
+                taken = False
+                for item in list(self._queue):
+                    pending = item[1]
+                    if pending.training == first.training and rows + pending.rows <= self.max_batch:
+                        self._queue.remove(item)
+                        batch.append(pending)
+                        rows += pending.rows
+                        taken = True
+                if rows >= self.max_batch:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                if not taken:
+                    self._cond.wait(remaining)
+
+            return first.training, batch
+
+    def _loop(self):
+        while True:
+            training, batch = self._collect()
+            flat = [request for pending in batch for request in pending.requests]
+            try:
+                outputs, calls = self.inference.run(flat, training=training)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                with self._cond:
+                    self._stats['errors'] += 1
+                continue
+
+            offset = 0
+            for pending in batch:
+                pending.outputs = outputs[offset:offset + len(pending.requests)]
+                pending.calls = calls
+                offset += len(pending.requests)
+                pending.done.set()
+
+            with self._cond:
+                self._stats['requests'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['rows'] += sum(pending.rows for pending in batch)
+                self._stats['calls'] += calls
+                self._stats['max_batch_requests'] = max(self._stats['max_batch_requests'], len(batch))
+
+    def stats(self):
+        """Return batch size counters and the scheduler settings"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._queue)
+        stats['avg_batch_requests'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['max_wait_ms'] = self.max_wait * 1000
+        stats['max_batch'] = self.max_batch
+        return stats
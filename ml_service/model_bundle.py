@@ -0,0 +1,132 @@
+"""
+Per-symbol inference bundle: model, fitted scalers, feature order and
+indicator warm-up state, written together at training time and loaded once
+"""
+import json
+import os
+
+from config import MODELS_DIR
+
+# Files saved next to `{symbol}_model.h5` by LSTMModelTrainer.save_model
+BUNDLE_SUFFIXES = {
+    'scaler': '_scaler.pkl',
+    'feature_scaler': '_feature_scaler.pkl',
+    'metadata': '_meta.json',
+    'indicators': '_indicators.json',
+}
+
+
+def bundle_paths(symbol, models_dir=MODELS_DIR):
+    """Paths of a symbol's bundle files, keyed like BUNDLE_SUFFIXES"""
+    return {name: models_dir / f"{symbol}{suffix}" for name, suffix in BUNDLE_SUFFIXES.items()}
+
+
+def _fitted(scaler):
+    # Scalers saved by older versions may never have been fitted
+    return scaler is not None and hasattr(scaler, 'scale_')
+
+
+class ModelBundle:
+    """
+    Everything needed to turn fresh bars into a prediction for one symbol
+
+    With fitted scalers, inference is a transform with the training
+    distribution plus a forward pass. Models trained before scalers and
+    metadata were saved have `fitted == False`; the predictor then falls
+    back to fitting scalers on the request window.
+    """
+
+    def __init__(self, symbol, model, close_scaler=None, feature_scaler=None,
+                 feature_columns=None, indicators=None, metadata=None):
+        self.symbol = symbol
+        self.model = model
+        self.close_scaler = close_scaler
+        self.feature_scaler = feature_scaler
+        self.feature_columns = feature_columns
+        self.indicators = indicators
+        self.metadata = metadata or {}
+
+    @property
+    def fitted(self):
+        return (
+            _fitted(self.close_scaler) and _fitted(self.feature_scaler)
+            and self.feature_columns is not None
+        )
+
+    @classmethod
+    def load(cls, symbol, model, models_dir=MODELS_DIR):
+        """
+        Load the scalers, metadata and indicator state saved with a model
+
+        Missing or unfitted files leave the bundle unfitted rather than
+        failing, so older models keep serving.
+
+        Args:
+            symbol: Resolved stock symbol
+            model: The already loaded inference model (Keras or LiteModel)
+            models_dir: Directory holding the bundle files
+
+        Returns:
+            ModelBundle
+        """
+        import joblib
+        from incremental_indicators import IncrementalIndicators
+
+        paths = bundle_paths(symbol, models_dir)
+
+        metadata = {}
+        if os.path.exists(paths['metadata']):
+            with open(paths['metadata']) as f:
+                metadata = json.load(f)
+
+        close_scaler = feature_scaler = None
+        if os.path.exists(paths['scaler']) and os.path.exists(paths['feature_scaler']):
+            close_scaler = joblib.load(paths['scaler'])
+            feature_scaler = joblib.load(paths['feature_scaler'])
+
+        indicators = None
+        if os.path.exists(paths['indicators']):
+            indicators = IncrementalIndicators.load(paths['indicators'])
+
+        bundle = cls(
+            symbol, model, close_scaler, feature_scaler,
+            metadata.get('feature_columns'), indicators, metadata
+        )
+        if not bundle.fitted:
+            print(f"⚠️  No fitted scalers saved for {symbol}; scalers will be fitted per request "
+                  f"until the model is retrained")
+        return bundle
+
+    def stats(self):
+        """Summary for the model registry statistics"""
+        return {
+            'fitted': self.fitted,
+            'feature_columns': len(self.feature_columns) if self.feature_columns else None,
+            'indicator_state_date': (
+                self.indicators.last_date.isoformat()
+                if self.indicators is not None and self.indicators.last_date is not None else None
+            ),
+            'trained_at': self.metadata.get('trained_at'),
+        }
+
+
+def save_bundle(symbol, close_scaler, feature_scaler, metadata=None, indicators=None,
+                models_dir=MODELS_DIR):
+    """
+    Write the non-model bundle files
+
+    Called before the model file is saved: the model registry reloads when
+    the model file changes, so it must never see a new model next to old
+    scalers.
+    """
+    import joblib
+
+    models_dir.mkdir(parents=True, exist_ok=True)
+    paths = bundle_paths(symbol, models_dir)
+    joblib.dump(close_scaler, paths['scaler'])
+    joblib.dump(feature_scaler, paths['feature_scaler'])
+    if metadata is not None:
+        with open(paths['metadata'], 'w') as f:
+            json.dump(metadata, f, indent=2)
+    if indicators is not None:
+        indicators.save(paths['indicators'])
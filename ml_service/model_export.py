@@ -0,0 +1,200 @@
+"""
+Export trained Keras models to TFLite for the lightweight serving backend
+
+Each `{symbol}_model.h5` becomes `{symbol}_model.tflite` (point predictions)
+and `{symbol}_mc.tflite` (dropout kept active for Monte Carlo sampling),
+next to the model's scalers. An export is only kept if the TFLite outputs
+match Keras within EXPORT_PARITY_TOLERANCE.
+
+Usage:
+    python model_export.py                      # every trained model
+    python model_export.py --symbols TCS.NS INFY.NS
+    python model_export.py --check              # re-check existing exports
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import MODELS_DIR, EXPORT_PARITY_TOLERANCE, EXPORT_PARITY_SAMPLES
+from lite_runtime import LITE_MODEL_SUFFIX, LITE_MC_SUFFIX, LiteModel
+from predictor import resolve_model_path
+
+
+def _convert(model, training):
+    import tensorflow as tf
+
+    # Keras LSTMs only lower to the fused TFLite kernel with a static batch
+    # size, so the graph is traced for a single row
+    spec = tf.TensorSpec((1,) + tuple(model.input_shape[1:]), tf.float32)
+
+    @tf.function(input_signature=[spec])
+    def serve(x):
+        return model(x, training=training)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [serve.get_concrete_function()], model
+    )
+    return converter.convert()
+
+
+def check_parity(model, lite_model, samples=EXPORT_PARITY_SAMPLES, seed=0):
+    """
+    Compare a Keras model with its TFLite export
+
+    Point outputs must agree within EXPORT_PARITY_TOLERANCE. Dropout
+    outputs are random, so their sample means are compared instead, allowing
+    five standard errors.
+
+    Returns:
+        Dict with 'max_abs_error', 'passed' and, when a dropout export is
+        loaded, 'mc_mean_diff' and 'mc_passed'
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.random((samples,) + tuple(model.input_shape[1:]), dtype=np.float32)
+
+    expected = np.asarray(model(x, training=False))
+    actual = lite_model(x, training=False)
+    max_abs_error = float(np.abs(expected - actual).max())
+    report = {
+        'samples': samples,
+        'max_abs_error': max_abs_error,
+        'passed': max_abs_error <= EXPORT_PARITY_TOLERANCE,
+    }
+
+    if lite_model.mc_path:
+        tiled = np.repeat(x[:1], 256, axis=0)
+        keras_samples = np.asarray(model(tiled, training=True)).reshape(-1)
+        lite_samples = lite_model(tiled, training=True).reshape(-1)
+        diff = abs(float(keras_samples.mean() - lite_samples.mean()))
+        stderr = np.sqrt(keras_samples.var() / len(keras_samples) + lite_samples.var() / len(lite_samples))
+        report['mc_mean_diff'] = diff
+        report['mc_passed'] = bool(lite_samples.std() > 0 and diff <= 5 * stderr + EXPORT_PARITY_TOLERANCE)
+
+    return report
+
+
+def export_model(symbol):
+    """
+    Convert one trained model and verify the result
+
+    Args:
+        symbol: Stock symbol, with or without exchange suffix
+
+    Returns:
+        Export report (paths, sizes, parity)
+
+    Raises:
+        FileNotFoundError: If no trained model exists
+        ValueError: If the point export does not match Keras
+    """
+    from tensorflow.keras.models import load_model
+
+    resolved, h5_path = resolve_model_path(symbol)
+    start = time.perf_counter()
+    model = load_model(str(h5_path), compile=False)
+
+    lite_path = h5_path.parent / f"{resolved}{LITE_MODEL_SUFFIX}"
+    mc_path = h5_path.parent / f"{resolved}{LITE_MC_SUFFIX}"
+    tmp_lite = f"{lite_path}.tmp"
+    tmp_mc = f"{mc_path}.tmp"
+    for path, training in ((tmp_lite, False), (tmp_mc, True)):
+        with open(path, 'wb') as f:
+            f.write(_convert(model, training))
+
+    try:
+        parity = check_parity(model, LiteModel(tmp_lite, tmp_mc))
+        if not parity['passed']:
+            raise ValueError(
+                f"TFLite export of {resolved} differs from Keras by {parity['max_abs_error']:.2e}"
+            )
+        os.replace(tmp_lite, lite_path)
+        if parity['mc_passed']:
+            os.replace(tmp_mc, mc_path)
+        else:
+            # A dropout export left by an earlier run has other weights
+            if os.path.exists(mc_path):
+                os.remove(mc_path)
+            print(f"⚠️  Dropout export of {resolved} failed its parity check; confidence will fall back")
+    finally:
+        for path in (tmp_lite, tmp_mc):
+            if os.path.exists(path):
+                os.remove(path)
+
+    report = {
+        'symbol': resolved,
+        'source': str(h5_path),
+        'path': str(lite_path),
+        'mc_path': str(mc_path) if parity['mc_passed'] else None,
+        'h5_bytes': os.path.getsize(h5_path),
+        'tflite_bytes': os.path.getsize(lite_path),
+        'exported_at': time.time(),
+        'export_seconds': round(time.perf_counter() - start, 2),
+        'parity': parity,
+    }
+    _record(resolved, report)
+    return report
+
+
+def _record(symbol, report):
+    """Add the export report to the model's metadata, if it has any"""
+    metadata_path = MODELS_DIR / f"{symbol}_meta.json"
+    if not metadata_path.exists():
+        return
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    metadata.setdefault('exports', {})['tflite'] = report
+    tmp_path = f"{metadata_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, metadata_path)
+
+
+def check_export(symbol):
+    """Re-run the parity check against an existing export"""
+    from tensorflow.keras.models import load_model
+
+    resolved, h5_path = resolve_model_path(symbol)
+    _, lite_path = resolve_model_path(resolved, suffixes=(LITE_MODEL_SUFFIX,))
+    mc_path = MODELS_DIR / f"{resolved}{LITE_MC_SUFFIX}"
+    lite_model = LiteModel(lite_path, mc_path if mc_path.exists() else None)
+    return {'symbol': resolved, **check_parity(load_model(str(h5_path), compile=False), lite_model)}
+
+
+def trained_symbols():
+    """Symbols with a final saved Keras model"""
+    return sorted(path.name[:-len('_model.h5')] for path in MODELS_DIR.glob('*_model.h5'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export trained models to TFLite")
+    parser.add_argument('--symbols', nargs='+', help="Symbols to export (default: every trained model)")
+    parser.add_argument('--check', action='store_true', help="Only check existing exports against Keras")
+    args = parser.parse_args()
+
+    failed = []
+    for symbol in args.symbols or trained_symbols():
+        try:
+            if args.check:
+                report = check_export(symbol)
+                status = '✅' if report['passed'] and report.get('mc_passed', True) else '❌'
+                print(f"{status} {report['symbol']}: max abs error {report['max_abs_error']:.2e}")
+                if status == '❌':
+                    failed.append(symbol)
+            else:
+                report = export_model(symbol)
+                print(f"✅ Exported {report['symbol']}: {report['h5_bytes'] / 1e6:.2f}MB h5 -> "
+                      f"{report['tflite_bytes'] / 1e6:.2f}MB tflite, "
+                      f"max abs error {report['parity']['max_abs_error']:.2e}")
+        except Exception as e:
+            failed.append(symbol)
+            print(f"❌ {symbol}: {str(e)}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+In-process LRU registry of loaded inference model bundles
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import MODEL_REGISTRY_MAX_MODELS, MODEL_REGISTRY_MEMORY_MB
+from metrics import stage
+from model_bundle import ModelBundle
+from predictor import resolve_model_path
+
+
+def load_keras_model(path):
+    """
+    Load a Keras model for inference
+
+    Returns:
+        Tuple of (model, weight bytes)
+    """
+    # Imported here so registries for other backends never load TensorFlow
+    from tensorflow.keras.models import load_model
+
+    # Load for inference only, matching LSTMModelTrainer.load_model
+    model = load_model(str(path), compile=False)
+
+    # Run one forward pass so graph construction happens at load time
+    # rather than on the first request
+    input_shape = (1,) + tuple(model.input_shape[1:])
+    model.predict(np.zeros(input_shape, dtype=np.float32), verbose=0)
+
+    return model, int(sum(w.nbytes for w in model.get_weights()))
+
+
+class _RegistryEntry:
+    """A loaded bundle together with its model file identity and usage counters"""
+
+    def __init__(self, symbol, path, mtime, bundle, nbytes, load_seconds):
+        self.symbol = symbol
+        self.path = path
+        self.mtime = mtime
+        self.bundle = bundle
+        self.nbytes = nbytes
+        self.load_seconds = load_seconds
+        self.hits = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+
+class ModelRegistry:
+    """
+    Keeps inference-ready model bundles (model, fitted scalers, feature
+    order, indicator state) in memory, keyed by resolved symbol
+
+    Lookups resolve the requested symbol the same way as
+    `LSTMModelTrainer.load_model` (exact symbol, then .NS/.BO), so 'RELIANCE'
+    and 'RELIANCE.NS' share one entry. A model is reloaded when its file
+    mtime changes (e.g. after retraining), and least recently used models are
+    evicted once either `max_models` or `memory_budget_mb` is exceeded. The
+    bundle files are written before the model file, so a changed mtime always
+    means the whole bundle is current.
+
+    `resolver` and `loader` select the model format: by default Keras .h5
+    files; lite_runtime provides the TFLite equivalents. Callables added
+    with `on_evict` are called with each model the registry lets go of
+    (evicted, reloaded or invalidated), so caches holding it can drop it.
+    """
+
+    def __init__(self, max_models=MODEL_REGISTRY_MAX_MODELS,
+                 memory_budget_mb=MODEL_REGISTRY_MEMORY_MB,
+                 resolver=resolve_model_path, loader=load_keras_model):
+        self.resolver = resolver
+        self.loader = loader
+        self.max_models = max_models
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._evict_callbacks = []
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'reloads': 0,
+            'evictions': 0,
+        }
+
+    def get(self, symbol):
+        """
+        Return the model bundle for a symbol, loading it on first use
+
+        Args:
+            symbol: Stock symbol, with or without exchange suffix
+
+        Returns:
+            Tuple of (resolved symbol, model_bundle.ModelBundle)
+
+        Raises:
+            FileNotFoundError: If no trained model exists for the symbol
+        """
+        resolved, path = self.resolver(symbol)
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            entry = self._entries.get(resolved)
+            if entry is not None and entry.path == path and entry.mtime == mtime:
+                self._entries.move_to_end(resolved)
+                entry.hits += 1
+                entry.last_used = time.time()
+                self._stats['hits'] += 1
+                return resolved, entry.bundle
+
+            if entry is not None:
+                self._stats['reloads'] += 1
+                del self._entries[resolved]
+                self._released(entry)
+            else:
+                self._stats['misses'] += 1
+
+            entry = self._load(resolved, path, mtime)
+            self._entries[resolved] = entry
+            self._evict()
+            return resolved, entry.bundle
+
+    def _load(self, symbol, path, mtime):
+        start = time.perf_counter()
+        with stage('model_load'):
+            model, nbytes = self.loader(path)
+            bundle = ModelBundle.load(symbol, model, path.parent)
+        load_seconds = time.perf_counter() - start
+        print(f"Model registry loaded {symbol} from {path} in {load_seconds:.2f}s")
+        return _RegistryEntry(symbol, path, mtime, bundle, nbytes, load_seconds)
+
+    def _evict(self):
+        # Never evict the entry that was just inserted
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or self._total_bytes() > self.memory_budget_bytes
+        ):
+            symbol, entry = self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+            self._released(entry)
+            print(f"Model registry evicted {symbol}")
+
+    def on_evict(self, callback):
+        """Call `callback(model)` whenever a loaded model is dropped"""
+        self._evict_callbacks.append(callback)
+
+    def _released(self, entry):
+        for callback in self._evict_callbacks:
+            callback(entry.bundle.model)
+
+    def _total_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def resolve(self, symbol):
+        """Resolved symbol and model file path, without loading; raises FileNotFoundError"""
+        return self.resolver(symbol)
+
+    def preload(self, symbols):
+        """Load several models up front; returns symbols that failed to load"""
+        failed = []
+        for symbol in symbols:
+            try:
+                self.get(symbol)
+            except FileNotFoundError:
+                failed.append(symbol)
+        return failed
+
+    def invalidate(self, symbol=None):
+        """Drop one resolved symbol, or every loaded model when None"""
+        with self._lock:
+            if symbol is None:
+                entries = list(self._entries.values())
+                self._entries.clear()
+            else:
+                entry = self._entries.pop(symbol, None)
+                entries = [entry] if entry is not None else []
+            for entry in entries:
+                self._released(entry)
+
+    def stats(self):
+        """Return hit rates and per-model memory usage"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses'] + self._stats['reloads']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'loaded_models': len(self._entries),
+                'max_models': self.max_models,
+                'memory_bytes': self._total_bytes(),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'models': [
+                    {
+                        'symbol': entry.symbol,
+                        'path': str(entry.path),
+                        'memory_bytes': entry.nbytes,
+                        'hits': entry.hits,
+                        'load_seconds': round(entry.load_seconds, 4),
+                        'loaded_at': entry.loaded_at,
+                        'last_used': entry.last_used,
+                        **entry.bundle.stats(),
+                    }
+                    for entry in self._entries.values()
+                ],
+            }
@@ -7,48 +7,85 @@ from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
+from tensorflow.keras.utils import Sequence
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
 import os
 from datetime import datetime
 from config import (
     SEQUENCE_LENGTH, PREDICTION_DAYS, TRAIN_TEST_SPLIT,
     LSTM_UNITS, DROPOUT_RATE, EPOCHS, BATCH_SIZE, LEARNING_RATE,
-    MODELS_DIR, MODEL_VERSION
+    WARM_START_EPOCHS, WARM_START_LEARNING_RATE, WARM_START_TOLERANCE,
+    MODELS_DIR, MODEL_VERSION, INDICATOR_HISTORY_SIZE, MC_CALIBRATION_WINDOWS
 )
-from data_preprocessor import StockDataPreprocessor
+from data_preprocessor import StockDataPreprocessor, FEATURE_COLUMNS
+from incremental_indicators import IncrementalIndicators
+from model_bundle import ModelBundle, save_bundle
+from metrics import stage
+from sequence_windows import SlidingWindowDataset
+from training_telemetry import TrainingRun, get_telemetry_store
+from forecasting import direct_inference
+from mc_dropout import fit_calibration
+from predictor import Predictor, resolve_model_path
+
+
+class WindowBatchSequence(Sequence):
+    """Keras data source that copies one batch of windows at a time"""
+    
+    def __init__(self, dataset, batch_size, shuffle=False):
+        super().__init__()
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.order = np.arange(len(dataset))
+        self.on_epoch_end()
+    
+    def __len__(self):
+        return int(np.ceil(len(self.dataset) / self.batch_size))
+    
+    def __getitem__(self, index):
+        indices = self.order[index * self.batch_size:(index + 1) * self.batch_size]
+        return self.dataset.batch(indices)
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.order)
+
 
 class LSTMModelTrainer:
     """Handles LSTM model training, evaluation, and saving"""
     
-    def __init__(self):
+    def __init__(self, verbose=1):
         self.preprocessor = StockDataPreprocessor()
+        self.verbose = verbose  # Keras verbosity for fit/callbacks
+        self.predictor = Predictor(self.preprocessor)
         self.model = None
         self.history = None
         
-    def build_model(self, input_shape):
+    def build_model(self, input_shape, units=LSTM_UNITS, layers=3, dropout_rate=DROPOUT_RATE,
+                    learning_rate=LEARNING_RATE):
         """
         Build LSTM model architecture
         
         Args:
             input_shape: Shape of input data (sequence_length, features)
+            units: Units per LSTM layer
+            layers: Number of stacked LSTM layers
+            dropout_rate: Dropout after each LSTM layer
+            learning_rate: Adam learning rate
         
         Returns:
             Compiled Keras model
         """
-        model = Sequential([
-            Input(shape=input_shape),
-            LSTM(units=LSTM_UNITS, return_sequences=True),
-            Dropout(DROPOUT_RATE),
-            LSTM(units=LSTM_UNITS, return_sequences=True),
-            Dropout(DROPOUT_RATE),
-            LSTM(units=LSTM_UNITS),
-            Dropout(DROPOUT_RATE),
+        stack = [Input(shape=input_shape)]
+        for index in range(layers):
+            stack.append(LSTM(units=units, return_sequences=index < layers - 1))
+            stack.append(Dropout(dropout_rate))
+        model = Sequential(stack + [
             Dense(units=25, activation='relu'),
             Dense(units=1)
         ])
         
-        optimizer = Adam(learning_rate=LEARNING_RATE)
+        optimizer = Adam(learning_rate=learning_rate)
         model.compile(optimizer=optimizer, loss='mse', metrics=['mae'])
         
         return model
@@ -60,82 +97,246 @@ class LSTMModelTrainer:
         Args:
             symbol: Stock symbol
             period: Data period for training
-            retrain: Whether to retrain existing model
+            retrain: Fine-tune the existing model on bars added since its
+                last training run, falling back to full training when that
+                is not possible or validation error worsens
         
         Returns:
             Training history and evaluation metrics
         """
+        # Every run, including failed ones, leaves a record in the
+        # training telemetry store
+        with TrainingRun(symbol, period, retrain, store=get_telemetry_store()) as run:
+            run.set_config(**self._telemetry_config())
+            result = self._train(symbol, period, retrain, run)
+            run.finish(result)
+        return result
+    
+    def _train(self, symbol, period, retrain, run):
+        if retrain:
+            result = self.warm_start(symbol, period, run=run)
+            if result is not None:
+                return result
+        
         print(f"Training model for {symbol}...")
         
         # Fetch and preprocess data
         df = self.preprocessor.fetch_stock_data(symbol, period)
         df = self.preprocessor.calculate_technical_indicators(df)
         
-        # Prepare sequences
-        X, y = self.preprocessor.prepare_sequences(
-            df, SEQUENCE_LENGTH, PREDICTION_DAYS
-        )
+        # Prepare zero-copy sliding windows over the scaled features
+        with stage('train_windows'):
+            dataset = self.preprocessor.prepare_window_dataset(
+                df, SEQUENCE_LENGTH, PREDICTION_DAYS
+            )
         
-        if len(X) < 100:
-            raise ValueError(f"Insufficient data for training. Got {len(X)} samples.")
+        if len(dataset) < 100:
+            raise ValueError(f"Insufficient data for training. Got {len(dataset)} samples.")
         
         # Split data
-        split_idx = int(len(X) * TRAIN_TEST_SPLIT)
-        X_train, X_test = X[:split_idx], X[split_idx:]
-        y_train, y_test = y[:split_idx], y[split_idx:]
+        train_data, test_data = dataset.split(TRAIN_TEST_SPLIT)
+        run.set_data(bars=len(df), train_samples=len(train_data), test_samples=len(test_data),
+                     features=dataset.n_features)
         
-        # Reshape for LSTM (samples, timesteps, features)
-        print(f"Training samples: {len(X_train)}, Test samples: {len(X_test)}")
-        print(f"Input shape: {X_train.shape}")
+        # Windows are (samples, timesteps, features) views; batches are
+        # materialized on demand so the full 3-D tensor never exists
+        print(f"Training samples: {len(train_data)}, Test samples: {len(test_data)}")
+        print(f"Input shape: {train_data.X.shape}")
         
         # Build model
-        self.model = self.build_model((X_train.shape[1], X_train.shape[2]))
+        self.model = self.build_model((SEQUENCE_LENGTH, dataset.n_features))
         
-        # Callbacks
+        # Callbacks (the checkpoint writes into MODELS_DIR during fit)
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
         callbacks = [
             EarlyStopping(
                 monitor='val_loss',
                 patience=10,
                 restore_best_weights=True,
-                verbose=1
+                verbose=self.verbose
             ),
             ReduceLROnPlateau(
                 monitor='val_loss',
                 factor=0.5,
                 patience=5,
                 min_lr=0.00001,
-                verbose=1
+                verbose=self.verbose
             ),
             ModelCheckpoint(
                 filepath=str(MODELS_DIR / f"{symbol}_best.h5"),
                 monitor='val_loss',
                 save_best_only=True,
-                verbose=1
-            )
+                verbose=self.verbose
+            ),
+            run.epoch_callback(len(train_data), EPOCHS)
         ]
         
         # Train model
-        self.history = self.model.fit(
-            X_train, y_train,
-            batch_size=BATCH_SIZE,
-            epochs=EPOCHS,
-            validation_data=(X_test, y_test),
-            callbacks=callbacks,
-            verbose=1
-        )
+        with stage('train_fit'):
+            self.history = self.model.fit(
+                WindowBatchSequence(train_data, BATCH_SIZE, shuffle=True),
+                epochs=EPOCHS,
+                validation_data=WindowBatchSequence(test_data, BATCH_SIZE),
+                callbacks=callbacks,
+                verbose=self.verbose
+            )
         
         # Evaluate
-        metrics = self.evaluate(X_test, y_test)
+        metrics = self.evaluate(test_data.X, test_data.y)
+        calibration = self.calibrate(test_data)
         
         # Save model and preprocessor
-        self.save_model(symbol)
+        self.save_model(symbol, metadata=self._training_metadata(
+            df, period, 'full', len(train_data),
+            min(self.history.history['val_loss']), metrics, calibration
+        ), df=df)
         
         return {
             'history': self.history.history,
             'metrics': metrics,
-            'symbol': symbol
+            'symbol': symbol,
+            'mode': 'full'
         }
     
+    def warm_start(self, symbol, period="2y", run=None):
+        """
+        Fine-tune the saved model on bars added since its last training run
+        
+        Uses the saved weights and scalers as-is. The fine-tuned model is
+        kept only if its loss on the previous validation window is no worse
+        than before fine-tuning.
+        
+        Args:
+            symbol: Stock symbol
+            period: Data period to fetch
+            run: TrainingRun collecting telemetry for this call
+        
+        Returns:
+            Training result, or None when a full retrain is needed
+        """
+        state = self._load_training_state(symbol)
+        if state is None:
+            print(f"No reusable model state for {symbol}; running full training")
+            return None
+        model, feature_scaler, scaler, metadata = state
+        
+        df = self.preprocessor.fetch_stock_data(symbol, period)
+        df = self.preprocessor.calculate_technical_indicators(df)
+        
+        available_features = [col for col in FEATURE_COLUMNS if col in df.columns]
+        if available_features != metadata['feature_columns']:
+            print(f"Feature columns changed for {symbol}; running full training")
+            return None
+        
+        last_trained = pd.Timestamp(metadata['last_bar_date'])
+        new_bars = int((df['date'] > last_trained).sum())
+        if new_bars == 0:
+            print(f"No new bars for {symbol} since {last_trained.date()}; keeping existing model")
+            return {
+                'history': {},
+                'metrics': metadata['metrics'],
+                'symbol': symbol,
+                'mode': 'unchanged'
+            }
+        
+        # Reuse the saved scaling so inputs match what the weights were trained on
+        scaled_data = feature_scaler.transform(df[available_features].to_numpy(dtype=np.float32))
+        dataset = SlidingWindowDataset(
+            scaled_data, SEQUENCE_LENGTH, PREDICTION_DAYS, target_column=3
+        )
+        
+        # Fine-tune on samples whose target is a new bar; validate on the
+        # test split of the history the model has already seen
+        new_samples = min(new_bars, len(dataset))
+        fine_tune_data = dataset.tail(new_samples)
+        _, validation_data = dataset.subset(0, len(dataset) - new_samples).split(TRAIN_TEST_SPLIT)
+        if len(validation_data) == 0:
+            print(f"No validation window for {symbol}; running full training")
+            return None
+        
+        print(f"Warm-starting {symbol} on {new_samples} new samples...")
+        callbacks = []
+        if run is not None:
+            run.set_data(bars=len(df), train_samples=new_samples, test_samples=len(validation_data),
+                         features=len(available_features))
+            callbacks.append(run.epoch_callback(new_samples, WARM_START_EPOCHS))
+        self.model = model
+        self.preprocessor.feature_scaler = feature_scaler
+        self.preprocessor.scaler = scaler
+        self.model.compile(optimizer=Adam(learning_rate=WARM_START_LEARNING_RATE), loss='mse', metrics=['mae'])
+        
+        validation = WindowBatchSequence(validation_data, BATCH_SIZE)
+        with stage('warm_start_fit'):
+            loss_before = self.model.evaluate(validation, verbose=0)[0]
+            self.history = self.model.fit(
+                WindowBatchSequence(fine_tune_data, BATCH_SIZE, shuffle=True),
+                epochs=WARM_START_EPOCHS,
+                callbacks=callbacks,
+                verbose=self.verbose
+            )
+            loss_after = self.model.evaluate(validation, verbose=0)[0]
+        
+        if loss_after > loss_before * WARM_START_TOLERANCE:
+            print(f"Validation loss worsened for {symbol} "
+                  f"({loss_before:.6f} -> {loss_after:.6f}); running full training")
+            return None
+        
+        metrics = self.evaluate(validation_data.X, validation_data.y)
+        calibration = self.calibrate(validation_data)
+        self.save_model(symbol, metadata=self._training_metadata(
+            df, period, 'warm_start', new_samples, loss_after, metrics, calibration
+        ), df=df)
+        
+        return {
+            'history': self.history.history,
+            'metrics': metrics,
+            'symbol': symbol,
+            'mode': 'warm_start'
+        }
+    
+    def _load_training_state(self, symbol):
+        """Load saved model, fitted scalers and training metadata, or None"""
+        model_path = MODELS_DIR / f"{symbol}_model.h5"
+        if not os.path.exists(model_path):
+            return None
+        
+        bundle = ModelBundle.load(symbol, load_model(str(model_path), compile=False))
+        if not bundle.fitted:
+            return None
+        return bundle.model, bundle.feature_scaler, bundle.close_scaler, bundle.metadata
+    
+    def _telemetry_config(self):
+        """Training constants recorded with each telemetry record"""
+        return {
+            'model_version': MODEL_VERSION,
+            'sequence_length': SEQUENCE_LENGTH,
+            'prediction_days': PREDICTION_DAYS,
+            'train_test_split': TRAIN_TEST_SPLIT,
+            'lstm_units': LSTM_UNITS,
+            'dropout_rate': DROPOUT_RATE,
+            'epochs': EPOCHS,
+            'batch_size': BATCH_SIZE,
+            'learning_rate': LEARNING_RATE,
+            'warm_start_epochs': WARM_START_EPOCHS,
+            'warm_start_learning_rate': WARM_START_LEARNING_RATE,
+        }
+    
+    def _training_metadata(self, df, period, mode, samples, val_loss, metrics, calibration=None):
+        """Describe a training run for {symbol}_meta.json"""
+        return {
+            'model_version': MODEL_VERSION,
+            'trained_at': datetime.now().isoformat(),
+            'mode': mode,
+            'period': period,
+            'last_bar_date': pd.Timestamp(df['date'].iloc[-1]).isoformat(),
+            'feature_columns': [col for col in FEATURE_COLUMNS if col in df.columns],
+            'samples': int(samples),
+            'val_loss': float(val_loss),
+            'metrics': metrics,
+            'mc_calibration': calibration
+        }
+    
+    @stage('train_evaluate')
     def evaluate(self, X_test, y_test):
         """
         Evaluate model performance
@@ -147,17 +348,15 @@ class LSTMModelTrainer:
         Returns:
             Dictionary of evaluation metrics
         """
-        predictions = self.model.predict(X_test, verbose=0)
-        
-        # Inverse transform predictions
-        # Create dummy arrays for inverse transform
-        pred_dummy = np.zeros((len(predictions), X_test.shape[2]))
-        pred_dummy[:, 3] = predictions.flatten()  # Close price at index 3
-        predictions_actual = self.preprocessor.scaler.inverse_transform(pred_dummy)[:, 3]
+        predictions = self._predict_in_chunks(X_test)
         
-        y_dummy = np.zeros((len(y_test), X_test.shape[2]))
-        y_dummy[:, 3] = y_test.flatten()
-        y_actual = self.preprocessor.scaler.inverse_transform(y_dummy)[:, 3]
+        # Inverse transform predictions with the close price scaler
+        predictions_actual = self.preprocessor.scaler.inverse_transform(
+            predictions.reshape(-1, 1)
+        )[:, 0]
+        y_actual = self.preprocessor.scaler.inverse_transform(
+            np.asarray(y_test, dtype=np.float64).reshape(-1, 1)
+        )[:, 0]
         
         # Calculate metrics
         mae = mean_absolute_error(y_actual, predictions_actual)
@@ -180,15 +379,41 @@ class LSTMModelTrainer:
             'directional_accuracy': float(directional_accuracy)
         }
     
-    def save_model(self, symbol):
-        """Save model and preprocessor"""
-        model_path = MODELS_DIR / f"{symbol}_model.h5"
-        scaler_path = MODELS_DIR / f"{symbol}_scaler.pkl"
-        feature_scaler_path = MODELS_DIR / f"{symbol}_feature_scaler.pkl"
+    @stage('train_calibrate')
+    def calibrate(self, dataset):
+        """
+        Fit the Monte Carlo dropout interval width on the most recent
+        held-out windows (see mc_dropout.fit_calibration)
+        """
+        X = dataset.X[-MC_CALIBRATION_WINDOWS:]
+        y = dataset.y[-MC_CALIBRATION_WINDOWS:]
+        return fit_calibration(self.model, X, y, self._predict_in_chunks(X))
+    
+    def _predict_in_chunks(self, X, chunk_size=1024):
+        """Predict over (possibly strided) windows without copying them all at once"""
+        outputs = [
+            self.model.predict_on_batch(np.ascontiguousarray(X[i:i + chunk_size]))
+            for i in range(0, len(X), chunk_size)
+        ]
+        return np.concatenate([np.asarray(o) for o in outputs]).flatten()
+    
+    @stage('train_save')
+    def save_model(self, symbol, metadata=None, df=None):
+        """
+        Save the model bundle: fitted scalers, training metadata, the
+        indicator state after the last training bar (when df is given) and
+        the model itself, written last
+        """
+        indicators = (
+            IncrementalIndicators.from_history(df, INDICATOR_HISTORY_SIZE) if df is not None else None
+        )
+        save_bundle(
+            symbol, self.preprocessor.scaler, self.preprocessor.feature_scaler,
+            metadata=metadata, indicators=indicators
+        )
         
+        model_path = MODELS_DIR / f"{symbol}_model.h5"
         self.model.save(str(model_path))
-        joblib.dump(self.preprocessor.scaler, scaler_path)
-        joblib.dump(self.preprocessor.feature_scaler, feature_scaler_path)
         
         print(f"Model saved: {model_path}")
     
@@ -200,29 +425,7 @@ class LSTMModelTrainer:
         with 'RELIANCE', this will automatically try common suffixes
         (.NS, .BO) when looking for model files.
         """
-        # Try exact symbol first, then with common Indian exchange suffixes
-        candidate_symbols = [symbol]
-        base = symbol.upper()
-        if not base.endswith(".NS") and not base.endswith(".BO"):
-            candidate_symbols.append(f"{base}.NS")
-            candidate_symbols.append(f"{base}.BO")
-
-        found_symbol = None
-        model_path = None
-
-        for sym in candidate_symbols:
-            # Prefer explicitly saved final model; fall back to best checkpoint
-            m_path = MODELS_DIR / f"{sym}_model.h5"
-            if not os.path.exists(m_path):
-                m_path = MODELS_DIR / f"{sym}_best.h5"
-
-            if os.path.exists(m_path):
-                found_symbol = sym
-                model_path = m_path
-                break
-
-        if found_symbol is None or model_path is None:
-            raise FileNotFoundError(f"Model files not found for {symbol}")
+        found_symbol, model_path = resolve_model_path(symbol)
 
         # Load for inference only; avoids legacy training-object
         # deserialization issues (e.g. keras.metrics.mse in older .h5 files).
@@ -231,72 +434,28 @@ class LSTMModelTrainer:
         print(f"Model loaded: {model_path}")
         return True
     
-    def predict(self, symbol, days_ahead=1):
+    def predict(self, symbol, days_ahead=1, model=None, infer=direct_inference):
         """
         Make prediction for a stock
         
         Args:
             symbol: Stock symbol
             days_ahead: Number of days to predict
+            model: Preloaded Keras model (e.g. from the model registry);
+                defaults to this trainer's model
+            infer: Inference callable for forecasting.forecast_paths, e.g.
+                FusedInference.run
         
         Returns:
             Prediction and confidence metrics
         """
-        # Load model if not loaded
-        if self.model is None:
-            self.load_model(symbol)
-        
-        # Fetch recent data
-        df = self.preprocessor.fetch_stock_data(symbol, period="3mo")
-        df = self.preprocessor.calculate_technical_indicators(df)
-        
-        # Prepare last sequence
-        feature_columns = [
-            'open', 'high', 'low', 'close', 'volume',
-            'rsi', 'macd', 'macd_signal', 'macd_hist',
-            'sma_20', 'sma_50', 'ema_12',
-            'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
-            'price_change', 'high_low_ratio', 'close_sma20_ratio',
-            'volume_ratio'
-        ]
-        available_features = [col for col in feature_columns if col in df.columns]
-        data = df[available_features].values
-
-        # Fit feature scaler on the current feature data for inference
-        # (We don't rely on saved scalers here.)
-        self.preprocessor.feature_scaler.fit(data)
-        scaled_data = self.preprocessor.feature_scaler.transform(data)
-        
-        # Get last sequence
-        last_sequence = scaled_data[-SEQUENCE_LENGTH:].reshape(1, SEQUENCE_LENGTH, len(available_features))
-        
-        # Predict
-        prediction_scaled = self.model.predict(last_sequence, verbose=0)[0][0]
-        
-        # Fit price scaler on recent close prices for inverse transform
-        close_values = df["close"].values.reshape(-1, 1)
-        self.preprocessor.scaler.fit(close_values)
-
-        # Inverse transform predicted close
-        pred_dummy = np.zeros((1, 1))
-        pred_dummy[0, 0] = prediction_scaled  # Scaled close value
-        prediction_actual = self.preprocessor.scaler.inverse_transform(pred_dummy)[0, 0]
-        
-        # Calculate confidence (using prediction variance)
-        # For production, use ensemble or Monte Carlo dropout
-        current_price = df['close'].iloc[-1]
-        price_change_pct = ((prediction_actual - current_price) / current_price) * 100
-        
-        # Simple confidence calculation based on recent volatility
-        recent_volatility = df['close'].tail(20).std() / df['close'].tail(20).mean()
-        confidence = max(0, min(100, 100 - (recent_volatility * 100)))
-        
-        return {
-            'symbol': symbol,
-            'current_price': float(current_price),
-            'predicted_price': float(prediction_actual),
-            'predicted_change': float(price_change_pct),
-            'confidence': float(confidence),
-            'prediction_date': datetime.now().isoformat()
-        }
+        if model is None:
+            # Load model if not loaded
+            if self.model is None:
+                self.load_model(symbol)
+            model = self.model
+        
+        resolved, _ = resolve_model_path(symbol)
+        bundle = ModelBundle.load(resolved, model)
+        return self.predictor.predict(symbol, days_ahead, bundle=bundle, infer=infer)
 
@@ -0,0 +1,149 @@
+"""
+In-process cache of prediction responses with TTL, LRU eviction and
+optional persistence
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    PREDICTION_CACHE_TTL, PREDICTION_CACHE_MAX_ENTRIES, PREDICTION_CACHE_PERSIST,
+    PREDICTION_CACHE_PATH, PREDICTION_CACHE_SAVE_INTERVAL
+)
+
+
+class PredictionCache:
+    """
+    Prediction responses keyed by (resolved symbol, model mtime, last bar
+    date, days_ahead)
+
+    Daily-bar predictions only change when a new bar arrives or the model is
+    retrained, and both are part of the key, so a hit is exactly what a fresh
+    run would return for the same inputs. The TTL bounds how long a result
+    for a bar that is still trading can be served. When a path is given,
+    entries are written to a JSON file (at most every `save_interval`
+    seconds, and at exit) and reloaded on start, skipping expired ones.
+    """
+
+    def __init__(self, ttl=PREDICTION_CACHE_TTL, max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+                 path=PREDICTION_CACHE_PATH if PREDICTION_CACHE_PERSIST else None,
+                 save_interval=PREDICTION_CACHE_SAVE_INTERVAL):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.save_interval = save_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._saved_at = time.time()
+        self._dirty = False
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+        }
+        if path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        """
+        Look up a cached response
+
+        Returns:
+            Tuple of (response dict, age in seconds), or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            created_at, result = entry
+            age = time.time() - created_at
+            if age >= self.ttl:
+                del self._entries[key]
+                self._dirty = True
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return result, age
+
+    def put(self, key, result):
+        """Store a response, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._dirty = True
+            due = self.path is not None and time.time() - self._saved_at >= self.save_interval
+
+        if due:
+            self.save()
+
+    def invalidate(self, symbol=None):
+        """Drop entries for one resolved symbol, or every entry when None"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == symbol]:
+                    del self._entries[key]
+            self._dirty = True
+
+    def save(self):
+        """Write unexpired entries to disk atomically"""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = [
+                [list(key), created_at, result]
+                for key, (created_at, result) in self._entries.items()
+                if now - created_at < self.ttl
+            ]
+            self._dirty = False
+            self._saved_at = now
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except ValueError:
+            return
+
+        now = time.time()
+        for key, created_at, result in entries:
+            if now - created_at < self.ttl:
+                self._entries[tuple(key)] = (created_at, result)
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached responses"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'persistent': self.path is not None,
+            }
@@ -0,0 +1,388 @@
+"""
+Post-close precomputed predictions in a local SQLite store
+
+Predictions on daily bars only change when a bar closes or a model is
+retrained, so after the close the whole universe is predicted in one batch
+(`python prediction_store.py`) and written to SQLite in a single
+transaction. The API then answers /predict and /batch-predict with a
+primary key lookup while the stored row is fresh, and computes live on a
+miss. Usage:
+    python prediction_store.py                          # check_progress.ALL_STOCKS
+    python prediction_store.py --symbols TCS.NS INFY.NS --days-ahead 1 5
+    python prediction_store.py --status                 # stored rows and the last run
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import (
+    PREDICTION_STORE_PATH, PREDICTION_STORE_MAX_AGE, PRECOMPUTE_DAYS_AHEAD, BATCH_PREDICT_WORKERS
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    symbol TEXT NOT NULL,
+    days_ahead INTEGER NOT NULL,
+    model_mtime REAL NOT NULL,
+    last_bar_date TEXT NOT NULL,
+    computed_at REAL NOT NULL,
+    run_id TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (symbol, days_ahead)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    symbols INTEGER NOT NULL,
+    written INTEGER NOT NULL,
+    errors TEXT NOT NULL
+);
+"""
+
+
+class PredictionStore:
+    """
+    Prediction responses keyed by (resolved symbol, days_ahead)
+
+    A stored row is served only while it is fresh: the model file has the
+    mtime it was computed with, it is younger than `max_age`, and the OHLCV
+    cache (when it knows) has no newer bar than the one it was computed on.
+    Every thread (and forked process) reads through its own connection; the
+    database is in WAL mode, so reads never wait for a batch being written.
+    """
+
+    def __init__(self, path=PREDICTION_STORE_PATH, max_age=PREDICTION_STORE_MAX_AGE):
+        self.path = str(path)
+        self.max_age = max_age
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+        }
+
+    def _connect(self, create=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        # Lookups never create the database; until the first run every lookup is a miss
+        if not create and not os.path.exists(self.path):
+            return None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if create:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get(self, symbol, days_ahead, model_mtime, last_bar_date=None):
+        """
+        Look up a fresh precomputed response
+
+        Args:
+            symbol: Resolved stock symbol
+            days_ahead: Forecast horizon
+            model_mtime: Current mtime of the symbol's model file
+            last_bar_date: Newest bar known to the OHLCV cache, or None
+
+        Returns:
+            Tuple of (response dict, age in seconds), or None
+        """
+        row = None
+        conn = self._connect()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    'SELECT model_mtime, last_bar_date, computed_at, result FROM predictions '
+                    'WHERE symbol = ? AND days_ahead = ?', (symbol, days_ahead)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+        if row is None:
+            self._count('misses')
+            return None
+
+        stored_mtime, stored_bar, computed_at, result = row
+        age = time.time() - computed_at
+        if stored_mtime != model_mtime or age >= self.max_age or (
+                last_bar_date is not None and stored_bar != last_bar_date):
+            self._count('stale')
+            return None
+
+        self._count('hits')
+        return json.loads(result), age
+
+    def write(self, run_id, rows, started_at, symbols, errors=None):
+        """
+        Store one batch run in a single transaction
+
+        Readers see either the previous rows or all of this run's rows.
+        Symbols that failed keep their previous row, which goes stale on its own.
+
+        Args:
+            run_id: Identifier of the run
+            rows: Dicts with symbol, days_ahead, model_mtime, last_bar_date
+                and result (the prediction response)
+            started_at: Run start (epoch seconds)
+            symbols: Number of symbols the run covered
+            errors: List of {'symbol', 'error'} dicts
+        """
+        conn = self._connect(create=True)
+        finished_at = time.time()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (row['symbol'], row['days_ahead'], row['model_mtime'], row['last_bar_date'],
+                     finished_at, run_id, json.dumps(row['result']))
+                    for row in rows
+                ]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)',
+                (run_id, started_at, finished_at, symbols, len(rows), json.dumps(errors or []))
+            )
+
+    def last_run(self):
+        """The most recent run, or None"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                'SELECT run_id, started_at, finished_at, symbols, written, errors FROM runs '
+                'ORDER BY finished_at DESC LIMIT 1'
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        run_id, started_at, finished_at, symbols, written, errors = row
+        return {
+            'run_id': run_id,
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'seconds': round(finished_at - started_at, 3),
+            'age_seconds': round(time.time() - finished_at, 3),
+            'symbols': symbols,
+            'written': written,
+            'errors': json.loads(errors),
+        }
+
+    def rows(self):
+        """Stored rows without their responses, by symbol"""
+        conn = self._connect()
+        if conn is None:
+            return []
+        try:
+            return [
+                {'symbol': symbol, 'days_ahead': days_ahead, 'last_bar_date': last_bar_date,
+                 'computed_at': computed_at, 'run_id': run_id}
+                for symbol, days_ahead, last_bar_date, computed_at, run_id in conn.execute(
+                    'SELECT symbol, days_ahead, last_bar_date, computed_at, run_id FROM predictions '
+                    'ORDER BY symbol, days_ahead'
+                )
+            ]
+        except sqlite3.Error:
+            return []
+
+    def stats(self):
+        """Return lookup counters, the number of stored rows and the last run"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses'] + self._stats['stale']
+            stats = {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+            }
+        return {
+            **stats,
+            'rows': len(self.rows()),
+            'max_age_seconds': self.max_age,
+            'last_run': self.last_run(),
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_prediction_store():
+    """Return the process-wide prediction store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PredictionStore()
+        return _default_store
+
+
+def _parallel(fn, symbols, workers):
+    """Run fn(symbol) on a thread pool; returns (results by symbol, errors)"""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    results, errors = {}, []
+    if not symbols:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as pool:
+        futures = {pool.submit(fn, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                errors.append({'symbol': symbol, 'error': str(e)})
+    return results, errors
+
+
+def precompute(symbols=None, days_ahead=PRECOMPUTE_DAYS_AHEAD, store=None,
+               workers=BATCH_PREDICT_WORKERS, refresh=True):
+    """
+    Predict a universe in one batch and store the results
+
+    Bars are brought up to date first (an incremental download per symbol,
+    so the final session bar replaces any mid-session copy). Then, per
+    horizon, every symbol's input is built concurrently and all symbols run
+    through the serving backend together: one grouped call per forecast
+    step and one for the dropout samples, as in /batch-predict.
+
+    Args:
+        symbols: Symbols to predict (default: check_progress.ALL_STOCKS);
+            symbols without a trained model are reported as errors
+        days_ahead: Horizons to store per symbol
+        store: PredictionStore (default: the process-wide store)
+        workers: Concurrent fetch/preprocess threads
+        refresh: Update cached bars before predicting
+
+    Returns:
+        Run summary with per-step seconds and errors
+    """
+    # The serving pipeline, so stored responses match live ones for the configured backend
+    from app import get_pipeline
+    from check_progress import ALL_STOCKS
+    from data_cache import OHLCVCache
+    from data_preprocessor import StockDataPreprocessor
+    from forecasting import forecast_paths
+
+    symbols = list(dict.fromkeys(symbols or ALL_STOCKS))
+    store = store or get_prediction_store()
+    pipeline = get_pipeline()
+    predictor = pipeline.predictor
+    started_at = time.time()
+    run_id = time.strftime('%Y%m%dT%H%M%S')
+    timings = {}
+
+    start = time.perf_counter()
+    bundles, versions, errors = {}, {}, []
+    for symbol in symbols:
+        try:
+            resolved, path = pipeline.model_registry.resolve(symbol)
+            versions[symbol] = (resolved, os.path.getmtime(path))
+            bundles[symbol] = pipeline.model_registry.get(symbol)[1]
+        except Exception as e:
+            errors.append({'symbol': symbol, 'error': str(e)})
+    timings['load_models_s'] = time.perf_counter() - start
+
+    if refresh and predictor.preprocessor.cache is not None:
+        start = time.perf_counter()
+        cache = predictor.preprocessor.cache
+        refresher = StockDataPreprocessor(cache=OHLCVCache(cache_dir=cache.cache_dir, max_age=0))
+        _, refresh_errors = _parallel(lambda symbol: refresher.fetch_stock_data(symbol, period="3mo"),
+                                      list(bundles), workers)
+        for error in refresh_errors:
+            bundles.pop(error['symbol'], None)
+        errors += refresh_errors
+        timings['refresh_s'] = time.perf_counter() - start
+
+    rows = []
+    for horizon in days_ahead:
+        start = time.perf_counter()
+        inputs, input_errors = _parallel(
+            lambda symbol: predictor.prepare_inference(symbol, horizon, bundles[symbol]), list(bundles), workers
+        )
+        errors += [{**error, 'days_ahead': horizon} for error in input_errors]
+        ready = [symbol for symbol in bundles if symbol in inputs]
+        if not ready:
+            continue
+
+        paths, final_sequences, _ = forecast_paths(
+            [inputs[symbol] for symbol in ready],
+            [bundles[symbol].model for symbol in ready],
+            horizon,
+            infer=pipeline.fused_inference.run
+        )
+        samples, _ = predictor.mc_dropout.run(
+            [(bundles[symbol].model, sequence) for symbol, sequence in zip(ready, final_sequences)],
+            infer=pipeline.fused_inference.run
+        )
+        for symbol, path, mc_samples in zip(ready, paths, samples):
+            prediction = predictor.finalize_prediction(inputs[symbol], path, mc_samples)
+            resolved, model_mtime = versions[symbol]
+            rows.append({
+                'symbol': resolved,
+                'days_ahead': horizon,
+                'model_mtime': model_mtime,
+                'last_bar_date': prediction['last_bar_date'],
+                'result': prediction,
+            })
+        timings[f'predict_{horizon}d_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.write(run_id, rows, started_at, len(symbols), errors)
+    timings['write_s'] = time.perf_counter() - start
+
+    return {
+        'run_id': run_id,
+        'symbols': len(symbols),
+        'written': len(rows),
+        'seconds': round(time.time() - started_at, 3),
+        'timings': {key: round(value, 3) for key, value in timings.items()},
+        'errors': errors,
+    }
+
+
+def _print_status(store):
+    run = store.last_run()
+    if run is None:
+        print(f"No runs stored in {store.path}")
+        return
+    print(f"Last run {run['run_id']}: {run['written']} predictions for {run['symbols']} symbols "
+          f"in {run['seconds']:.1f}s, {run['age_seconds'] / 3600:.1f}h ago, {len(run['errors'])} errors")
+    now = time.time()
+    print(f"\n{'symbol':<16s} {'days':>4s} {'last bar':>10s} {'age h':>6s}  run")
+    for row in store.rows():
+        print(f"{row['symbol']:<16s} {row['days_ahead']:>4d} {row['last_bar_date']:>10s} "
+              f"{(now - row['computed_at']) / 3600:>6.1f}  {row['run_id']}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbols', nargs='+', help="Symbols to predict (default: check_progress.ALL_STOCKS)")
+    parser.add_argument('--days-ahead', nargs='+', type=int, default=list(PRECOMPUTE_DAYS_AHEAD),
+                        help="Horizons to store per symbol")
+    parser.add_argument('--workers', type=int, default=BATCH_PREDICT_WORKERS, help="Fetch/preprocess threads")
+    parser.add_argument('--no-refresh', action='store_true', help="Use cached bars as they are")
+    parser.add_argument('--status', action='store_true', help="Show stored predictions and exit")
+    args = parser.parse_args()
+
+    store = get_prediction_store()
+    if args.status:
+        _print_status(store)
+    else:
+        summary = precompute(args.symbols, args.days_ahead, store, args.workers, refresh=not args.no_refresh)
+        print(f"\nStored {summary['written']} predictions for {summary['symbols']} symbols "
+              f"in {summary['seconds']:.1f}s: {summary['timings']}")
+        for error in summary['errors']:
+            print(f"   ❌ {error['symbol']}: {error['error']}")
+        if not summary['written']:
+            raise SystemExit(1)
@@ -0,0 +1,224 @@
+"""
+Prediction pipeline shared by the API and the trainer
+
+Imports no TensorFlow: the model bundle is passed in, holding either a Keras
+model or a lite_runtime.LiteModel, so the API can serve exported models with only the
+TFLite runtime loaded.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import SEQUENCE_LENGTH, MODELS_DIR
+from data_preprocessor import StockDataPreprocessor, FEATURE_COLUMNS, exchange_symbol
+from incremental_indicators import get_indicator_store
+from forecasting import forecast_paths, direct_inference
+from mc_dropout import MCDropout
+from metrics import stage
+
+# Keras model files, final model first, then the best checkpoint
+MODEL_FILE_SUFFIXES = ('_model.h5', '_best.h5')
+
+
+def resolve_model_path(symbol, suffixes=MODEL_FILE_SUFFIXES):
+    """
+    Find the saved model file for a symbol
+    
+    Tries the exact symbol first, then common Indian exchange suffixes
+    (.NS, .BO). Prefers the explicitly saved final model and falls back
+    to the best checkpoint.
+    
+    Args:
+        symbol: Stock symbol, with or without exchange suffix
+        suffixes: File name suffixes to look for, in order of preference
+    
+    Returns:
+        Tuple of (resolved symbol, model path)
+    """
+    candidate_symbols = [symbol]
+    base = symbol.upper()
+    if not base.endswith(".NS") and not base.endswith(".BO"):
+        candidate_symbols.append(f"{base}.NS")
+        candidate_symbols.append(f"{base}.BO")
+
+    for sym in candidate_symbols:
+        for suffix in suffixes:
+            m_path = MODELS_DIR / f"{sym}{suffix}"
+            if os.path.exists(m_path):
+                return sym, m_path
+
+    raise FileNotFoundError(f"Model files not found for {symbol}")
+
+
+def trained_symbols(suffixes=MODEL_FILE_SUFFIXES):
+    """Symbols with a saved model file in MODELS_DIR, sorted"""
+    if not os.path.isdir(MODELS_DIR):
+        return []
+    symbols = set()
+    for name in os.listdir(MODELS_DIR):
+        for suffix in suffixes:
+            if name.endswith(suffix):
+                symbols.add(name[:-len(suffix)])
+    return sorted(symbols)
+
+
+class Predictor:
+    """Builds model inputs, runs the forecast and assembles the response"""
+    
+    def __init__(self, preprocessor=None):
+        self.preprocessor = preprocessor or StockDataPreprocessor()
+        self.indicator_store = get_indicator_store()
+        self.mc_dropout = MCDropout()
+    
+    def predict(self, symbol, days_ahead=1, bundle=None, infer=direct_inference):
+        """
+        Make prediction for a stock
+        
+        Args:
+            symbol: Stock symbol
+            days_ahead: Number of days to predict
+            bundle: model_bundle.ModelBundle holding the inference model (a
+                Keras model or a lite_runtime.LiteModel) and its fitted
+                scalers, e.g. from the model registry
+            infer: Inference callable for forecasting.forecast_paths, e.g.
+                FusedInference.run
+        
+        Returns:
+            Prediction and confidence metrics
+        """
+        inputs = self.prepare_inference(symbol, days_ahead, bundle)
+        
+        # Predict, feeding each predicted day back in for multi-day horizons
+        with stage('forecast'):
+            paths, final_sequences, _ = forecast_paths([inputs], [bundle.model], days_ahead, infer=infer)
+        
+        # Dropout samples for the final day, all in one tiled call
+        with stage('mc_dropout'):
+            samples, _ = self.mc_dropout.run([(bundle.model, final_sequences[0])], infer=infer)
+        
+        return self.finalize_prediction(inputs, paths[0], samples[0])
+    
+    def prepare_inference(self, symbol, days_ahead=1, bundle=None):
+        """
+        Fetch recent data and build the model input for a stock
+        
+        Features are scaled with the scalers fitted at training time, so the
+        input only depends on the bars, not on the range of the recent
+        window. Bundles without fitted scalers (models saved by older
+        versions) get scalers fitted on the request window instead; they
+        are created per call, so concurrent requests never share them.
+        
+        Args:
+            symbol: Stock symbol
+            days_ahead: Forecast horizon; beyond one day a private copy of
+                the indicator engine is attached for the rollout
+            bundle: model_bundle.ModelBundle for the symbol
+        
+        Returns:
+            Dict with the (1, SEQUENCE_LENGTH, features) input sequence and
+            the context needed by finalize_prediction
+        """
+        fitted = bundle is not None and bundle.fitted
+        
+        # Fetch recent data; indicators are updated incrementally from the
+        # per-symbol engine state, first seeded from the state saved at the
+        # end of training, instead of being recomputed over the window
+        df = self.preprocessor.fetch_stock_data(symbol, period="3mo")
+        with stage('indicators_incremental'):
+            df = self.indicator_store.features(
+                exchange_symbol(symbol), df, seed=bundle.indicators if bundle is not None else None
+            )
+        
+        if fitted:
+            feature_columns = bundle.feature_columns
+            missing = [col for col in feature_columns if col not in df.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns for {symbol}: {missing}")
+            feature_scaler = bundle.feature_scaler
+            close_scaler = bundle.close_scaler
+            with stage('scale'):
+                scaled_data = feature_scaler.transform(
+                    df[feature_columns].to_numpy(dtype=np.float32)[-SEQUENCE_LENGTH:]
+                )
+        else:
+            from sklearn.preprocessing import MinMaxScaler
+            
+            feature_columns = [col for col in FEATURE_COLUMNS if col in df.columns]
+            with stage('scaler_fit'):
+                feature_scaler = MinMaxScaler(feature_range=(0, 1))
+                scaled_data = feature_scaler.fit_transform(df[feature_columns].values)
+                close_scaler = MinMaxScaler(feature_range=(0, 1)).fit(df["close"].values.reshape(-1, 1))
+        
+        # Get last sequence
+        last_sequence = scaled_data[-SEQUENCE_LENGTH:].reshape(1, SEQUENCE_LENGTH, len(feature_columns))
+        
+        return {
+            'symbol': symbol,
+            'sequence': last_sequence,
+            'feature_scaler': feature_scaler,
+            'feature_columns': feature_columns,
+            'close_scaler': close_scaler,
+            'close': df['close'].values,
+            'volume': df['volume'].values,
+            'last_date': df['date'].iloc[-1],
+            # Interval width fitted on held-out windows at training time, if any
+            'mc_calibration': bundle.metadata.get('mc_calibration') if fitted else None,
+            'indicators': (
+                self.indicator_store.fork(exchange_symbol(symbol)) if days_ahead > 1 else None
+            )
+        }
+    
+    def finalize_prediction(self, inputs, path, samples=None):
+        """
+        Turn a forecast path into the prediction response
+        
+        Args:
+            inputs: Output of prepare_inference
+            path: Per-day forecast from forecasting.forecast_paths
+            samples: Scaled Monte Carlo dropout samples for the final day
+                (from MCDropout.run); without them confidence falls back
+                to recent volatility
+        
+        Returns:
+            Prediction for the last day of the path, the full per-day
+            path and confidence metrics
+        """
+        prediction_actual = path[-1]['predicted_price']
+        
+        close = pd.Series(inputs['close'])
+        current_price = close.iloc[-1]
+        price_change_pct = ((prediction_actual - current_price) / current_price) * 100
+        
+        if samples is not None:
+            # Confidence and interval from the spread of dropout samples
+            uncertainty = self.mc_dropout.summarize(
+                samples, inputs['close_scaler'], current_price, prediction_actual,
+                calibration=inputs.get('mc_calibration')
+            )
+        else:
+            # Simple confidence calculation based on recent volatility
+            recent_volatility = close.tail(20).std() / close.tail(20).mean()
+            uncertainty = {'confidence': max(0, min(100, 100 - (recent_volatility * 100)))}
+        
+        forecast = [
+            {
+                **day,
+                'predicted_change': float((day['predicted_price'] - current_price) / current_price * 100)
+            }
+            for day in path
+        ]
+        
+        return {
+            'symbol': inputs['symbol'],
+            'current_price': float(current_price),
+            'predicted_price': float(prediction_actual),
+            'predicted_change': float(price_change_pct),
+            **uncertainty,
+            'confidence': float(uncertainty['confidence']),
+            'days_ahead': len(path),
+            'forecast': forecast,
+            'last_bar_date': pd.Timestamp(inputs['last_date']).date().isoformat(),
+            'prediction_date': datetime.now().isoformat()
+        }
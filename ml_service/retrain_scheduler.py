@@ -1,11 +1,30 @@
 """
 Scheduled retraining script for ML models
-Run this as a cron job or scheduled task
+Run this as a long-running process (or call it from cron with --once)
+
+Instead of retraining every model weekly, a drift check (drift_monitor.py)
+runs at the start of the daily compute window and only symbols whose
+realized error or indicator distribution crossed a threshold are retrained,
+most degraded first, with at most RETRAIN_MAX_CONCURRENT training processes.
+No new job starts after the window closes; the rest wait for the next one.
+
+    python retrain_scheduler.py                 # run the schedule
+    python retrain_scheduler.py --once          # check and retrain now
+    python retrain_scheduler.py --once --dry-run
 """
+import argparse
 import schedule
 import time
-from datetime import datetime
-from model_trainer import LSTMModelTrainer
+from datetime import datetime, timedelta
+from check_progress import ALL_STOCKS
+from config import (
+    PRECOMPUTE_TIME, RETRAIN_WINDOW_START, RETRAIN_WINDOW_HOURS, RETRAIN_MAX_CONCURRENT,
+    RETRAIN_MAX_SYMBOLS
+)
+from drift_monitor import DriftLog, check_universe, retrain_queue
+from prediction_store import precompute
+from train_universe import train_universe
+from training_manifest import TrainingManifest
 import logging
 
 # Setup logging
@@ -18,52 +37,88 @@ logging.basicConfig(
     ]
 )
 
-# Common stocks to retrain
-STOCKS_TO_RETRAIN = [
-    'RELIANCE.NS',
-    'TCS.NS',
-    'HDFCBANK.NS',
-    'INFY.NS',
-    'HINDUNILVR.NS',
-    'ICICIBANK.NS',
-    'BHARTIARTL.NS',
-    'SBIN.NS',
-    'ITC.NS',
-    'KOTAKBANK.NS'
-]
+# Every symbol the API serves is checked; only degraded ones are retrained
+STOCKS_TO_MONITOR = ALL_STOCKS
 
-def retrain_models():
-    """Retrain all models"""
-    logging.info("Starting scheduled retraining...")
-    trainer = LSTMModelTrainer()
+def retrain_degraded(deadline=None, dry_run=False):
+    """
+    Check every monitored model and retrain the ones that degraded
+
+    Args:
+        deadline: Epoch seconds after which no new training job starts
+        dry_run: Only log the check and the queue
+    """
+    logging.info(f"Checking {len(STOCKS_TO_MONITOR)} models for degradation...")
+    reports = check_universe(STOCKS_TO_MONITOR)
+    DriftLog().append(reports)
+    
+    for report in reports:
+        if 'error' in report:
+            logging.error(f"❌ Could not check {report['symbol']}: {report['error']}")
+        elif report['retrain']:
+            details = []
+            if report.get('error_ratio') is not None:
+                details.append(f"error ratio {report['error_ratio']:.2f}")
+            if report.get('max_psi') is not None:
+                details.append(f"PSI {report['max_psi']:.3f} on {report['max_psi_feature']}")
+            logging.info(f"⚠️  {report['symbol']}: {', '.join(report['reasons'])}"
+                         + (f" ({', '.join(details)})" if details else ''))
     
-    successful = 0
-    failed = 0
+    queue = retrain_queue(reports, RETRAIN_MAX_SYMBOLS)
+    logging.info(f"Retrain queue ({len(queue)} of {len(reports)}): {', '.join(queue) if queue else 'empty'}")
+    if not queue or dry_run:
+        return
     
-    for symbol in STOCKS_TO_RETRAIN:
-        try:
-            logging.info(f"Retraining model for {symbol}...")
-            result = trainer.train(symbol, period="2y", retrain=True)
-            logging.info(f"✅ Successfully retrained {symbol}. Metrics: {result['metrics']}")
-            successful += 1
-        except Exception as e:
-            logging.error(f"❌ Failed to retrain {symbol}: {str(e)}")
-            failed += 1
+    # Warm starts first (retrain=True), falling back to full training per symbol
+    manifest = TrainingManifest()
+    status = train_universe(queue, period="2y", retrain=True, force=True, manifest=manifest,
+                            workers=RETRAIN_MAX_CONCURRENT, deadline=deadline)
     
-    logging.info(f"Retraining complete. Successful: {successful}, Failed: {failed}")
+    for symbol in status['done']:
+        if symbol in queue:
+            logging.info(f"✅ Successfully retrained {symbol}. Metrics: {manifest.jobs[symbol]['metrics']}")
+    for symbol in status['failed']:
+        logging.error(f"❌ Failed to retrain {symbol}: {manifest.jobs[symbol]['error']}")
+    left = [symbol for symbol in status['queued'] if symbol in queue]
+    logging.info(f"Retraining complete. Successful: {len(status['done'])}, Failed: {len(status['failed'])}, "
+                 f"Left for the next window: {len(left)}")
 
-# Schedule retraining
-# Weekly retraining (every Sunday at 2 AM)
-schedule.every().sunday.at("02:00").do(retrain_models)
+def retrain_in_window():
+    """Scheduled at RETRAIN_WINDOW_START; jobs may start until the window closes"""
+    retrain_degraded(deadline=time.time() + RETRAIN_WINDOW_HOURS * 3600)
 
-# Daily retraining for critical stocks (optional)
-# schedule.every().day.at("03:00").do(retrain_critical_stocks)
+def precompute_predictions():
+    """Predict the universe after the close so the API serves stored results"""
+    logging.info("Starting post-close prediction precompute...")
+    summary = precompute()
+    for error in summary['errors']:
+        logging.error(f"❌ Failed to precompute {error['symbol']}: {error['error']}")
+    logging.info(f"Precompute complete. Stored {summary['written']} predictions in {summary['seconds']:.1f}s")
+
+# Daily drift check, retraining only degraded models inside the compute window
+schedule.every().day.at(RETRAIN_WINDOW_START).do(retrain_in_window)
+
+# Post-close predictions on trading days
+for day in (schedule.every().monday, schedule.every().tuesday, schedule.every().wednesday,
+            schedule.every().thursday, schedule.every().friday):
+    day.at(PRECOMPUTE_TIME).do(precompute_predictions)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Drift-triggered retraining and post-close prediction scheduler")
+    parser.add_argument('--once', action='store_true', help="Check and retrain now, then exit")
+    parser.add_argument('--dry-run', action='store_true', help="With --once: only report the retrain queue")
+    args = parser.parse_args()
+    
+    if args.once:
+        retrain_degraded(dry_run=args.dry_run)
+        raise SystemExit(0)
+    
+    window_end = datetime.strptime(RETRAIN_WINDOW_START, "%H:%M") + timedelta(hours=RETRAIN_WINDOW_HOURS)
     logging.info("Retraining scheduler started. Waiting for scheduled time...")
-    logging.info("Next retraining scheduled for: Every Sunday at 02:00")
+    logging.info(f"Drift check and retraining daily from {RETRAIN_WINDOW_START} to {window_end:%H:%M}, "
+                 f"{RETRAIN_MAX_CONCURRENT} at a time")
+    logging.info(f"Predictions precomputed on weekdays at {PRECOMPUTE_TIME}")
     
     while True:
         schedule.run_pending()
-        time.sleep(3600)  # Check every hour
-
+        time.sleep(60)  # Check every minute
@@ -0,0 +1,100 @@
+"""
+Zero-copy sliding-window datasets over a scaled feature matrix
+"""
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+class SlidingWindowDataset:
+    """
+    LSTM training samples exposed as strided views, never as a 3-D copy
+
+    Sample `i` is the window `features[start + i : start + i + sequence_length]`
+    and its target is `features[start + i + sequence_length + prediction_days - 1,
+    target_column]`. The feature matrix is stored once as contiguous float32;
+    `X` and `y` are read-only views over it, so building a dataset costs
+    O(rows * features) memory regardless of the sequence length.
+    """
+
+    def __init__(self, features, sequence_length=60, prediction_days=1,
+                 target_column=3, start=0, stop=None):
+        # A read-only view: the caller's array, when it is already contiguous
+        # float32, is shared but keeps its own writeable flag
+        self.features = np.ascontiguousarray(features, dtype=np.float32).view()
+        self.features.flags.writeable = False
+        self.sequence_length = sequence_length
+        self.prediction_days = prediction_days
+        self.target_column = target_column
+
+        total = max(0, len(self.features) - sequence_length - prediction_days + 1)
+        self.start = start
+        self.stop = total if stop is None else min(stop, total)
+
+    def __len__(self):
+        return max(0, self.stop - self.start)
+
+    @property
+    def n_features(self):
+        return self.features.shape[1]
+
+    @property
+    def X(self):
+        """Read-only (samples, sequence_length, features) view"""
+        row_stride, col_stride = self.features.strides
+        return as_strided(
+            self.features[self.start:],
+            shape=(len(self), self.sequence_length, self.n_features),
+            strides=(row_stride, row_stride, col_stride),
+            writeable=False
+        )
+
+    @property
+    def y(self):
+        """Read-only view of the scaled targets"""
+        first = self.start + self.sequence_length + self.prediction_days - 1
+        return self.features[first:first + len(self), self.target_column]
+
+    def batch(self, indices):
+        """Materialize only the requested samples as (X, y) arrays"""
+        return self.X[indices], self.y[indices]
+
+    def split(self, ratio):
+        """Split chronologically into (train, test) datasets sharing the same buffer"""
+        split_idx = self.start + int(len(self) * ratio)
+        return self._subset(self.start, split_idx), self._subset(split_idx, self.stop)
+
+    def subset(self, start, stop):
+        """Dataset of samples [start, stop) of this dataset, sharing the same buffer"""
+        return self._subset(self.start + start, min(self.start + stop, self.stop))
+
+    def tail(self, count):
+        """Dataset of the most recent `count` samples"""
+        return self._subset(max(self.start, self.stop - count), self.stop)
+
+    def _subset(self, start, stop):
+        subset = SlidingWindowDataset.__new__(SlidingWindowDataset)
+        subset.features = self.features
+        subset.sequence_length = self.sequence_length
+        subset.prediction_days = self.prediction_days
+        subset.target_column = self.target_column
+        subset.start = start
+        subset.stop = stop
+        return subset
+
+    def iter_batches(self, batch_size, shuffle=False, seed=None):
+        """
+        Yield (X, y) batches, copying at most `batch_size` windows at a time
+
+        Args:
+            batch_size: Samples per batch
+            shuffle: Visit samples in random order
+            seed: Seed for the shuffle order
+
+        Yields:
+            Tuples of float32 arrays (batch, sequence_length, features), (batch,)
+        """
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for offset in range(0, len(order), batch_size):
+            yield self.batch(order[offset:offset + batch_size])
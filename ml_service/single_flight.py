@@ -0,0 +1,87 @@
+"""
+Single-flight request coalescing: concurrent calls with the same key share
+one execution
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time
+
+    The first caller for a key (the leader) executes the function; callers
+    that arrive while it is running wait for it and receive the same result,
+    or the same exception. Once the call finishes the key is released, so the
+    next caller runs it again; caching finished results is left to the
+    caller.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'executions': 0,
+            'coalesced': 0,
+            'errors': 0,
+        }
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call for key is already in flight
+
+        Returns:
+            Tuple of (result, shared) where shared is True when the result
+            came from another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self):
+        """Return execution and coalescing counters"""
+        with self._lock:
+            requests = self._stats['executions'] + self._stats['coalesced']
+            return {
+                'name': self.name,
+                **self._stats,
+                'requests': requests,
+                'coalesced_rate': self._stats['coalesced'] / requests if requests else 0.0,
+                'in_flight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values()),
+            }
@@ -0,0 +1,70 @@
+"""
+Deterministic synthetic OHLCV generator for benchmarks (no network needed)
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+def generate_ohlcv(rows, seed=0, start_price=1000.0, end_date="2024-12-31"):
+    """
+    Generate a geometric random walk of business-day OHLCV bars
+
+    Args:
+        rows: Number of bars
+        seed: Random seed; the same seed always yields the same frame
+        start_price: First close price
+        end_date: Date of the last bar
+
+    Returns:
+        DataFrame with date, open, high, low, close, volume columns
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.015, rows)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.003, rows))
+    spread = np.abs(rng.normal(0, 0.01, rows))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(15, 0.4, rows).round()
+
+    dates = pd.bdate_range(end=end_date, periods=rows, tz="Asia/Kolkata")
+    return pd.DataFrame({
+        'date': dates,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
+
+
+class SyntheticDownloader:
+    """
+    Drop-in for StockDataPreprocessor._download serving generated bars
+
+    Every symbol gets its own stable series (seeded from the symbol name)
+    of `rows` bars ending today, so OHLCV cache and indicator code paths
+    behave as they would with Yahoo Finance data. Assign an instance to a
+    preprocessor's `_download` attribute.
+    """
+
+    def __init__(self, rows, end_date=None):
+        self.rows = rows
+        self.end_date = end_date
+        self.calls = 0
+
+    def bars(self, symbol):
+        end_date = self.end_date if self.end_date is not None else pd.Timestamp.now().normalize()
+        return generate_ohlcv(self.rows, seed=zlib.crc32(symbol.encode()), end_date=end_date)
+
+    def __call__(self, symbol, period=None, start=None):
+        from data_cache import period_start
+
+        self.calls += 1
+        df = self.bars(symbol)
+        if start is not None:
+            return df[df['date'].dt.date >= start].reset_index(drop=True)
+        first = period_start(period, pd.Timestamp.now(tz=df['date'].dt.tz)) if period else None
+        return df[df['date'] >= first].reset_index(drop=True) if first is not None else df
@@ -0,0 +1,20 @@
+"""
+Shared test setup: flat ml_service imports and throwaway model/data directories
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+# config reads these at import time, so they are set before any test imports it
+_ROOT = tempfile.mkdtemp(prefix='ml_service_tests_')
+os.environ.setdefault('ML_MODELS_DIR', os.path.join(_ROOT, 'models'))
+os.environ.setdefault('ML_DATA_DIR', os.path.join(_ROOT, 'data'))
+os.makedirs(os.environ['ML_MODELS_DIR'], exist_ok=True)
+os.makedirs(os.environ['ML_DATA_DIR'], exist_ok=True)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_ROOT, ignore_errors=True)
@@ -0,0 +1,51 @@
+"""
+Monte Carlo dropout interval calibration
+"""
+import numpy as np
+
+from mc_dropout import MCDropout, fit_calibration
+
+
+class _NoisyModel:
+    """Returns the first input value plus Gaussian noise when training"""
+
+    def __init__(self, std, seed=0):
+        self.std = std
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, x, training=False):
+        center = x[:, 0, :1]
+        return center + self.rng.normal(0, self.std, center.shape) if training else center
+
+
+def test_calibration_scales_interval_to_target_coverage():
+    rng = np.random.default_rng(1)
+    X = rng.random((256, 5, 3), dtype=np.float32)
+    predictions = X[:, 0, 0].astype(np.float64)
+    # Actual errors are twice as wide as the dropout spread
+    y = predictions + rng.normal(0, 0.02, len(X))
+
+    calibration = fit_calibration(_NoisyModel(0.01), X, y, predictions, interval=0.9, samples=64)
+    assert calibration['raw_coverage'] < 0.75
+    assert 1.6 < calibration['interval_scale'] < 2.5
+    assert abs(calibration['holdout_coverage'] - 0.9) < 0.1
+
+
+def test_summarize_applies_calibration():
+    class Identity:
+        def inverse_transform(self, x):
+            return x
+
+    samples = np.linspace(99, 101, 101)
+    mc = MCDropout(samples=32, interval=0.9)
+    raw = mc.summarize(samples, Identity(), 100.0)
+    calibrated = mc.summarize(samples, Identity(), 100.0, predicted_price=100.5,
+                              calibration={'interval': 0.9, 'interval_scale': 2.0})
+
+    assert not raw['prediction_interval']['calibrated']
+    assert calibrated['prediction_interval']['calibrated']
+    raw_half = (raw['prediction_interval']['upper'] - raw['prediction_interval']['lower']) / 2
+    interval = calibrated['prediction_interval']
+    assert np.isclose((interval['upper'] - interval['lower']) / 2, 2 * raw_half)
+    assert np.isclose((interval['upper'] + interval['lower']) / 2, 100.5)
+    assert calibrated['confidence'] < raw['confidence']
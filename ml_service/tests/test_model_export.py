@@ -0,0 +1,92 @@
+"""
+TFLite export parity against Keras, and serving an export without its
+dropout variant
+"""
+import os
+
+import pytest
+
+from config import MODELS_DIR, SEQUENCE_LENGTH
+from data_preprocessor import FEATURE_COLUMNS
+
+SYMBOL = 'PARITY.NS'
+
+
+@pytest.fixture(scope='module')
+def exported():
+    """A tiny untrained model saved and exported for SYMBOL"""
+    import tensorflow as tf
+    from model_export import export_model
+    from model_trainer import LSTMModelTrainer
+
+    tf.keras.utils.set_random_seed(0)
+    model = LSTMModelTrainer().build_model((SEQUENCE_LENGTH, len(FEATURE_COLUMNS)), units=8, layers=1)
+    model.save(str(MODELS_DIR / f"{SYMBOL}_model.h5"))
+    return export_model(SYMBOL)
+
+
+def test_export_matches_keras(exported):
+    from model_export import check_export
+
+    assert exported['parity']['passed']
+    assert exported['parity']['mc_passed']
+    assert os.path.exists(exported['mc_path'])
+
+    report = check_export(SYMBOL)
+    assert report['passed'], report['max_abs_error']
+    assert report['mc_passed'], report['mc_mean_diff']
+
+
+@pytest.fixture
+def lite_client(exported, monkeypatch):
+    """Flask client on the tflite backend with synthetic bars and no dropout export"""
+    import app as app_module
+    from lite_runtime import LITE_MC_SUFFIX
+    from synthetic_data import SyntheticDownloader
+
+    (MODELS_DIR / f"{SYMBOL}{LITE_MC_SUFFIX}").unlink(missing_ok=True)
+    monkeypatch.setattr(app_module, 'SERVING_BACKEND', 'tflite')
+    monkeypatch.setattr(app_module, '_pipeline', None)
+    monkeypatch.setattr(app_module, 'prediction_cache', None)
+    monkeypatch.setattr(app_module, 'prediction_store', None)
+    monkeypatch.setattr(app_module.get_preprocessor(), '_download', SyntheticDownloader(300))
+    return app_module.app.test_client()
+
+
+def test_predict_without_dropout_export(lite_client):
+    import app as app_module
+
+    response = lite_client.post('/api/v1/predict', json={'symbol': SYMBOL, 'days_ahead': 1})
+    assert response.status_code == 200, response.get_json()
+    prediction = response.get_json()['data']
+    assert 'uncertainty' not in prediction
+    assert 0 <= prediction['confidence'] <= 100
+    assert not app_module.get_pipeline().model_registry.get(SYMBOL)[1].model.has_dropout
+
+    response = lite_client.post('/api/v1/batch-predict', json={'symbols': [SYMBOL], 'days_ahead': 2})
+    assert response.status_code == 200, response.get_json()
+    assert 'uncertainty' not in response.get_json()['data'][0]
+
+
+def test_failed_dropout_parity_removes_old_export(exported, monkeypatch):
+    import model_export
+    from lite_runtime import LITE_MC_SUFFIX
+
+    mc_path = MODELS_DIR / f"{SYMBOL}{LITE_MC_SUFFIX}"
+    mc_path.write_bytes(b'stale')
+    check_parity = model_export.check_parity
+    monkeypatch.setattr(model_export, 'check_parity',
+                        lambda *args, **kwargs: {**check_parity(*args, **kwargs), 'mc_passed': False})
+
+    report = model_export.export_model(SYMBOL)
+    assert report['mc_path'] is None
+    assert not mc_path.exists()
+
+
+def test_rows_do_not_share_lstm_state(exported):
+    import numpy as np
+    from lite_runtime import LiteModel
+
+    x = np.random.default_rng(1).random((3,) + LiteModel(exported['path']).input_shape[1:], dtype=np.float32)
+    model = LiteModel(exported['path'])
+    np.testing.assert_array_equal(model(x)[:1], model(x[:1]))
@@ -2,7 +2,7 @@
 Script to train models for common Indian stocks
 Run this to pre-train models before starting the API
 """
-from model_trainer import LSTMModelTrainer
+from train_universe import train_universe
 
 # Common Indian stocks
 INDIAN_STOCKS = [
@@ -28,45 +28,9 @@ INDIAN_STOCKS = [
     'HCLTECH.NS'
 ]
 
-def train_all_models():
-    """Train models for all stocks"""
-    trainer = LSTMModelTrainer()
-    
-    successful = []
-    failed = []
-    
-    for symbol in INDIAN_STOCKS:
-        try:
-            print(f"\n{'='*50}")
-            print(f"Training {symbol}")
-            print(f"{'='*50}")
-            
-            result = trainer.train(symbol, period="2y", retrain=False)
-            
-            print(f"\n✅ Successfully trained {symbol}")
-            print(f"Metrics: {result['metrics']}")
-            
-            successful.append(symbol)
-            
-        except Exception as e:
-            print(f"\n❌ Failed to train {symbol}: {str(e)}")
-            failed.append({'symbol': symbol, 'error': str(e)})
-    
-    print(f"\n{'='*50}")
-    print("Training Summary")
-    print(f"{'='*50}")
-    print(f"Successful: {len(successful)}/{len(INDIAN_STOCKS)}")
-    print(f"Failed: {len(failed)}/{len(INDIAN_STOCKS)}")
-    
-    if successful:
-        print(f"\n✅ Successfully trained models:")
-        for s in successful:
-            print(f"  - {s}")
-    
-    if failed:
-        print(f"\n❌ Failed models:")
-        for f in failed:
-            print(f"  - {f['symbol']}: {f['error']}")
+def train_all_models(workers=None):
+    """Train models for all stocks across a process pool (resumable)"""
+    return train_universe(INDIAN_STOCKS, period="2y", workers=workers)
 
 if __name__ == '__main__':
     train_all_models()
@@ -0,0 +1,183 @@
+"""
+Parallel, resumable training of a symbol universe across a process pool
+
+Usage:
+    python train_universe.py                       # all stocks in check_progress.ALL_STOCKS
+    python train_universe.py --symbols TCS.NS INFY.NS --workers 2
+    python train_universe.py --retrain --force     # retrain everything
+"""
+import argparse
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from check_progress import ALL_STOCKS
+from config import TRAINING_WORKERS, TRAINING_THREADS_PER_WORKER
+from cpu_topology import configure_threads, describe, partition, pin_to_cores
+from training_manifest import TrainingManifest, DONE, FAILED, QUEUED
+
+
+def resolve_workers(workers=None, threads_per_worker=None):
+    """
+    Work out the process/thread split
+
+    Args:
+        workers: Worker processes (0 or None: TRAINING_WORKERS, else as many
+            as the thread budget allows)
+        threads_per_worker: TensorFlow/BLAS threads per worker (0 or None:
+            TRAINING_THREADS_PER_WORKER, else the cores split across workers)
+
+    Returns:
+        Tuple of (workers, threads_per_worker)
+    """
+    return partition(workers or TRAINING_WORKERS, threads_per_worker or TRAINING_THREADS_PER_WORKER)
+
+
+def _init_worker(threads, counter=None):
+    """Limit each worker's thread pools (and optionally pin it) before TensorFlow is imported"""
+    if counter is not None:
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+        pin_to_cores(index, threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    configure_threads(threads)
+
+
+def _train_job(symbol, period, retrain):
+    """Train one symbol inside a worker process"""
+    from model_trainer import LSTMModelTrainer
+
+    trainer = LSTMModelTrainer(verbose=2)
+    result = trainer.train(symbol, period=period, retrain=retrain)
+    return {
+        'metrics': result['metrics'],
+        'epochs': len(result['history'].get('loss', [])),
+        'mode': result.get('mode'),
+    }
+
+
+def train_universe(symbols=None, period='2y', retrain=False, workers=None,
+                   threads_per_worker=None, force=False, manifest=None, deadline=None):
+    """
+    Train every symbol that has not finished yet, in parallel
+
+    Args:
+        symbols: Symbols to train (defaults to ALL_STOCKS)
+        period: Data period for training
+        retrain: Passed through to LSTMModelTrainer.train
+        workers: Worker processes (defaults to every core)
+        threads_per_worker: TensorFlow/BLAS threads per worker
+        force: Train symbols even if the manifest says they are done
+        manifest: TrainingManifest to use (defaults to the shared one)
+        deadline: Epoch seconds after which no new job starts; running jobs
+            finish and the rest stay queued for the next run
+
+    Returns:
+        Dict mapping job status to list of symbols
+    """
+    symbols = list(symbols or ALL_STOCKS)
+    manifest = manifest or TrainingManifest()
+    workers, threads = resolve_workers(workers, threads_per_worker)
+
+    queue = []
+    for symbol in symbols:
+        if manifest.enqueue(symbol, period, retrain=retrain, force=force):
+            queue.append(symbol)
+
+    manifest.begin_run(workers, threads)
+
+    print(f"\n🚀 Training {len(queue)}/{len(symbols)} stocks ({describe(workers, threads)})")
+    skipped = [s for s in symbols if s not in queue]
+    if skipped:
+        print(f"⏭️  Skipping {len(skipped)} already trained or exhausted: {', '.join(skipped)}")
+
+    # Spawn keeps TensorFlow state out of the parent and lets each worker set
+    # its own thread limits before importing it
+    ctx = mp.get_context('spawn')
+    running = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(threads, ctx.Value('i', 0))) as pool:
+            pending = list(queue)
+            while pending or running:
+                # Only submit as many jobs as there are workers, so a job is
+                # marked running exactly when a worker picks it up
+                if pending and deadline is not None and time.time() >= deadline:
+                    print(f"⏰ Compute window closed; {len(pending)} jobs stay queued: {', '.join(pending)}")
+                    pending = []
+                    if not running:
+                        break
+                while pending and len(running) < workers:
+                    symbol = pending.pop(0)
+                    manifest.mark_running(symbol)
+                    future = pool.submit(_train_job, symbol, period, retrain)
+                    running[future] = (symbol, time.time())
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    symbol, started = running.pop(future)
+                    duration = time.time() - started
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        manifest.mark_failed(symbol, str(e), duration)
+                        print(f"❌ Failed to train {symbol}: {str(e)}")
+                        continue
+                    manifest.mark_done(symbol, result['metrics'], duration,
+                                       epochs=result['epochs'], mode=result['mode'])
+                    print(f"✅ Trained {symbol} in {duration:.0f}s "
+                          f"(MAE {result['metrics']['mae']:.2f}, {result['epochs']} epochs)")
+    except BrokenProcessPool as e:
+        for symbol, started in running.values():
+            manifest.mark_failed(symbol, f"Worker process died: {e}", time.time() - started)
+        raise
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted. Run again to resume; unfinished jobs will be re-queued.")
+        raise
+    finally:
+        manifest.end_run()
+
+    status = manifest.status(symbols)
+    print_summary(status, len(symbols))
+    return status
+
+
+def print_summary(status, total):
+    """Print a run summary grouped by job status"""
+    print(f"\n{'='*50}")
+    print("Training Summary")
+    print(f"{'='*50}")
+    print(f"✅ Done: {len(status[DONE])}/{total}")
+    print(f"❌ Failed: {len(status[FAILED])}/{total}")
+    print(f"⏳ Queued: {len(status[QUEUED])}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train LSTM models for a symbol universe in parallel")
+    parser.add_argument('--symbols', nargs='+', help="Symbols to train (default: all stocks)")
+    parser.add_argument('--period', default='2y', help="Data period for training")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: one per thread budget)")
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="TensorFlow/BLAS threads per worker (default: cores split across workers)")
+    parser.add_argument('--retrain', action='store_true', help="Retrain existing models")
+    parser.add_argument('--force', action='store_true', help="Train even if already done")
+    args = parser.parse_args()
+
+    train_universe(
+        symbols=args.symbols,
+        period=args.period,
+        retrain=args.retrain,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        force=args.force or args.retrain,
+    )
+
+
+if __name__ == '__main__':
+    main()
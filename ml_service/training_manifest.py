@@ -0,0 +1,162 @@
+"""
+Persistent job manifest for universe training runs
+"""
+import json
+import os
+import threading
+import time
+
+from config import MODELS_DIR, TRAINING_MANIFEST_PATH, TRAINING_MAX_ATTEMPTS
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def model_exists(symbol):
+    """True when a final model or best checkpoint is on disk for the symbol"""
+    return (
+        (MODELS_DIR / f"{symbol}_model.h5").exists()
+        or (MODELS_DIR / f"{symbol}_best.h5").exists()
+    )
+
+
+class TrainingManifest:
+    """
+    JSON record of every training job: status, attempts, metrics and duration
+
+    The orchestrator process is the only writer. Every change is written
+    atomically, so an interrupted run leaves a consistent manifest behind;
+    on the next start, jobs still marked running are re-queued.
+    """
+
+    def __init__(self, path=TRAINING_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {'run': None, 'jobs': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+
+    @property
+    def jobs(self):
+        return self.data['jobs']
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def begin_run(self, workers, threads_per_worker):
+        """Claim the manifest for this process and re-queue interrupted jobs"""
+        run = self.data.get('run')
+        if run and run.get('pid') != os.getpid() and run.get('finished_at') is None \
+                and _pid_alive(run.get('pid')):
+            raise RuntimeError(f"Another training run (pid {run['pid']}) is using {self.path}")
+
+        for job in self.jobs.values():
+            if job['status'] == RUNNING:
+                job['status'] = QUEUED
+
+        self.data['run'] = {
+            'pid': os.getpid(),
+            'started_at': time.time(),
+            'finished_at': None,
+            'workers': workers,
+            'threads_per_worker': threads_per_worker,
+        }
+        self.save()
+
+    def end_run(self):
+        self.data['run']['finished_at'] = time.time()
+        self.save()
+
+    def enqueue(self, symbol, period, retrain=False, force=False):
+        """
+        Queue a symbol unless it already trained successfully or has
+        used up its attempts
+
+        Returns:
+            True if the symbol needs training in this run
+        """
+        job = self.jobs.get(symbol)
+        if not force:
+            if model_exists(symbol) and (job is None or job['status'] == DONE):
+                return False
+            if job and job['status'] == FAILED and job['attempts'] >= TRAINING_MAX_ATTEMPTS:
+                return False
+
+        self.jobs[symbol] = {
+            'symbol': symbol,
+            'status': QUEUED,
+            'period': period,
+            'retrain': retrain,
+            'attempts': job['attempts'] if job else 0,
+            'queued_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'duration_seconds': None,
+            'metrics': job['metrics'] if job else None,
+            'error': None,
+        }
+        return True
+
+    def mark_running(self, symbol):
+        job = self.jobs[symbol]
+        job['status'] = RUNNING
+        job['attempts'] += 1
+        job['started_at'] = time.time()
+        self.save()
+
+    def mark_done(self, symbol, metrics, duration, **details):
+        job = self.jobs[symbol]
+        job.update({
+            'status': DONE,
+            'finished_at': time.time(),
+            'duration_seconds': round(duration, 2),
+            'metrics': metrics,
+            'error': None,
+            **details,
+        })
+        self.save()
+
+    def mark_failed(self, symbol, error, duration):
+        job = self.jobs[symbol]
+        job.update({
+            'status': FAILED,
+            'finished_at': time.time(),
+            'duration_seconds': round(duration, 2),
+            'error': error,
+        })
+        self.save()
+
+    def status(self, symbols):
+        """
+        Group symbols by job status
+
+        Symbols never seen by the orchestrator count as done when a model
+        file exists (models trained before the manifest was introduced).
+
+        Returns:
+            Dict mapping status to list of symbols
+        """
+        groups = {QUEUED: [], RUNNING: [], DONE: [], FAILED: []}
+        for symbol in symbols:
+            job = self.jobs.get(symbol)
+            if job is None:
+                groups[DONE if model_exists(symbol) else QUEUED].append(symbol)
+            else:
+                groups[job['status']].append(symbol)
+        return groups
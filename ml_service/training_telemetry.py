@@ -0,0 +1,450 @@
+"""
+Training run telemetry: one structured record per LSTMModelTrainer.train
+call, appended to a local JSON-lines store, with a query CLI
+
+Each record holds the symbol, training constants, data sizes, per-epoch
+wall time / throughput / memory, how many epochs EarlyStopping let run,
+stage timings, final metrics and artifact sizes. Usage:
+    python training_telemetry.py                           # most recent runs
+    python training_telemetry.py --symbol TCS.NS --since 30
+    python training_telemetry.py --group-by batch_size     # or symbol, mode, threads, host, ...
+    python training_telemetry.py --plan 50 --workers 4     # retraining window estimate
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config import MODELS_DIR, TRAINING_TELEMETRY_ENABLED, TRAINING_TELEMETRY_PATH
+from metrics import end_trace, start_trace
+from model_bundle import BUNDLE_SUFFIXES
+
+# Artifact files measured after a run, besides the bundle files
+MODEL_SUFFIXES = {'model': '_model.h5', 'best_checkpoint': '_best.h5'}
+
+# Keys that --group-by accepts, and where to find them in a record
+GROUP_KEYS = {
+    'symbol': ('symbol',),
+    'mode': ('mode',),
+    'status': ('status',),
+    'host': ('host',),
+    'threads': ('threads',),
+    'period': ('data', 'period'),
+    'batch_size': ('config', 'batch_size'),
+    'lstm_units': ('config', 'lstm_units'),
+    'sequence_length': ('config', 'sequence_length'),
+    'epochs': ('config', 'epochs'),
+    'model_version': ('config', 'model_version'),
+}
+
+
+def _peak_rss_mb():
+    """Process high-water resident set size, or None where `resource` is unavailable (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb():
+    """Current resident set size, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _thread_budget():
+    # Set by cpu_topology.configure_threads; None means the library default
+    value = os.environ.get('TF_NUM_INTRAOP_THREADS')
+    return int(value) if value else None
+
+
+def _round(value, digits=4):
+    return round(value, digits) if value is not None else None
+
+
+class TrainingRun:
+    """
+    Telemetry collected while one symbol trains
+
+    Used as a context manager around the whole run; the record is written
+    when the block exits, including runs that raise. Stage timings are
+    collected from the `stage()` timers already in the training path.
+    """
+
+    def __init__(self, symbol, period, retrain, store=None):
+        self.store = store
+        self.started = time.perf_counter()
+        self.record = {
+            'run_id': uuid.uuid4().hex[:12],
+            'symbol': symbol,
+            'mode': None,
+            'status': 'running',
+            'retrain_requested': bool(retrain),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'finished_at': None,
+            'wall_seconds': None,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'cpu_count': os.cpu_count(),
+            'threads': _thread_budget(),
+            'python': platform.python_version(),
+            'config': {},
+            'data': {'period': period},
+            'epochs': [],
+            'epochs_run': 0,
+            'early_stopped': False,
+            'best_epoch': None,
+            'stages': {},
+            'metrics': None,
+            'artifacts': {},
+            'rss_start_mb': None,
+            'peak_rss_mb': None,
+            'process_peak_rss_mb': None,
+            'error': None,
+        }
+        self._trace = self._token = None
+        self._rss_max = self._process_peak_start = None
+
+    def __enter__(self):
+        # Nested, so a request trace (/api/v1/train with timing) still sees the stages
+        self._trace, self._token = start_trace(nested=True)
+        self.record['rss_start_mb'] = _round(self._sample_rss(), 1)
+        self._process_peak_start = _peak_rss_mb()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_trace(self._token)
+        for name, seconds in self._trace.stages:
+            self.record['stages'][name] = round(self.record['stages'].get(name, 0.0) + seconds, 4)
+
+        self.record['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        self.record['wall_seconds'] = round(time.perf_counter() - self.started, 3)
+        self.record['peak_rss_mb'] = _round(self._run_peak_mb(), 1)
+        self.record['process_peak_rss_mb'] = _round(_peak_rss_mb(), 1)
+        if exc is not None:
+            self.record['status'] = 'failed'
+            self.record['error'] = f"{exc_type.__name__}: {exc}"
+
+        if self.store is not None:
+            try:
+                self.store.append(self.record)
+            except OSError as e:
+                # Telemetry must never fail a training run
+                print(f"⚠️  Could not record training telemetry: {e}")
+        return False
+
+    def _sample_rss(self):
+        rss = _rss_mb()
+        if rss is not None:
+            self._rss_max = max(self._rss_max or 0.0, rss)
+        return rss
+
+    def _run_peak_mb(self):
+        """
+        Peak resident memory since this run started
+
+        ru_maxrss is the worker's lifetime high-water mark, which an earlier
+        symbol in the same process may have set. It is this run's peak only
+        if it rose during the run; otherwise the largest sampled RSS is.
+        """
+        self._sample_rss()
+        process_peak = _peak_rss_mb()
+        if process_peak is not None and self._process_peak_start is not None \
+                and process_peak > self._process_peak_start:
+            return process_peak
+        return self._rss_max
+
+    def set_config(self, **constants):
+        self.record['config'].update(constants)
+
+    def set_data(self, **sizes):
+        self.record['data'].update({key: int(value) for key, value in sizes.items()})
+
+    def epoch_callback(self, samples, max_epochs):
+        """
+        Keras callback recording each epoch of a fit over `samples` windows
+
+        Imported lazily so the CLI can read the store without TensorFlow.
+        """
+        from tensorflow.keras.callbacks import Callback
+
+        run = self
+        if run.record['epochs']:
+            # A warm start that fell back to full training; keep its epochs apart
+            run.record['discarded_epochs'] = run.record['epochs']
+            run.record['epochs'] = []
+        run.record['max_epochs'] = int(max_epochs)
+
+        class EpochTelemetry(Callback):
+            def on_epoch_begin(self, epoch, logs=None):
+                self._epoch_start = time.perf_counter()
+
+            def on_epoch_end(self, epoch, logs=None):
+                seconds = time.perf_counter() - self._epoch_start
+                logs = logs or {}
+                learning_rate = getattr(self.model.optimizer, 'learning_rate', None)
+                try:
+                    learning_rate = float(learning_rate.numpy() if hasattr(learning_rate, 'numpy') else learning_rate)
+                except (TypeError, ValueError):
+                    learning_rate = None
+                run.record['epochs'].append({
+                    'epoch': epoch + 1,
+                    'seconds': round(seconds, 4),
+                    'samples_per_second': round(samples / seconds, 1) if seconds > 0 else None,
+                    'loss': _round(logs.get('loss'), 8),
+                    'val_loss': _round(logs.get('val_loss'), 8),
+                    'learning_rate': _round(learning_rate, 8),
+                    'rss_mb': _round(run._sample_rss(), 1),
+                    'peak_rss_mb': _round(run._run_peak_mb(), 1),
+                })
+
+        return EpochTelemetry()
+
+    def finish(self, result, models_dir=MODELS_DIR):
+        """Record the outcome of a successful run and its artifact sizes"""
+        record = self.record
+        record['status'] = 'ok'
+        record['mode'] = result.get('mode')
+        record['metrics'] = result.get('metrics')
+
+        epochs = record['epochs']
+        record['epochs_run'] = len(epochs)
+        record['early_stopped'] = 0 < len(epochs) < record.get('max_epochs', 0)
+        val_losses = [(e['val_loss'], e['epoch']) for e in epochs if e['val_loss'] is not None]
+        if val_losses:
+            record['best_epoch'] = min(val_losses)[1]
+        if epochs:
+            seconds = [e['seconds'] for e in epochs]
+            record['epoch_seconds_mean'] = round(statistics.mean(seconds), 4)
+            # The first epoch includes tracing; steady state is what scales
+            steady = [e['samples_per_second'] for e in epochs[1:] or epochs if e['samples_per_second']]
+            record['samples_per_second'] = round(statistics.median(steady), 1) if steady else None
+
+        symbol = record['symbol']
+        suffixes = {**MODEL_SUFFIXES, **BUNDLE_SUFFIXES}
+        for name, suffix in suffixes.items():
+            path = models_dir / f"{symbol}{suffix}"
+            if os.path.exists(path):
+                record['artifacts'][name] = os.path.getsize(path)
+
+
+class TelemetryStore:
+    """
+    Append-only JSON-lines file of training run records
+
+    Each record is written with a single append, so worker processes of
+    train_universe can share one file.
+    """
+
+    def __init__(self, path=TRAINING_TELEMETRY_PATH):
+        self.path = path
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        line = (json.dumps(record, default=str) + '\n').encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def runs(self, symbol=None, since_days=None, mode=None, status=None):
+        """
+        Records matching every given filter, oldest first
+
+        Lines that fail to parse (e.g. a run killed mid-write) are skipped.
+        """
+        if not os.path.exists(self.path):
+            return []
+        cutoff = (
+            (datetime.now() - timedelta(days=since_days)).isoformat(timespec='seconds')
+            if since_days is not None else None
+        )
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if symbol and record.get('symbol') != symbol:
+                    continue
+                if mode and record.get('mode') != mode:
+                    continue
+                if status and record.get('status') != status:
+                    continue
+                if cutoff and record.get('started_at', '') < cutoff:
+                    continue
+                records.append(record)
+        return records
+
+
+def get_telemetry_store():
+    """The shared store, or None when TRAINING_TELEMETRY_ENABLED is off"""
+    return TelemetryStore() if TRAINING_TELEMETRY_ENABLED else None
+
+
+def _group_value(record, key):
+    value = record
+    for part in GROUP_KEYS[key]:
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(records, group_by='symbol'):
+    """
+    Aggregate runs per value of `group_by`
+
+    Returns:
+        List of dicts sorted by mean wall time, slowest first
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(_group_value(record, group_by), []).append(record)
+
+    summary = []
+    for value, group in groups.items():
+        ok = [r for r in group if r.get('status') == 'ok']
+        walls = [r['wall_seconds'] for r in ok if r.get('wall_seconds') is not None]
+        epoch_seconds = [r['epoch_seconds_mean'] for r in ok if r.get('epoch_seconds_mean')]
+        throughput = [r['samples_per_second'] for r in ok if r.get('samples_per_second')]
+        epochs_run = [r['epochs_run'] for r in ok if r.get('epochs')]
+        summary.append({
+            group_by: value,
+            'runs': len(group),
+            'failed': len(group) - len(ok),
+            'wall_seconds_mean': round(statistics.mean(walls), 2) if walls else None,
+            'wall_seconds_p90': round(_percentile(walls, 0.9), 2) if walls else None,
+            'epoch_seconds_mean': round(statistics.mean(epoch_seconds), 3) if epoch_seconds else None,
+            'samples_per_second': round(statistics.median(throughput), 1) if throughput else None,
+            'epochs_run_mean': round(statistics.mean(epochs_run), 1) if epochs_run else None,
+            'early_stopped': sum(1 for r in ok if r.get('early_stopped')),
+            'peak_rss_mb_max': max((r['peak_rss_mb'] for r in group if r.get('peak_rss_mb')), default=None),
+        })
+    summary.sort(key=lambda row: row['wall_seconds_mean'] or 0, reverse=True)
+    return summary
+
+
+def plan_capacity(records, symbols, workers):
+    """
+    Estimate the wall time to retrain `symbols` symbols with `workers` processes
+
+    Uses each symbol's latest successful full or warm-start run; the
+    estimate assumes runs pack evenly across workers, so the slowest
+    single run is a lower bound.
+
+    Returns:
+        Dict with per-run statistics and the estimated window in seconds
+    """
+    latest = {}
+    for record in records:
+        if record.get('status') == 'ok' and record.get('mode') in ('full', 'warm_start'):
+            latest[record['symbol']] = record['wall_seconds']
+    if not latest:
+        return None
+
+    walls = list(latest.values())
+    mean = statistics.mean(walls)
+    p90 = _percentile(walls, 0.9)
+    return {
+        'symbols': symbols,
+        'workers': workers,
+        'measured_symbols': len(walls),
+        'run_seconds_mean': round(mean, 2),
+        'run_seconds_p90': round(p90, 2),
+        'estimate_seconds': round(max(symbols * mean / workers, max(walls)), 1),
+        'estimate_seconds_p90': round(max(symbols * p90 / workers, max(walls)), 1),
+    }
+
+
+def _format(value, width, digits=None):
+    if value is None:
+        return f"{'-':>{width}}"
+    if digits is not None and isinstance(value, (int, float)):
+        return f"{value:>{width}.{digits}f}"
+    return f"{str(value):>{width}}"
+
+
+def _print_runs(records):
+    print(f"{'started':19s} {'symbol':14s} {'mode':10s} {'status':7s} {'epochs':>7s} "
+          f"{'wall s':>8s} {'s/epoch':>8s} {'samples/s':>10s} {'rss MB':>7s} {'val_loss':>10s}")
+    for r in records:
+        epochs = f"{r.get('epochs_run', 0)}/{r.get('max_epochs', '-')}" + ('*' if r.get('early_stopped') else '')
+        best_val = min((e['val_loss'] for e in r.get('epochs', []) if e.get('val_loss') is not None), default=None)
+        print(f"{r['started_at']:19s} {r['symbol']:14s} {str(r.get('mode') or '-'):10s} {r['status']:7s} "
+              f"{epochs:>7s} {_format(r.get('wall_seconds'), 8, 1)} "
+              f"{_format(r.get('epoch_seconds_mean'), 8, 3)} {_format(r.get('samples_per_second'), 10, 0)} "
+              f"{_format(r.get('peak_rss_mb'), 7, 0)} {_format(best_val, 10, 6)}")
+        if r.get('error'):
+            print(f"{'':19s} ❌ {r['error']}")
+    print("(* stopped early)")
+
+
+def _print_summary(rows, group_by):
+    print(f"{group_by:16s} {'runs':>5s} {'failed':>6s} {'wall s':>8s} {'p90 s':>8s} {'s/epoch':>8s} "
+          f"{'samples/s':>10s} {'epochs':>7s} {'early':>6s} {'rss MB':>7s}")
+    for row in rows:
+        print(f"{str(row[group_by]):16s} {row['runs']:5d} {row['failed']:6d} "
+              f"{_format(row['wall_seconds_mean'], 8, 1)} {_format(row['wall_seconds_p90'], 8, 1)} "
+              f"{_format(row['epoch_seconds_mean'], 8, 3)} {_format(row['samples_per_second'], 10, 0)} "
+              f"{_format(row['epochs_run_mean'], 7, 1)} {row['early_stopped']:6d} "
+              f"{_format(row['peak_rss_mb_max'], 7, 0)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbol', help="Only runs for this symbol")
+    parser.add_argument('--since', type=float, metavar='DAYS', help="Only runs started in the last DAYS days")
+    parser.add_argument('--mode', choices=['full', 'warm_start', 'unchanged'])
+    parser.add_argument('--status', choices=['ok', 'failed'])
+    parser.add_argument('--last', type=int, default=20, help="Runs to list (default 20)")
+    parser.add_argument('--group-by', choices=sorted(GROUP_KEYS), help="Aggregate instead of listing runs")
+    parser.add_argument('--plan', type=int, metavar='SYMBOLS', help="Estimate a retraining window for SYMBOLS symbols")
+    parser.add_argument('--workers', type=int, help="Worker processes for --plan (default: train_universe's choice)")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of a table")
+    parser.add_argument('--path', default=str(TRAINING_TELEMETRY_PATH), help="Telemetry file")
+    args = parser.parse_args()
+
+    records = TelemetryStore(args.path).runs(args.symbol, args.since, args.mode, args.status)
+    if not records:
+        print(f"No training runs recorded in {args.path}")
+        raise SystemExit(0)
+
+    if args.plan:
+        from train_universe import resolve_workers
+        workers, _ = resolve_workers(args.workers)
+        output = plan_capacity(records, args.plan, workers)
+        if output is None:
+            print("No successful full or warm-start runs to plan from")
+            raise SystemExit(1)
+        if not args.json:
+            print(f"{output['symbols']} symbols on {workers} workers, from {output['measured_symbols']} "
+                  f"measured symbols (mean {output['run_seconds_mean']}s, p90 {output['run_seconds_p90']}s per run):")
+            print(f"  estimated window {output['estimate_seconds'] / 60:.1f} min "
+                  f"(p90 {output['estimate_seconds_p90'] / 60:.1f} min)")
+    elif args.group_by:
+        output = summarize(records, args.group_by)
+        if not args.json:
+            _print_summary(output, args.group_by)
+    else:
+        output = records[-args.last:]
+        if not args.json:
+            _print_runs(output)
+
+    if args.json:
+        print(json.dumps(output, indent=2, default=str))